@@ -0,0 +1,77 @@
+# Serial against parallel decryption of PassCrypt.decrypt_many().
+#
+# usage: python bench/decrypt.py [--rows N ...] [--workers N] [--runs N]
+#
+# Each batch of rows is decrypted in this process and by the pool of
+# PassCrypt.map_chunks(), forced with PARALLEL_THRESHOLD and MIN_CHUNK
+# lowered so that every size uses it. The pool is started before measuring,
+# as it is in a session that already used it. The best run of each one is
+# reported in rows per second, with the CPUs of the machine: the values of
+# PARALLEL_THRESHOLD and MIN_CHUNK come from this comparison, and with a
+# single CPU the pool can only show what it costs.
+from typing import List, Tuple
+from argparse import ArgumentParser, Namespace
+from pathlib import Path
+from sys import path
+from os import urandom, cpu_count
+from time import perf_counter
+
+SRC_DIR: Path = Path(__file__).resolve().parent.parent / 'src'
+path.insert(0, str(SRC_DIR))
+
+from modules.Crypt import PassCrypt, _decrypt_chunk
+
+def measure(
+    passcrypt:  PassCrypt,
+    rows:       List[Tuple[bytes, bytes, bytes]],
+    parallel:   bool,
+    runs:       int
+) -> float:
+    """
+    Returns:
+        float: Rows per second of the fastest run.
+    """
+    key: bytes = bytes(passcrypt.key)
+    best: float = float('inf')
+    for _ in range(runs):
+        start: float = perf_counter()
+        if parallel:
+            PassCrypt.map_chunks(_decrypt_chunk, (key,), rows)
+        else:
+            _decrypt_chunk(key, rows)
+        best = min(best, perf_counter() - start)
+    return len(rows) / best
+
+def main() -> None:
+    parser: ArgumentParser = ArgumentParser()
+    parser.add_argument('--rows', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+    parser.add_argument('--workers', type=int, default=max(cpu_count() or 1, 2))
+    parser.add_argument('--runs', type=int, default=3)
+    args: Namespace = parser.parse_args()
+
+    PassCrypt.WORKERS = args.workers
+    PassCrypt.PARALLEL_THRESHOLD = 0
+    PassCrypt.MIN_CHUNK = 1
+    passcrypt: PassCrypt = PassCrypt.generate()
+    encrypted: List[Tuple[bytes, bytes, bytes]] = [
+        passcrypt.encrypt(urandom(12).hex()) for _ in range(max(args.rows))
+    ]
+    # start the workers before measuring
+    PassCrypt.map_chunks(_decrypt_chunk, (bytes(passcrypt.key),), encrypted[:args.workers])
+
+    print(
+        f'{cpu_count()} CPUs, pool of {args.workers} workers\n'
+        f'{"rows":>8} {"serial rows/s":>14} {"parallel rows/s":>16} {"speedup":>8}'
+    )
+    for size in sorted(args.rows):
+        serial: float = measure(passcrypt, encrypted[:size], False, args.runs)
+        parallel: float = measure(passcrypt, encrypted[:size], True, args.runs)
+        print(
+            f'{size:>8,} {serial:14,.0f} {parallel:16,.0f} '
+            f'{parallel / serial:7.2f}x'
+        )
+    passcrypt.wipe()
+    PassCrypt._get_pool().shutdown()
+
+if __name__ == '__main__':
+    main()
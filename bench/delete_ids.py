@@ -0,0 +1,69 @@
+# Regression check of the deletion of many ids at once.
+#
+# usage: python bench/delete_ids.py
+#
+# del checks the ids that exist before deleting them. The ids given one by
+# one are bound to the query by chunks, below the limit of variables of
+# SQLite, and the ranges are checked with BETWEEN, so 'del 1..300000' and a
+# list of ids longer than the limit must delete the entries instead of
+# failing. The exit status is 1 if any check fails.
+from typing import List, Set
+from pathlib import Path
+from sys import exit, path
+from sqlite3 import connect, SQLITE_LIMIT_VARIABLE_NUMBER
+from tempfile import TemporaryDirectory
+
+SRC_DIR: Path = Path(__file__).resolve().parent.parent / 'src'
+path.insert(0, str(SRC_DIR))
+
+ENTRIES: int = 1200
+
+def check(name: str, ok: bool) -> bool:
+    print(f'[{"+" if ok else "!"}] {name}')
+    return ok
+
+def main() -> None:
+    from modules.DataManagement import DataManagement
+    from modules.Crypt import PassCrypt
+    from modules.StartCSP import StartCSP
+
+    limit: int = connect(':memory:').getlimit(SQLITE_LIMIT_VARIABLE_NUMBER)
+    passcrypt: PassCrypt = PassCrypt.generate()
+    failed: bool = False
+    with TemporaryDirectory() as home:
+        data_mgmt: DataManagement = DataManagement(Path(home) / 'ids.db')
+        data_mgmt.re_or_set_masterkey('Aa1!aaaa')
+        with data_mgmt.transaction():
+            data_mgmt.new_entries(
+                [(f'site{number}', 'user', *passcrypt.encrypt('pw')) for number in range(ENTRIES)]
+            )
+        entries: Set[int] = {row[0] for row in data_mgmt.iter_data(masked=True)}
+
+        found = data_mgmt.existing_ids(range(1, limit + 1000))
+        failed |= not check(
+            f'existing_ids() with {limit + 999:,} ids (limit {limit:,})',
+            found == entries
+        )
+        found = data_mgmt.existing_ids_between(1, 300_000)
+        failed |= not check('existing_ids_between() of 1..300000', found == entries)
+
+        csp: StartCSP = StartCSP.__new__(StartCSP)
+        csp.data_mgmt = data_mgmt
+        delete = StartCSP._del.__wrapped__
+        one_by_one: List[str] = [str(id) for id in sorted(entries)[:600]]
+        delete(csp, one_by_one)
+        failed |= not check(
+            f'del of {len(one_by_one)} ids one by one',
+            data_mgmt.count_data() == ENTRIES - len(one_by_one)
+        )
+        delete(csp, ['1..300000'])
+        failed |= not check(
+            'del 1..300000 deletes every entry and keeps the masterkey',
+            data_mgmt.count_data() == 0 and data_mgmt.check_master_key('Aa1!aaaa')
+        )
+        data_mgmt.save_and_exit(True)
+    passcrypt.wipe()
+    exit(1 if failed else 0)
+
+if __name__ == '__main__':
+    main()
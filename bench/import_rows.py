@@ -0,0 +1,71 @@
+# Regression check of the import of exports with rows that are not entries.
+#
+# usage: python bench/import_rows.py
+#
+# A JSON array or a JSONL file can hold any JSON value, not only objects: the
+# items that are not an object, the Bitwarden items whose 'uris' are not
+# objects and the fields that are not a single value must be counted as
+# invalid, as the malformed rows of a CSV file are, and the rest of the file
+# must still be imported. The exit status is 1 if any check fails.
+from typing import Dict, List
+from pathlib import Path
+from sys import exit, path
+from json import dumps
+from tempfile import TemporaryDirectory
+
+SRC_DIR: Path = Path(__file__).resolve().parent.parent / 'src'
+path.insert(0, str(SRC_DIR))
+
+VALID: List[Dict] = [
+    {'site': 'mail', 'username': 'ana', 'password': 'pw-1'},
+    {'name': 'bank', 'login': {'username': 'ana', 'password': 'pw-2', 'uris': ['x']}},
+    {'login': {'username': 'bob', 'password': 'pw-3', 'uris': [{'uri': 'https://a.b'}]}},
+    {'login': {'username': 'eve', 'password': 'pw-4', 'uris': 'https://c.d'}},
+]
+INVALID: List = [
+    1, 'x', None, True, [], ['site', 'user', 'pw'],
+    {'site': 'nopass', 'username': 'ana'},
+    {'site': {'nested': 1}, 'username': 'ana', 'password': 'pw'},
+]
+
+def check(name: str, ok: bool) -> bool:
+    print(f'[{"+" if ok else "!"}] {name}')
+    return ok
+
+def main() -> None:
+    from modules.DataManagement import DataManagement
+    from modules.ImportCredentials import ImportCredentials
+    from modules.Crypt import PassCrypt
+
+    rows: List = [item for pair in zip(INVALID, VALID + VALID) for item in pair]
+    exports: Dict[str, str] = {
+        'json': dumps(rows),
+        'jsonl': '\n'.join(dumps(row) for row in rows),
+        'bitwarden.json': dumps({'items': rows}),
+    }
+    passcrypt: PassCrypt = PassCrypt.generate()
+    failed: bool = False
+    with TemporaryDirectory() as home:
+        for name, content in exports.items():
+            file_path: Path = Path(home) / f'export.{name}'
+            file_path.write_text(content)
+            data_mgmt: DataManagement = DataManagement(Path(home) / f'{name}.db')
+            data_mgmt.re_or_set_masterkey('Aa1!aaaa')
+            importer: ImportCredentials = ImportCredentials(data_mgmt, passcrypt, file_path)
+            try:
+                importer.run()
+                error: str = ''
+            except Exception as e:
+                error = f' -> {e!r}'
+            failed |= not check(
+                f'{name}: {len(VALID)} imported, {len(INVALID)} invalid{error}',
+                not error
+                and importer.imported == len(VALID)
+                and importer.invalid == len(INVALID)
+            )
+            data_mgmt.save_and_exit(True)
+    passcrypt.wipe()
+    exit(1 if failed else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+# Import-time budget of the fast paths of csp.
+#
+# usage: python bench/importtime.py [--runs N] [--scale X]
+#
+# Every scenario is run with `python -X importtime` several times, the best
+# run is compared with its budget and the modules that the scenario must not
+# load are checked. The exit status is 1 if any scenario is over budget or
+# loads a forbidden module, so it can be used as a check before a release.
+from typing import NamedTuple, Optional, Tuple, List, Dict
+from argparse import ArgumentParser, Namespace
+from pathlib import Path
+from os import environ
+from sys import executable, exit
+from subprocess import run, CompletedProcess, DEVNULL, PIPE
+from tempfile import TemporaryDirectory
+
+SRC_DIR: Path = Path(__file__).resolve().parent.parent / 'src'
+
+class Scenario(NamedTuple):
+    """
+    Scenario: One way of starting csp.
+
+    Attributes:
+        name (str): Shown in the report.
+        args (List[str]): The arguments of the interpreter after -X importtime.
+        budget_ms (float): Maximum time importing modules, in milliseconds.
+        forbidden (Tuple[str]): Packages that must not be imported.
+    """
+    name:       str
+    args:       List[str]
+    budget_ms:  float
+    forbidden:  Tuple[str, ...]
+
+SCENARIOS: List[Scenario] = [
+    Scenario(
+        name='oneliner -cr',
+        args=[str(SRC_DIR / 'csp.py'), 'oneliner', '-cr', 'correct horse battery'],
+        budget_ms=60.0,
+        forbidden=('rich', 'prompt_toolkit', 'InquirerPy', 'Crypto', 'sqlite3'),
+    ),
+    Scenario(
+        name='oneliner (agent)',
+        args=['-c', 'import csp, modules.AgentClient'],
+        budget_ms=60.0,
+        forbidden=('rich', 'prompt_toolkit', 'InquirerPy', 'Crypto', 'pyperclip'),
+    ),
+    Scenario(
+        name='oneliner',
+        args=['-c', 'import csp, modules.StartCSP, utils.arguments'],
+        budget_ms=250.0,
+        forbidden=('prompt_toolkit', 'InquirerPy', 'pyperclip', 'rich.progress'),
+    ),
+]
+
+def parse_importtime(stderr: str) -> Tuple[float, List[str]]:
+    """
+    Read the report of -X importtime.
+
+    Returns:
+        Tuple[float, List[str]]: The milliseconds spent importing, the sum of
+        the cumulative time of the top-level imports, and every module
+        imported.
+    """
+    total_us: int = 0
+    modules: List[str] = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        _, cumulative, name = line.split('|')
+        if not cumulative.strip().isdigit():
+            continue
+        modules.append(name.strip())
+        if not name[1:].startswith(' '):
+            total_us += int(cumulative)
+    return (total_us / 1000, modules)
+
+def measure(scenario: Scenario, runs: int, home: str) -> Tuple[float, List[str]]:
+    """
+    Run a scenario several times and keep the fastest run, the others only
+    differ by the noise of the system.
+    """
+    env: Dict[str, str] = {
+        name: value for name, value in environ.items()
+        # without a display pyperclip fails instead of using the clipboard
+        if name not in ('DISPLAY', 'WAYLAND_DISPLAY')
+    }
+    env.update({
+        'HOME': home,
+        'PYTHONPATH': str(SRC_DIR),
+        'CSP_AGENT_SOCK': str(Path(home) / 'no-agent.sock'),
+    })
+    best: Optional[Tuple[float, List[str]]] = None
+    for _ in range(runs):
+        result: CompletedProcess = run(
+            [executable, '-X', 'importtime', *scenario.args],
+            stdin=DEVNULL,
+            stdout=DEVNULL,
+            stderr=PIPE,
+            text=True,
+            env=env,
+            cwd=SRC_DIR,
+        )
+        measured: Tuple[float, List[str]] = parse_importtime(result.stderr)
+        if best is None or measured[0] < best[0]:
+            best = measured
+    return best
+
+def main() -> None:
+    parser: ArgumentParser = ArgumentParser()
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument(
+        '--scale',
+        type=float,
+        default=float(environ.get('CSP_IMPORT_BUDGET_SCALE', 1.0)),
+        help='multiply the budgets, for slow machines'
+    )
+    args: Namespace = parser.parse_args()
+
+    failed: bool = False
+    with TemporaryDirectory() as home:
+        for scenario in SCENARIOS:
+            elapsed_ms, modules = measure(scenario, args.runs, home)
+            budget_ms: float = scenario.budget_ms * args.scale
+            loaded: List[str] = [
+                package for package in scenario.forbidden
+                if any(
+                    module == package or module.startswith(f'{package}.')
+                    for module in modules
+                )
+            ]
+            ok: bool = elapsed_ms <= budget_ms and not loaded
+            failed |= not ok
+            print(
+                f'[{"+" if ok else "!"}] {scenario.name:<18} '
+                f'{elapsed_ms:7.1f} ms / {budget_ms:6.1f} ms'
+            )
+            if loaded:
+                print(f'\tloads {", ".join(loaded)}')
+    exit(1 if failed else 0)
+
+if __name__ == '__main__':
+    main()
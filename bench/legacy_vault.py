@@ -0,0 +1,182 @@
+# Regression check of the upgrade of the vaults created before the data keys.
+#
+# usage: python bench/legacy_vault.py
+#
+# A vault is written as the first versions of csp did: the TEXT column
+# password with 'b64(ct)|b64(nonce)|b64(tag)' and the key derived by the
+# PBKDF2 of pycryptodome from the masterkey as str, which it encodes as
+# latin-1. The vault is opened with the current code, that must upgrade it and
+# still decrypt every entry, and opening it with a key that does not decrypt
+# the entries must fail instead of starting a session. The masterkeys have
+# characters out of ASCII. If the upgrade fails the session goes on with the
+# derived key and no key derivation stored: changing the masterkey and
+# rotating the data key must still work and give the vault a data key. The
+# exit status is 1 if any check fails.
+from typing import List, Tuple
+from pathlib import Path
+from os import environ
+from sys import exit, path
+from base64 import b64encode
+from hashlib import md5
+from sqlite3 import connect, Connection
+from tempfile import TemporaryDirectory
+
+SRC_DIR: Path = Path(__file__).resolve().parent.parent / 'src'
+path.insert(0, str(SRC_DIR))
+
+from Crypto.Cipher import AES
+from Crypto.Protocol.KDF import PBKDF2
+
+MASTERKEYS: List[str] = ['Contraseña#2024x', 'Größe-Çà-ü1!']
+ENTRIES: List[Tuple[str, str, str]] = [
+    ('mail', 'ana', 'pässwörd-1'),
+    ('bank', 'ana', 'Ñandú 2024'),
+    ('work', None, 'plain ascii'),
+]
+
+def create_legacy_vault(db_path: Path, masterkey: str) -> None:
+    """
+    Write a vault with the schema and the cipher of the first versions.
+    """
+    key: bytes = PBKDF2(masterkey, b'cspissoclean', dkLen=32)
+    conn: Connection = connect(db_path)
+    conn.execute('''
+        CREATE TABLE login (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            site TEXT,
+            username TEXT,
+            password TEXT REQUIRED
+        )
+    ''')
+    conn.execute(
+        "INSERT INTO login (site, username, password) VALUES ('csp', 'masterkey', ?)",
+        (f'{md5(masterkey.encode()).hexdigest()}1sk',)
+    )
+    for site, username, password in ENTRIES:
+        cipher = AES.new(key, AES.MODE_GCM)
+        ciphertext, tag = cipher.encrypt_and_digest(password.encode())
+        conn.execute(
+            'INSERT INTO login (site, username, password) VALUES (?, ?, ?)',
+            (site, username, '|'.join(
+                b64encode(part).decode() for part in (ciphertext, cipher.nonce, tag)
+            ))
+        )
+    conn.commit()
+    conn.close()
+
+def check(name: str, ok: bool) -> bool:
+    print(f'[{"+" if ok else "!"}] {name}')
+    return ok
+
+def open_without_upgrade(db_path: Path, masterkey: str) -> 'StartCSP':
+    """
+    Open a legacy vault as a session whose upgrade failed.
+    """
+    from modules.DataManagement import DataManagement
+    from modules.StartCSP import StartCSP
+
+    create_legacy_vault(db_path, masterkey)
+    csp: StartCSP = StartCSP.__new__(StartCSP)
+    csp.data_mgmt = DataManagement(db_path)
+    StartCSP._passcrypt = None
+    reencrypt = StartCSP._reencrypt_vault
+    StartCSP._reencrypt_vault = lambda self, new_passcrypt, kdf, kek: new_passcrypt.wipe()
+    try:
+        csp._open_data_key(masterkey)
+    finally:
+        StartCSP._reencrypt_vault = reencrypt
+    csp._confirm_masterkey = lambda msg: masterkey
+    return csp
+
+def decrypts(csp: 'StartCSP', masterkey: str) -> bool:
+    """
+    If the vault opens with the masterkey and every entry is decrypted.
+    """
+    from modules.StartCSP import StartCSP
+
+    try:
+        csp._open_data_key(masterkey)
+        passwords: List[str] = StartCSP._passcrypt.decrypt_many([
+            row[3:6] for row in csp.data_mgmt.iter_data()
+        ])
+    except ValueError:
+        return False
+    return passwords == [entry[2] for entry in ENTRIES]
+
+def main() -> None:
+    from modules.DataManagement import DataManagement
+    from modules.StartCSP import StartCSP
+
+    failed: bool = False
+    with TemporaryDirectory() as home:
+        environ['CSP_AGENT_SOCK'] = str(Path(home) / 'no-agent.sock')
+        for number, masterkey in enumerate(MASTERKEYS):
+            db_path: Path = Path(home) / f'legacy{number}.db'
+            create_legacy_vault(db_path, masterkey)
+            csp: StartCSP = StartCSP.__new__(StartCSP)
+            csp.data_mgmt = DataManagement(db_path)
+
+            StartCSP._passcrypt = None
+            try:
+                csp._open_data_key(f'{masterkey}x')
+                rejected: bool = False
+            except ValueError:
+                rejected = True
+            failed |= not check(
+                f'{masterkey!r}: a wrong key does not open the vault',
+                rejected and StartCSP._passcrypt is None
+            )
+
+            for attempt in ('upgraded', 'reopened'):
+                try:
+                    csp._open_data_key(masterkey)
+                    passwords: List[str] = StartCSP._passcrypt.decrypt_many([
+                        row[3:6] for row in csp.data_mgmt.iter_data()
+                    ])
+                except ValueError as ve:
+                    passwords = [str(ve)]
+                failed |= not check(
+                    f'{masterkey!r}: {attempt}, every entry is decrypted',
+                    passwords == [entry[2] for entry in ENTRIES]
+                )
+            failed |= not check(
+                f'{masterkey!r}: the data key is stored',
+                csp.data_mgmt.get_wrapped_key() is not None
+            )
+
+        old, new = MASTERKEYS
+        csp = open_without_upgrade(Path(home) / 'chmk.db', old)
+        failed |= not check(
+            'upgrade failed: the session has no key derivation',
+            csp.data_mgmt.get_kdf() is None and StartCSP._passcrypt is not None
+        )
+        csp._ask_new_masterkey = lambda: new
+        try:
+            StartCSP._change_masterkey.__wrapped__(csp)
+            error: str = ''
+        except Exception as e:
+            error = f' -> {e!r}'
+        failed |= not check(
+            f'upgrade failed: the masterkey is changed{error}',
+            not error
+            and csp.data_mgmt.get_kdf() is not None
+            and csp.data_mgmt.check_master_key(new)
+            and decrypts(csp, new)
+        )
+
+        csp = open_without_upgrade(Path(home) / 'rekey.db', old)
+        try:
+            StartCSP._rekey_data.__wrapped__(csp)
+            error = ''
+        except Exception as e:
+            error = f' -> {e!r}'
+        failed |= not check(
+            f'upgrade failed: the data key is rotated{error}',
+            not error
+            and csp.data_mgmt.get_wrapped_key() is not None
+            and decrypts(csp, old)
+        )
+    exit(1 if failed else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,183 @@
+# Storage and decoding cost of the encrypted passwords, by format.
+#
+# usage: python bench/storage.py [--rows N] [--runs N]
+#
+# The same entries are written in the two formats that csp has used: 'text',
+# the TEXT column password with 'b64(ct)|b64(nonce)|b64(tag)' (schema v1),
+# and 'blob', the BLOB columns ciphertext, nonce and tag (schema v2). For
+# each one it reports the bytes of the database file per entry (after VACUUM,
+# without the indexes, which are the same for both), the bytes of the
+# encrypted password per entry, and the time to read every entry and get the
+# (ciphertext, nonce, tag) that PassCrypt.decrypt() receives, the best of the
+# runs. The cost of the decryption itself is shown as a reference, it is the
+# same for both formats.
+from typing import NamedTuple, Callable, List, Tuple
+from argparse import ArgumentParser, Namespace
+from pathlib import Path
+from sys import path
+from os import urandom
+from time import perf_counter
+from base64 import b64encode, b64decode
+from sqlite3 import connect, Connection
+from tempfile import TemporaryDirectory
+
+SRC_DIR: Path = Path(__file__).resolve().parent.parent / 'src'
+path.insert(0, str(SRC_DIR))
+
+from modules.Crypt import PassCrypt
+
+Encrypted = Tuple[bytes, bytes, bytes]
+
+class StorageFormat(NamedTuple):
+    """
+    StorageFormat: One way of storing the encrypted passwords.
+
+    Attributes:
+        name (str): Shown in the report.
+        create (str): The table, as the schema of that version has it.
+        insert (str): Stores (site, username, *stored).
+        select (str): Reads the stored columns of every entry.
+        store (Callable): From the encrypted password to the stored columns.
+        load (Callable): From the row read to the encrypted password.
+        payload (str): SQL sum of the bytes of the encrypted passwords.
+    """
+    name:       str
+    create:     str
+    insert:     str
+    select:     str
+    store:      Callable[[Encrypted], Tuple]
+    load:       Callable[[Tuple], Encrypted]
+    payload:    str
+
+def _store_text(encrypted: Encrypted) -> Tuple[str]:
+    return ('|'.join(b64encode(part).decode() for part in encrypted),)
+
+def _load_text(row: Tuple[str]) -> Encrypted:
+    return tuple(map(b64decode, row[0].split('|')))
+
+FORMATS: List[StorageFormat] = [
+    StorageFormat(
+        name='text (v1)',
+        create='''
+            CREATE TABLE login (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                site TEXT,
+                username TEXT,
+                password TEXT REQUIRED
+            )
+        ''',
+        insert='INSERT INTO login (site, username, password) VALUES (?, ?, ?)',
+        select='SELECT password FROM login',
+        store=_store_text,
+        load=_load_text,
+        payload='SELECT SUM(LENGTH(CAST(password AS BLOB))) FROM login',
+    ),
+    StorageFormat(
+        name='blob (v2)',
+        create='''
+            CREATE TABLE login (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                site TEXT,
+                username TEXT,
+                password TEXT REQUIRED,
+                ciphertext BLOB,
+                nonce BLOB,
+                tag BLOB
+            )
+        ''',
+        insert='''
+            INSERT INTO login (site, username, ciphertext, nonce, tag)
+            VALUES (?, ?, ?, ?, ?)
+        ''',
+        select='SELECT ciphertext, nonce, tag FROM login',
+        store=lambda encrypted: encrypted,
+        load=lambda row: row,
+        payload='''
+            SELECT SUM(LENGTH(ciphertext) + LENGTH(nonce) + LENGTH(tag))
+            FROM login
+        ''',
+    ),
+]
+
+def create(
+    storage:    StorageFormat,
+    db_path:    Path,
+    entries:    List[Tuple[str, str, Encrypted]]
+) -> Connection:
+    conn: Connection = connect(db_path)
+    conn.execute(storage.create)
+    conn.executemany(
+        storage.insert,
+        [(site, username, *storage.store(encrypted)) for site, username, encrypted in entries]
+    )
+    conn.commit()
+    conn.execute('VACUUM')
+    return conn
+
+def read(storage: StorageFormat, conn: Connection) -> Tuple[float, List[Encrypted]]:
+    """
+    Read and decode every entry.
+
+    Returns:
+        Tuple[float, List[Encrypted]]: The milliseconds that it took and the
+        encrypted passwords.
+    """
+    start: float = perf_counter()
+    encrypted: List[Encrypted] = [
+        storage.load(row) for row in conn.execute(storage.select)
+    ]
+    return ((perf_counter() - start) * 1000, encrypted)
+
+def main() -> None:
+    parser: ArgumentParser = ArgumentParser()
+    parser.add_argument('--rows', type=int, default=10_000)
+    parser.add_argument('--runs', type=int, default=5)
+    args: Namespace = parser.parse_args()
+
+    passcrypt: PassCrypt = PassCrypt.generate()
+    entries: List[Tuple[str, str, Encrypted]] = [
+        (
+            f'site-{number}.example.com',
+            f'user{number}@example.com',
+            passcrypt.encrypt(urandom(12).hex())
+        )
+        for number in range(args.rows)
+    ]
+    print(
+        f'{args.rows:,} entries, passwords of 24 characters\n'
+        f'{"format":<10} {"file B/row":>10} {"password B/row":>14} '
+        f'{"read+decode ms":>14} {"us/row":>7}'
+    )
+    with TemporaryDirectory() as folder:
+        for storage in FORMATS:
+            conn: Connection = create(
+                storage,
+                Path(folder) / f'{storage.name.split()[0]}.db',
+                entries
+            )
+            file_size: int = (
+                conn.execute('PRAGMA page_count').fetchone()[0]
+                * conn.execute('PRAGMA page_size').fetchone()[0]
+            )
+            payload: int = conn.execute(storage.payload).fetchone()[0]
+            elapsed_ms: float = min(
+                read(storage, conn)[0] for _ in range(args.runs)
+            )
+            print(
+                f'{storage.name:<10} {file_size / args.rows:10.1f} '
+                f'{payload / args.rows:14.1f} {elapsed_ms:14.1f} '
+                f'{elapsed_ms * 1000 / args.rows:7.2f}'
+            )
+            conn.close()
+
+    # the cost per row does not depend on the rows, a sample is enough
+    sample: List[Tuple[str, str, Encrypted]] = entries[:10_000]
+    start: float = perf_counter()
+    for _, _, encrypted in sample:
+        passcrypt.decrypt(encrypted)
+    elapsed_ms = (perf_counter() - start) * 1000
+    print(f'decrypt (reference) {elapsed_ms * 1000 / len(sample):.2f} us/row')
+    passcrypt.wipe()
+
+if __name__ == '__main__':
+    main()
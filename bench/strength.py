@@ -0,0 +1,102 @@
+# Regression check of the scores of StrengthEstimator.
+#
+# usage: python bench/strength.py [--estimates N] [--runs N]
+#
+# The common passwords, a word of the frequency lists with a capital, digits
+# or a symbol added, must score below STRONG_SCORE, and the random passwords
+# and the long phrases must reach it. The time to read WORDS_FILE and the
+# time of an estimate of a password of 34 characters, in the fastest run of
+# estimates, are reported. The exit status is 1 if any check fails.
+from typing import List
+from argparse import ArgumentParser, Namespace
+from pathlib import Path
+from sys import exit, path
+from random import Random
+from string import ascii_letters, digits, punctuation
+from time import perf_counter
+
+SRC_DIR: Path = Path(__file__).resolve().parent.parent / 'src'
+path.insert(0, str(SRC_DIR))
+
+WEAK: List[str] = [
+    'Liverpool1!', 'Pokemon123', 'Blink182!', 'Jesus123!', 'Minecraft1',
+    'Password1!', 'Qwerty123!', 'Iloveyou2!', 'Superman1', 'Chelsea2010',
+    'Michael1985', 'Barcelona10', 'Dragon123!', 'Sunshine1!', 'Letmein123',
+    'Charlie2015!', 'P@ssw0rd', 'Monkey12345', 'Football#1', 'Jennifer99',
+    'Summer2024!', 'Princesa123', 'Hannah2010', 'Gonzalez1!', 'London2012',
+]
+STRONG: List[str] = [
+    'purple elephant dancing quietly', 'Tr0ub4dor&3x!9Lm', 'w7#Kq!zR2@pX',
+]
+LONG_PASSWORD: str = 'Correct-Horse-Battery-Staple-1985!'
+
+def check(name: str, ok: bool) -> bool:
+    print(f'[{"+" if ok else "!"}] {name}')
+    return ok
+
+def main() -> None:
+    parser: ArgumentParser = ArgumentParser()
+    parser.add_argument('--estimates', type=int, default=100)
+    parser.add_argument('--runs', type=int, default=5)
+    args: Namespace = parser.parse_args()
+
+    from modules.Strength import StrengthEstimator, Estimate, Words
+    from modules.CreateSecurePassword import CreateSecurePasswords
+
+    start: float = perf_counter()
+    words: Words = StrengthEstimator._load()
+    print(
+        f'[*] {len(words.words):,} words read in '
+        f'{(perf_counter() - start) * 1000:.1f} ms'
+    )
+    failed: bool = False
+    for password in WEAK:
+        estimate: Estimate = StrengthEstimator.estimate(password)
+        failed |= not check(
+            f'{password} scores {estimate.score}, below {StrengthEstimator.STRONG_SCORE}',
+            not estimate.strong
+        )
+    for password in STRONG:
+        estimate = StrengthEstimator.estimate(password)
+        failed |= not check(f'{password} scores {estimate.score}', estimate.strong)
+    estimate = StrengthEstimator.estimate('correcthorsebatterystaple')
+    failed |= not check('correcthorsebatterystaple scores 4', estimate.score == 4)
+
+    generator: Random = Random(0)
+    alphabet: str = ascii_letters + digits + punctuation
+    randoms: List[str] = [
+        ''.join(generator.choice(alphabet) for _ in range(16)) for _ in range(50)
+    ]
+    failed |= not check(
+        f'{len(randoms)} random passwords of 16 characters are strong',
+        all(StrengthEstimator.estimate(password).strong for password in randoms)
+    )
+    phrases: List[str] = [
+        'correct horse battery staple', 'the quick brown fox jumps',
+        'my dog likes the beach at night',
+    ]
+    crafted: List[str] = [
+        CreateSecurePasswords(phrase, ' ').create_strong_pass() for phrase in phrases
+    ]
+    failed |= not check(
+        f'{len(crafted)} crafted phrases meet is_strong_password()',
+        all(
+            CreateSecurePasswords(phrase, ' ').is_strong_password(password)
+            for phrase, password in zip(phrases, crafted)
+        )
+    )
+
+    best: float = float('inf')
+    for _ in range(args.runs):
+        start = perf_counter()
+        for _ in range(args.estimates):
+            StrengthEstimator.estimate(LONG_PASSWORD)
+        best = min(best, perf_counter() - start)
+    print(
+        f'[*] {best * 1000 / args.estimates:.2f} ms per estimate '
+        f'of {len(LONG_PASSWORD)} characters'
+    )
+    exit(1 if failed else 0)
+
+if __name__ == '__main__':
+    main()
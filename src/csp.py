@@ -1,20 +1,36 @@
 # author: z4yt0s
 # github: https://github.com/z4yt0s/csp
 
-from typing import NoReturn
+from typing import NoReturn, Optional
 from argparse import Namespace
+from sys import argv, exit
 
-from modules.StartCSP import StartCSP, vs
-from utils.arguments import start_args
-from utils.visuals_setup import NAME, LOGO, FOOTERN
+from modules.CreateSecurePassword import CreateSecurePasswords
 
 def main() -> NoReturn:
-    vs.banner(NAME, LOGO, FOOTERN)
+    # the oneliner calls that only craft a password, or that an agent running
+    # can serve, are run without loading the rest of the tool
+    if argv[1:2] == ['oneliner']:
+        status: Optional[int] = CreateSecurePasswords.oneliner(argv[2:])
+        if status is None:
+            from modules.AgentClient import AgentClient
+            if AgentClient.available():
+                status = AgentClient().oneliner(argv[2:])
+        if status is not None:
+            exit(status)
+
+    from modules.StartCSP import StartCSP, vs
+    from utils.arguments import start_args
+
     args: Namespace = start_args()
+    # the banner is for the people, not for the scripts
+    if args.mode == 'prompt' or getattr(args, 'help', False):
+        from utils.visuals_setup import NAME, LOGO, FOOTERN
+        vs.banner(NAME, LOGO, FOOTERN)
     start_csp: StartCSP = StartCSP()
     
     mode = start_csp.detect_mode(args)
     mode.start_mode()
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
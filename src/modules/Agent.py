@@ -0,0 +1,361 @@
+from typing import (
+    ClassVar,
+    Callable,
+    Optional,
+    Union,
+    Any,
+    Tuple,
+    List,
+    Dict
+)
+from pathlib import Path
+from os import getuid, chmod
+from struct import Struct
+from json import dumps, loads, JSONDecodeError
+from sqlite3 import Error as SQLiteError
+from argparse import Namespace
+from signal import signal, SIGTERM
+from socket import (
+    socket,
+    AF_UNIX,
+    SOCK_STREAM,
+    SOL_SOCKET,
+    timeout as SocketTimeout
+)
+try:
+    from socket import SO_PEERCRED
+except ImportError:
+    # not available on macOS and BSD
+    SO_PEERCRED = None
+
+from modules.Visuals import Visuals
+from modules.DataManagement import DataManagement
+from modules.Crypt import PassCrypt
+from modules.KeyCache import KeyCache
+from modules.VaultRegistry import VaultRegistry
+from modules.path import PathCSP
+from modules.AgentClient import AgentClient, AgentError, AgentUnavailable
+
+vs: Visuals = Visuals()
+
+class CSPAgent:
+    """
+    CSPAgent: Long-running process, in the style of ssh-agent, that keeps the
+    keys of the unlocked vaults in memory and serves the oneliner clients over
+    a Unix socket, so each call does not import the whole tool, ask for the
+    masterkey or run the KDF. The keys are added by the normal modes after a
+    successful login and are wiped after ttl seconds without use.
+
+    Only processes of the same user are served: the socket is created with
+    mode 0600 inside a 0700 directory and, where the platform supports it,
+    the uid of the peer is checked with SO_PEERCRED on every connection.
+
+    Attributes:
+        OPERATIONS (ClassVar[Tuple[str]]): The requests understood.
+        CLIENT_TIMEOUT (ClassVar[float]): Seconds that a client can take to
+        send its request.
+        MASK (ClassVar[str]): Shown instead of the passwords that are not
+        revealed.
+    """
+    OPERATIONS: ClassVar[Tuple[str]] = (
+        'ping', 'add_key', 'lock', 'list', 'get', 'add', 'stop'
+    )
+    CLIENT_TIMEOUT: ClassVar[float] = 5.0
+    MASK: ClassVar[str] = '*' * 8
+    _PEERCRED: ClassVar[Struct] = Struct('3i')
+
+    def __init__(self, args: Namespace) -> None:
+        """
+        Initialize the instance of class CSPAgent.
+
+        Args:
+            args (Namespace): The arguments of the agent mode, ttl and kill.
+        """
+        self.args: Namespace = args
+        self.socket_path: Path = AgentClient.SOCKET_PATH
+        self.key_cache: KeyCache = KeyCache(args.ttl)
+        self.databases: Dict[Path, DataManagement] = {}
+        self._running: bool = False
+
+    def start_mode(self) -> None:
+        """
+        Start the agent, or stop the running one with --kill.
+        """
+        if self.args.kill:
+            try:
+                AgentClient(self.socket_path).request('stop')
+                vs.print('The agent was stopped', type='inf')
+            except (OSError, AgentError):
+                vs.print('There is no agent running', type='err')
+            return None
+        if AgentClient.available(self.socket_path):
+            try:
+                AgentClient(self.socket_path).request('ping')
+                vs.print('The agent is already running', type='err')
+                return None
+            except (OSError, AgentError):
+                # socket left by an agent that was killed
+                self.socket_path.unlink()
+        self.serve_forever()
+
+    def serve_forever(self) -> None:
+        """
+        Listen on the socket and serve the requests one by one until a stop
+        request or SIGTERM, then wipe the keys and remove the socket.
+        """
+        self.socket_path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        chmod(self.socket_path.parent, 0o700)
+        server: socket = socket(AF_UNIX, SOCK_STREAM)
+        server.bind(str(self.socket_path))
+        chmod(self.socket_path, 0o600)
+        server.listen()
+        server.settimeout(1.0)
+        signal(SIGTERM, lambda *_: self._stop())
+        vs.print(f'Agent listening on {self.socket_path}', type='inf')
+        vs.print(
+            f'Keys are wiped after {self.key_cache.idle_timeout:g}s without use',
+            type='inf'
+        )
+        self._running = True
+        try:
+            while self._running:
+                try:
+                    conn, _ = server.accept()
+                except SocketTimeout:
+                    continue
+                with conn:
+                    self._serve_client(conn)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.close()
+            self.socket_path.unlink(missing_ok=True)
+            self.key_cache.lock()
+            for data_mgmt in self.databases.values():
+                data_mgmt.save_and_exit(True)
+            vs.print('Agent stopped, the keys were wiped', type='inf')
+
+    def _stop(self) -> None:
+        self._running = False
+
+    def _peer_allowed(self, conn: socket) -> bool:
+        """
+        Check that the peer runs as the same user. Platforms without
+        SO_PEERCRED rely on the permissions of the socket.
+        """
+        if SO_PEERCRED is None:
+            return True
+        raw: bytes = conn.getsockopt(
+            SOL_SOCKET,
+            SO_PEERCRED,
+            CSPAgent._PEERCRED.size
+        )
+        _, uid, _ = CSPAgent._PEERCRED.unpack(raw)
+        return uid == getuid()
+
+    def _serve_client(self, conn: socket) -> None:
+        """
+        Read the request of a client, run it and send the answer.
+        """
+        conn.settimeout(CSPAgent.CLIENT_TIMEOUT)
+        answer: Dict[str, Any]
+        try:
+            if not self._peer_allowed(conn):
+                answer = {'ok': False, 'error': 'permission denied'}
+            else:
+                with conn.makefile('rb') as stream:
+                    raw: bytes = stream.readline()
+                answer = self._answer(raw)
+        except OSError:
+            return None
+        try:
+            conn.sendall(dumps(answer).encode() + b'\n')
+        except OSError:
+            pass
+
+    def _answer(self, raw: bytes) -> Dict[str, Any]:
+        """
+        Run a request. Its errors are sent to the client, a request that
+        fails never stops the agent.
+        """
+        op: str = ''
+        try:
+            request: Dict[str, Any] = loads(raw)
+            op = request.pop('op', '')
+            if op not in CSPAgent.OPERATIONS:
+                raise ValueError(f'the operation {op} is not valid')
+            handler: Callable = getattr(self, f'_op_{op}')
+            with self.key_cache.hold():
+                return {'ok': True, 'result': handler(**request)}
+        except (
+            ValueError,
+            TypeError,
+            KeyError,
+            JSONDecodeError,
+            SQLiteError,
+            AgentError
+        ) as e:
+            return {
+                'ok': False,
+                'error': str(e),
+                'unavailable': isinstance(e, AgentUnavailable)
+            }
+        except Exception as e:
+            vs.print(f'The request {op} failed -> {e!r}', type='err', bad_render=True)
+            return {'ok': False, 'error': f'the request failed: {e!r}'}
+
+    def _vault(self, vault: Optional[str]) -> Path:
+        """
+        Resolve the vault of a request by its name in the registry or its
+        path. If it is not given, the only unlocked vault or the default vault
+        of the registry is used.
+        """
+        registry: VaultRegistry = VaultRegistry(PathCSP.ROOT_DIR)
+        if vault is not None:
+            try:
+                return registry.resolve(vault).resolve()
+            except ValueError as e:
+                raise AgentUnavailable(str(e))
+        unlocked: List[Path] = self.key_cache.vaults()
+        if len(unlocked) == 1:
+            return unlocked[0]
+        default: Optional[Path] = registry.default
+        if default is not None and default.resolve() in unlocked:
+            return default.resolve()
+        raise AgentUnavailable('specify the vault, there is not a single one unlocked')
+
+    def _open(self, vault: Optional[str]) -> Tuple[DataManagement, PassCrypt]:
+        """
+        Return the connection and the key of an unlocked vault.
+        """
+        db_path: Path = self._vault(vault)
+        passcrypt: Optional[PassCrypt] = self.key_cache.get(db_path)
+        if passcrypt is None:
+            raise AgentUnavailable(f'the vault {db_path.name} is locked')
+        if db_path not in self.databases:
+            self.databases[db_path] = DataManagement(db_path)
+        return (self.databases[db_path], passcrypt)
+
+    def _decrypt_rows(
+        self,
+        passcrypt:      PassCrypt,
+        crypt_raw_data: List[Tuple[Any]]
+    ) -> List[List[Union[int, str, None]]]:
+        passwords: List[str] = passcrypt.decrypt_many(
+            [fields[3:6] for fields in crypt_raw_data]
+        )
+        return [
+            [*fields[:3], password]
+            for fields, password in zip(crypt_raw_data, passwords)
+        ]
+
+    def _mask_rows(
+        self,
+        raw_data: List[Tuple[Any]]
+    ) -> List[List[Union[int, str, None]]]:
+        return [[*fields[:3], CSPAgent.MASK] for fields in raw_data]
+
+    def _op_ping(self) -> str:
+        return 'pong'
+
+    def _op_stop(self) -> None:
+        self._stop()
+
+    def _op_add_key(self, vault: str, key: str) -> None:
+        """
+        Cache the key of a vault, only if it decrypts an entry of the vault:
+        a wrong key would reveal nothing and encrypt the new entries so that
+        they can not be read again. The key of a vault without entries can
+        not be verified and is not accepted.
+        """
+        db_path: Path = Path(vault).resolve()
+        if not db_path.is_file():
+            raise AgentError(f'the vault {vault} does not exist')
+        passcrypt: PassCrypt = PassCrypt.from_key(bytes.fromhex(key))
+        if db_path not in self.databases:
+            self.databases[db_path] = DataManagement(db_path)
+        row: Optional[Tuple[Any, ...]] = next(
+            iter(self.databases[db_path].iter_data(limit=1) or ()),
+            None
+        )
+        if row is None:
+            passcrypt.wipe()
+            raise AgentError(f'the vault {db_path.name} has no entries to verify the key')
+        try:
+            passcrypt.decrypt(row[3:6])
+        except ValueError:
+            passcrypt.wipe()
+            raise AgentError(f'the key does not decrypt the vault {db_path.name}')
+        self.key_cache.store(db_path, passcrypt)
+
+    def _op_lock(self, vault: Optional[str] = None) -> None:
+        self.key_cache.lock(None if vault is None else Path(vault).resolve())
+
+    def _op_list(
+        self,
+        vault:  Optional[str] = None,
+        order:  str = 'id',
+        after:  Optional[int] = None,
+        limit:  Optional[int] = None,
+        desc:   bool = False,
+        reveal: bool = False
+    ) -> List[List[Union[int, str, None]]]:
+        data_mgmt, passcrypt = self._open(vault)
+        crypt_raw_data: List[Tuple[Any]] = data_mgmt.iter_data(
+            order,
+            after,
+            limit,
+            desc,
+            masked=not reveal
+        ).fetchall()
+        if not reveal:
+            return self._mask_rows(crypt_raw_data)
+        return self._decrypt_rows(passcrypt, crypt_raw_data)
+
+    def _op_get(
+        self,
+        field:  str,
+        value:  str,
+        mode:   str = 'exact',
+        vault:  Optional[str] = None,
+        limit:  Optional[int] = None,
+        reveal: bool = False
+    ) -> List[List[Union[int, str, None]]]:
+        if field not in ('id', 'site', 'username', 'password'):
+            raise ValueError('the field used to make the query is not valid')
+        if mode not in ('exact', 'prefix', 'substr', 'fuzzy'):
+            raise ValueError(f'the search mode {mode} is not valid')
+        if mode != 'exact' and field not in DataManagement._SEARCH_FIELDS:
+            raise ValueError('only site and username can be searched by text')
+        data_mgmt, passcrypt = self._open(vault)
+        if field == 'password':
+            crypt_raw_data = data_mgmt.iter_data()
+        elif mode == 'exact':
+            crypt_raw_data = data_mgmt.list_data(field, value)
+        else:
+            crypt_raw_data = data_mgmt.search_data(field, value, mode)
+        if not reveal and field != 'password':
+            return self._mask_rows(list(crypt_raw_data or [])[:limit])
+        rows: List[List[Union[int, str, None]]] = self._decrypt_rows(
+            passcrypt,
+            list(crypt_raw_data or [])
+        )
+        if field == 'password':
+            rows = [row for row in rows if row[3] == value]
+        if not reveal:
+            rows = self._mask_rows(rows)
+        return rows[:limit]
+
+    def _op_add(
+        self,
+        password:   str,
+        site:       Optional[str] = None,
+        username:   Optional[str] = None,
+        vault:      Optional[str] = None
+    ) -> None:
+        data_mgmt, passcrypt = self._open(vault)
+        inserted: bool = False
+        with data_mgmt.transaction():
+            inserted = data_mgmt.new_entry(passcrypt.encrypt(password), site, username)
+        if not inserted:
+            raise AgentError('the entry could not be inserted')
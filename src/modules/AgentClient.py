@@ -0,0 +1,234 @@
+from typing import (
+    ClassVar,
+    Optional,
+    Union,
+    Any,
+    Tuple,
+    List,
+    Dict
+)
+from pathlib import Path
+from os import environ
+from sys import stderr
+from stat import S_ISSOCK
+from json import dumps, loads
+from socket import socket, AF_UNIX, SOCK_STREAM
+from argparse import ArgumentParser, Namespace
+
+class AgentError(Exception):
+    """
+    Raised when the agent answers a request with an error, for example
+    because the vault is not unlocked in it.
+    """
+
+class AgentUnavailable(AgentError):
+    """
+    Raised when the agent can not be reached or can not serve the vault: the
+    request was not run, so the normal mode can run it instead.
+    """
+
+class AgentClient:
+    """
+    AgentClient: Client of the csp agent. It only uses the standard library,
+    so the oneliner mode can talk with a running agent without importing
+    rich, prompt_toolkit or pycryptodome and without deriving the key again.
+
+    Protocol: one JSON object per line. The request has the operation in
+    'op' and its parameters, the answer has 'ok' and 'result' or 'error',
+    and 'unavailable' if the request was not run because the vault is not
+    unlocked in the agent.
+
+    Attributes:
+        SOCKET_PATH (ClassVar[Path]): The socket of the agent, read from the
+        CSP_AGENT_SOCK environment variable (Def: ~/.csp/agent/agent.sock).
+        TIMEOUT (ClassVar[float]): Seconds to wait for an answer.
+        FORMATS (ClassVar[Tuple[str]]): The output formats of the oneliner
+        mode that the agent serves, printed as the normal mode prints them.
+    """
+    SOCKET_PATH: ClassVar[Path] = Path(environ.get(
+        'CSP_AGENT_SOCK',
+        Path.home() / '.csp' / 'agent' / 'agent.sock'
+    ))
+    TIMEOUT: ClassVar[float] = 10.0
+    FORMATS: ClassVar[Tuple[str]] = ('plain', 'tsv')
+    # as Visuals prints the messages in tsv and plain
+    _MESSAGES: ClassVar[Dict[str, Tuple[str, str]]] = {
+        'inf': ('info', '[*]'),
+        'err': ('error', '[!]'),
+    }
+    _TSV_ESCAPES: ClassVar[Dict[int, str]] = str.maketrans({
+        '\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'
+    })
+
+    def __init__(self, socket_path: Optional[Path] = None) -> None:
+        self.socket_path: Path = Path(socket_path or AgentClient.SOCKET_PATH)
+
+    @classmethod
+    def available(cls, socket_path: Optional[Path] = None) -> bool:
+        """
+        Check, without connecting, if there is an agent socket.
+        """
+        try:
+            return S_ISSOCK(Path(socket_path or cls.SOCKET_PATH).stat().st_mode)
+        except OSError:
+            return False
+
+    def request(self, op: str, **params: Any) -> Any:
+        """
+        Send a request to the agent and wait for its answer.
+
+        Args:
+            op (str): The operation [ping, add_key, lock, list, get, add, stop].
+            params (Any): The parameters of the operation.
+
+        Returns:
+            Any: The result of the operation.
+
+        Raises:
+            AgentUnavailable: If the agent is not running or can not serve
+            the vault, the request was not run.
+            AgentError: If the agent rejected the request.
+            OSError: If the connection failed once the request was sent, the
+            agent may have run it.
+        """
+        with socket(AF_UNIX, SOCK_STREAM) as conn:
+            conn.settimeout(AgentClient.TIMEOUT)
+            try:
+                conn.connect(str(self.socket_path))
+            except OSError as e:
+                raise AgentUnavailable(f'the agent can not be reached: {e}')
+            conn.sendall(dumps({'op': op, **params}).encode() + b'\n')
+            with conn.makefile('rb') as stream:
+                raw: bytes = stream.readline()
+        if not raw:
+            raise AgentError('the agent closed the connection')
+        answer: Dict[str, Any] = loads(raw)
+        if not answer.get('ok'):
+            error: type = AgentUnavailable if answer.get('unavailable') else AgentError
+            raise error(answer.get('error', 'unknown error'))
+        return answer.get('result')
+
+    def oneliner(self, argv: List[str]) -> Optional[int]:
+        """
+        Run the oneliner arguments supported by the agent (list, search and
+        add, with the output formats of FORMATS) without loading the rest of
+        the tool. Once a request is sent it is never run again by the normal
+        mode: if it fails the agent may have run it, the error is printed.
+
+        Args:
+            argv (List[str]): The arguments after 'oneliner'.
+
+        Returns:
+            int: The exit status, or None if the arguments are not supported
+            by the agent, it is not running or the vault is not unlocked in
+            it, then the caller has to run the normal oneliner mode.
+        """
+        parser: ArgumentParser = ArgumentParser(add_help=False)
+        parser.add_argument('-l', '--list', nargs='*', default=None)
+        parser.add_argument('-a', '--add', nargs='+', default=None)
+        parser.add_argument('--limit', type=int, default=None)
+        parser.add_argument('--after', type=int, default=None)
+        parser.add_argument('--order', default='id')
+        parser.add_argument('--desc', action='store_true', default=False)
+        parser.add_argument('--reveal', action='store_true', default=False)
+        parser.add_argument('-V', '--vault', default=None)
+        parser.add_argument('-F', '--format', default=None, dest='output_format')
+        try:
+            args, unknown = parser.parse_known_args(argv)
+        except SystemExit:
+            return None
+        if (
+            unknown
+            or (args.list is None) == (args.add is None)
+            or args.output_format not in AgentClient.FORMATS
+        ):
+            return None
+
+        try:
+            if args.add is not None:
+                return self._oneliner_add(args)
+            return self._oneliner_list(args)
+        except AgentUnavailable:
+            return None
+        except (OSError, ValueError, AgentError) as e:
+            self._print(
+                f'The agent could not run the request -> {e}',
+                'err',
+                args.output_format
+            )
+            return 1
+
+    @staticmethod
+    def _print(msg: str, type: str, output_format: str) -> None:
+        record, symbol = AgentClient._MESSAGES[type]
+        if output_format == 'tsv':
+            print(f'{record}\t{msg.translate(AgentClient._TSV_ESCAPES)}', file=stderr)
+        else:
+            print(f'{symbol} {msg}.', file=stderr)
+
+    def _oneliner_list(self, args: Namespace) -> Optional[int]:
+        words: List[str] = [
+            word for arg in args.list for word in arg.split(' ') if word
+        ]
+        if len(words) == 1:
+            # let the normal mode print its error
+            return None
+        if words:
+            field, value, *mode = words
+            rows: List[List[Union[int, str, None]]] = self.request(
+                'get',
+                field=field,
+                value=value,
+                mode=mode[0] if mode else 'exact',
+                limit=args.limit,
+                reveal=args.reveal,
+                vault=args.vault
+            )
+            if not rows:
+                self._print(
+                    'The requested value was not found in the database',
+                    'err',
+                    args.output_format
+                )
+                return 1
+        else:
+            rows = self.request(
+                'list',
+                order=args.order,
+                after=args.after,
+                limit=args.limit,
+                desc=args.desc,
+                reveal=args.reveal,
+                vault=args.vault
+            )
+        if args.output_format == 'tsv':
+            print('id\tsite\tusername\tpassword')
+        for row in rows:
+            if args.output_format == 'tsv':
+                print('\t'.join(
+                    '' if data is None else str(data).translate(AgentClient._TSV_ESCAPES)
+                    for data in row
+                ))
+            else:
+                print('\t'.join('-' if data is None else str(data) for data in row))
+        return 0
+
+    def _oneliner_add(self, args: Namespace) -> Optional[int]:
+        words: List[str] = [
+            word for arg in args.add for word in arg.split(' ') if word
+        ]
+        if len(words) not in (2, 3):
+            # let the normal mode print its error
+            return None
+        if len(words) == 2:
+            words = [None, *words]
+        site, username, password = words
+        self.request(
+            'add',
+            site=site,
+            username=username,
+            password=password,
+            vault=args.vault
+        )
+        self._print('Data inserted correcly', 'inf', args.output_format)
+        return 0
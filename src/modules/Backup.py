@@ -0,0 +1,264 @@
+from typing import (
+    ClassVar,
+    Callable,
+    Optional,
+    Iterator,
+    BinaryIO
+)
+from pathlib import Path
+from os import replace
+from hashlib import pbkdf2_hmac
+from time import sleep
+from struct import Struct
+from zlib import compressobj, decompressobj
+from sqlite3 import connect, Connection
+
+from Crypto.Cipher import AES
+from Crypto.Random import get_random_bytes
+
+class BackupError(Exception):
+    """
+    Raised when an archive is corrupted, truncated, has been tampered with or
+    the masterkey used to open it is wrong.
+    """
+
+class VaultBackup:
+    """
+    VaultBackup: Creates and restores encrypted backup archives of the database
+    files. The database is read page by page under a read snapshot, compressed
+    and encrypted in independent AES-GCM chunks, so neither the backup nor the
+    restore keep the vault in memory or write an intermediate plain copy.
+
+    Archive format:
+        header: MAGIC | salt (16) | iterations (4)
+        chunk:  final flag (1) | length (4) | tag (16) | ciphertext
+    Each chunk uses its index as nonce and authenticates the header, its index
+    and the final flag, so reordering, truncation or tampering are detected
+    while the archive is being restored. The key is derived by PBKDF2-SHA256
+    from the masterkey encoded as UTF-8, the archives of the first format
+    (LATIN1_MAGIC) encoded it as latin-1 and are still restored.
+
+    Attributes:
+        MAGIC (ClassVar[bytes]): Signature of the archive files.
+        LATIN1_MAGIC (ClassVar[bytes]): Signature of the archives whose key
+        was derived from the masterkey encoded as latin-1.
+        CHUNK_SIZE (ClassVar[int]): Bytes of the database read per chunk.
+        KDF_ITERATIONS (ClassVar[int]): PBKDF2 iterations for the archive key.
+        SNAPSHOT_ATTEMPTS (ClassVar[int]): Times that a consistent snapshot is
+        tried before giving up when the database is being written.
+    """
+    MAGIC: ClassVar[bytes] = b'CSPBAK02'
+    LATIN1_MAGIC: ClassVar[bytes] = b'CSPBAK01'
+    CHUNK_SIZE: ClassVar[int] = 1 << 16
+    KDF_ITERATIONS: ClassVar[int] = 200_000
+    SNAPSHOT_ATTEMPTS: ClassVar[int] = 10
+    _HEADER: ClassVar[Struct] = Struct('>8s16sI')
+    _CHUNK_HEADER: ClassVar[Struct] = Struct('>?I16s')
+
+    def __init__(self, masterkey: str) -> None:
+        """
+        Initialize the instance of class VaultBackup.
+
+        Args:
+            masterkey (str): The masterkey used to derive the key of the archive.
+        """
+        self._masterkey: str = masterkey
+
+    def _derive_key(
+        self,
+        salt:       bytes,
+        iterations: int,
+        encoding:   str = 'utf-8'
+    ) -> bytes:
+        """
+        Raises:
+            BackupError: If the masterkey can not be encoded, then it is not
+            the one of an archive of LATIN1_MAGIC.
+        """
+        try:
+            masterkey: bytes = self._masterkey.encode(encoding)
+        except UnicodeEncodeError:
+            raise BackupError('wrong masterkey for this archive')
+        return pbkdf2_hmac('sha256', masterkey, salt, iterations, 32)
+
+    @staticmethod
+    def _cipher(key: bytes, index: int, header: bytes, final: bool) -> AES:
+        cipher = AES.new(key, AES.MODE_GCM, nonce=index.to_bytes(12, 'big'))
+        cipher.update(header + index.to_bytes(8, 'big') + bytes([final]))
+        return cipher
+
+    def backup(
+        self,
+        db_path:        Path,
+        archive_path:   Path,
+        progress:       Optional[Callable[[int, int], None]] = None
+    ) -> int:
+        """
+        Create an encrypted archive of the database. The archive is written to
+        a temporary file and renamed when complete.
+
+        Args:
+            db_path (Path): The database file to backup.
+            archive_path (Path): Where to write the archive.
+            progress (Callable[[int, int]], optional): Called after each chunk
+            with the bytes read and the total size of the database.
+
+        Returns:
+            int: The size in bytes of the database saved.
+        """
+        salt: bytes = get_random_bytes(16)
+        header: bytes = VaultBackup._HEADER.pack(
+            VaultBackup.MAGIC,
+            salt,
+            VaultBackup.KDF_ITERATIONS
+        )
+        key: bytes = self._derive_key(salt, VaultBackup.KDF_ITERATIONS)
+        archive_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path: Path = archive_path.with_name(f'{archive_path.name}.part')
+
+        conn: Connection = self._open_snapshot(db_path)
+        try:
+            total: int = db_path.stat().st_size
+            with open(db_path, 'rb') as db_file, open(tmp_path, 'wb') as archive:
+                archive.write(header)
+                compressor = compressobj(6)
+                index: int = 0
+                read: int = 0
+                while page := db_file.read(VaultBackup.CHUNK_SIZE):
+                    read += len(page)
+                    compressed: bytes = compressor.compress(page)
+                    if compressed:
+                        self._write_chunk(archive, key, index, header, compressed)
+                        index += 1
+                    if progress is not None:
+                        progress(read, total)
+                self._write_chunk(
+                    archive, key, index, header, compressor.flush(), final=True
+                )
+        finally:
+            conn.rollback()
+            conn.close()
+        replace(tmp_path, archive_path)
+        return read
+
+    def _open_snapshot(self, db_path: Path) -> Connection:
+        """
+        Open a read transaction on the database in which the database file
+        itself is consistent and will not be modified until it ends. In
+        rollback-journal mode the SHARED lock already guarantees it. In WAL
+        mode the log is checkpointed first, and the snapshot is only accepted
+        if the log is still empty once it is held, because then no checkpoint
+        can write to the database file while it is open.
+
+        Args:
+            db_path (Path): The database file.
+
+        Returns:
+            Connection: A connection holding the read transaction.
+        """
+        wal_path: Path = db_path.with_name(f'{db_path.name}-wal')
+        conn: Connection = connect(db_path, isolation_level=None)
+        for _ in range(VaultBackup.SNAPSHOT_ATTEMPTS):
+            conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+            conn.execute('BEGIN')
+            conn.execute('SELECT COUNT(*) FROM sqlite_master').fetchone()
+            if not wal_path.exists() or wal_path.stat().st_size == 0:
+                return conn
+            conn.rollback()
+            sleep(0.05)
+        conn.close()
+        raise BackupError('the database is being written, try again later')
+
+    def _write_chunk(
+        self,
+        archive:    BinaryIO,
+        key:        bytes,
+        index:      int,
+        header:     bytes,
+        data:       bytes,
+        final:      bool = False
+    ) -> None:
+        cipher: AES = VaultBackup._cipher(key, index, header, final)
+        ciphertext, tag = cipher.encrypt_and_digest(data)
+        archive.write(VaultBackup._CHUNK_HEADER.pack(final, len(ciphertext), tag))
+        archive.write(ciphertext)
+
+    def _read_chunks(self, archive: BinaryIO) -> Iterator[bytes]:
+        """
+        Read, verify and decrypt the chunks of an archive one by one.
+
+        Args:
+            archive (BinaryIO): The opened archive, positioned at the beginning.
+
+        Yields:
+            bytes: The compressed content of each chunk, already authenticated.
+        """
+        header: bytes = archive.read(VaultBackup._HEADER.size)
+        if len(header) != VaultBackup._HEADER.size:
+            raise BackupError('the file is not a csp archive')
+        magic, salt, iterations = VaultBackup._HEADER.unpack(header)
+        if magic not in (VaultBackup.MAGIC, VaultBackup.LATIN1_MAGIC):
+            raise BackupError('the file is not a csp archive')
+        key: bytes = self._derive_key(
+            salt,
+            iterations,
+            'utf-8' if magic == VaultBackup.MAGIC else 'latin-1'
+        )
+
+        index: int = 0
+        while True:
+            raw_header: bytes = archive.read(VaultBackup._CHUNK_HEADER.size)
+            if len(raw_header) != VaultBackup._CHUNK_HEADER.size:
+                raise BackupError('the archive is truncated')
+            final, length, tag = VaultBackup._CHUNK_HEADER.unpack(raw_header)
+            ciphertext: bytes = archive.read(length)
+            if len(ciphertext) != length:
+                raise BackupError('the archive is truncated')
+            cipher: AES = VaultBackup._cipher(key, index, header, final)
+            try:
+                yield cipher.decrypt_and_verify(ciphertext, tag)
+            except ValueError as ve:
+                msg: str = f'chunk {index} failed verification, wrong masterkey or corrupted'
+                raise BackupError(msg) from ve
+            if final:
+                if archive.read(1):
+                    raise BackupError('unexpected data after the last chunk')
+                return
+            index += 1
+
+    def restore(
+        self,
+        archive_path:   Path,
+        db_path:        Path,
+        progress:       Optional[Callable[[int, int], None]] = None
+    ) -> int:
+        """
+        Restore an archive into a new database file. Each chunk is verified
+        before being written and the database only appears in db_path once
+        the whole archive has been verified.
+
+        Args:
+            archive_path (Path): The archive to restore.
+            db_path (Path): The database file to create.
+            progress (Callable[[int, int]], optional): Called after each chunk
+            with the bytes of archive read and its total size.
+
+        Returns:
+            int: The size in bytes of the restored database.
+        """
+        tmp_path: Path = db_path.with_name(f'{db_path.name}.part')
+        total: int = archive_path.stat().st_size
+        written: int = 0
+        try:
+            with open(archive_path, 'rb') as archive, open(tmp_path, 'wb') as db_file:
+                decompressor = decompressobj()
+                for data in self._read_chunks(archive):
+                    written += db_file.write(decompressor.decompress(data))
+                    if progress is not None:
+                        progress(archive.tell(), total)
+                written += db_file.write(decompressor.flush())
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        replace(tmp_path, db_path)
+        return written
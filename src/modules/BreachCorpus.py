@@ -0,0 +1,269 @@
+from typing import (
+    ClassVar,
+    Optional,
+    Callable,
+    BinaryIO,
+    Iterator,
+    Tuple,
+    List,
+    Dict
+)
+# os.path and not pathlib, this module is imported by the crftp oneliner
+from os import environ, fstat, replace, remove
+from os.path import expanduser, isfile, join, dirname
+from struct import Struct
+from mmap import mmap, ACCESS_READ
+
+class BreachCorpus:
+    """
+    BreachCorpus: An offline check of passwords against a corpus of breached
+    passwords, as the SHA-1 dumps of Have I Been Pwned ("HASH:COUNT" lines).
+    The dump is converted once (build()) to a binary index of fixed width
+    records sorted by hash:
+
+        magic (8 bytes) | records (uint64) | fan-out (65537 x uint64) |
+        records: SHA-1 (20 bytes) + times seen (uint32)
+
+    The fan-out gives the first record of each prefix of 16 bits, so a
+    lookup is a binary search of a few records of one prefix. The index is
+    memory mapped, not read: a corpus of several GB costs no memory, the
+    pages that a lookup touches are read by the system and each lookup takes
+    microseconds, with no network.
+
+    Attributes:
+        FILE_NAME (ClassVar[str]): Name of the index in the csp folder, the
+        CSP_BREACH_INDEX environment variable gives another path.
+        MAGIC (ClassVar[bytes]): The first bytes of an index.
+        RECORD (ClassVar[Struct]): A record, hash and times seen.
+        RUN_RECORDS (ClassVar[int]): Records sorted in memory at once by
+        build(), the dump is sorted in runs that are merged.
+    """
+    FILE_NAME: ClassVar[str] = 'breaches.idx'
+    MAGIC: ClassVar[bytes] = b'CSPHIBP1'
+    RECORD: ClassVar[Struct] = Struct('>20sI')
+    RUN_RECORDS: ClassVar[int] = 1 << 19
+    _COUNT: ClassVar[Struct] = Struct('>Q')
+    _PREFIXES: ClassVar[int] = 1 << 16
+    _FANOUT: ClassVar[Struct] = Struct(f'>{(1 << 16) + 1}Q')
+    _FANOUT_PAIR: ClassVar[Struct] = Struct('>QQ')
+    _HEADER: ClassVar[int] = 8 + 8 + 8 * ((1 << 16) + 1)
+    _MAX_TIMES: ClassVar[int] = (1 << 32) - 1
+    # path -> (modification time, size, mapped index, records)
+    _mapped: ClassVar[Dict[str, Tuple[int, int, mmap, int]]] = {}
+
+    def __init__(self, root_dir: Optional[str] = None) -> None:
+        """
+        Initialize the instance of class BreachCorpus.
+
+        Args:
+            root_dir (Path, optional): The csp folder (Def: ~/.csp, as
+            PathCSP.ROOT_DIR, which is not imported to keep crftp light).
+        """
+        self.path: str = environ.get('CSP_BREACH_INDEX') or join(
+            root_dir or expanduser('~/.csp'),
+            BreachCorpus.FILE_NAME
+        )
+        self.records: int = 0
+        self._index: Optional[mmap] = None
+
+    @property
+    def exists(self) -> bool:
+        return isfile(self.path)
+
+    def open(self) -> 'BreachCorpus':
+        """
+        Map the index, the mapping is shared by the instances while the file
+        does not change.
+
+        Raises:
+            ValueError: If the index does not exist or is not valid.
+        """
+        try:
+            with open(self.path, 'rb') as index_file:
+                stat = fstat(index_file.fileno())
+                cached = BreachCorpus._mapped.get(self.path)
+                if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+                    self._index, self.records = cached[2:]
+                    return self
+                if stat.st_size < BreachCorpus._HEADER:
+                    raise ValueError(f'the file {self.path} is not a breach index')
+                index: mmap = mmap(index_file.fileno(), 0, access=ACCESS_READ)
+        except OSError as e:
+            raise ValueError(f'the file {self.path} can not be read: {e}')
+        records: int = BreachCorpus._COUNT.unpack_from(index, 8)[0]
+        if (
+            index[:8] != BreachCorpus.MAGIC
+            or stat.st_size != BreachCorpus._HEADER + records * BreachCorpus.RECORD.size
+        ):
+            index.close()
+            raise ValueError(f'the file {self.path} is not a breach index')
+        BreachCorpus._mapped[self.path] = (stat.st_mtime_ns, stat.st_size, index, records)
+        self._index, self.records = index, records
+        return self
+
+    def count(self, password: str) -> int:
+        """
+        Times that the password was seen in the breaches, 0 if it was not.
+
+        Raises:
+            ValueError: If the index can not be opened.
+        """
+        # hashlib is only imported when there is an index to look up
+        from hashlib import sha1
+        return self.count_digest(sha1(password.encode('utf-8')).digest())
+
+    def count_digest(self, digest: bytes) -> int:
+        """
+        As count(), with the SHA-1 digest of the password.
+        """
+        if self._index is None:
+            self.open()
+        index: mmap = self._index
+        size: int = BreachCorpus.RECORD.size
+        # the records of the prefix of the digest
+        low, high = BreachCorpus._FANOUT_PAIR.unpack_from(
+            index,
+            16 + 8 * int.from_bytes(digest[:2], 'big')
+        )
+        while low < high:
+            middle: int = (low + high) // 2
+            pos: int = BreachCorpus._HEADER + middle * size
+            found: bytes = index[pos:pos + 20]
+            if found < digest:
+                low = middle + 1
+            elif found > digest:
+                high = middle
+            else:
+                return BreachCorpus.RECORD.unpack_from(index, pos)[1]
+        return 0
+
+    def build(
+        self,
+        source:     str,
+        progress:   Optional[Callable[[int], None]] = None
+    ) -> int:
+        """
+        Convert a dump to the index, once. Each line is a SHA-1 in hex,
+        optionally followed by ':' and the times seen, the other lines of the
+        dump (empty or starting with '#') are skipped. The dump does not need
+        to be sorted nor to fit in memory: it is sorted in runs of
+        RUN_RECORDS records, written to temporary files next to the index,
+        and the runs are merged while the index is written. The hashes that
+        appear several times are merged adding their times. The index
+        replaces the previous one when it is complete.
+
+        Args:
+            source (str): The path of the dump.
+            progress (Callable[[int], None], optional): Called with the lines
+            read after each run.
+
+        Returns:
+            int: The records of the index.
+
+        Raises:
+            ValueError: If a line is not a SHA-1 hash.
+            OSError: If the dump can not be read or the index written.
+        """
+        from tempfile import TemporaryDirectory
+        from heapq import merge
+        folder: str = dirname(self.path) or '.'
+        partial: str = f'{self.path}.tmp'
+        with TemporaryDirectory(dir=folder) as runs_dir:
+            runs: List[str] = []
+            for number, run in enumerate(self._runs(source, progress)):
+                runs.append(join(runs_dir, f'{number}.run'))
+                with open(runs[-1], 'wb') as run_file:
+                    run_file.write(b''.join(run))
+            run_files: List[BinaryIO] = [open(run, 'rb', buffering=1 << 20) for run in runs]
+            try:
+                records: int = self._write(
+                    partial,
+                    merge(*map(self._read_run, run_files))
+                )
+            except BaseException:
+                if isfile(partial):
+                    remove(partial)
+                raise
+            finally:
+                for run_file in run_files:
+                    run_file.close()
+        replace(partial, self.path)
+        return records
+
+    def _runs(
+        self,
+        source:     str,
+        progress:   Optional[Callable[[int], None]]
+    ) -> Iterator[List[bytes]]:
+        """
+        Yield the records of the dump in sorted runs.
+        """
+        pack: Callable[..., bytes] = BreachCorpus.RECORD.pack
+        run: List[bytes] = []
+        lines: int = 0
+        with open(source, 'rb') as dump:
+            for lines, line in enumerate(dump, 1):
+                line = line.strip()
+                if not line or line.startswith(b'#'):
+                    continue
+                digest, _, times = line.partition(b':')
+                if len(digest) != 40:
+                    raise ValueError(f'the line {lines} of {source} is not a SHA-1 hash')
+                try:
+                    run.append(pack(
+                        bytes.fromhex(digest.decode('ascii')),
+                        min(int(times) if times else 1, BreachCorpus._MAX_TIMES)
+                    ))
+                except (UnicodeDecodeError, ValueError):
+                    raise ValueError(f'the line {lines} of {source} is not a SHA-1 hash')
+                if len(run) >= BreachCorpus.RUN_RECORDS:
+                    run.sort()
+                    yield run
+                    run = []
+                    if progress is not None:
+                        progress(lines)
+        if run:
+            run.sort()
+            yield run
+        if progress is not None:
+            progress(lines)
+
+    @staticmethod
+    def _read_run(run_file: BinaryIO) -> Iterator[bytes]:
+        size: int = BreachCorpus.RECORD.size
+        while record := run_file.read(size):
+            yield record
+
+    def _write(self, path: str, records: Iterator[bytes]) -> int:
+        """
+        Write the index of the sorted records, with their fan-out.
+        """
+        unpack: Callable[[bytes], Tuple[bytes, int]] = BreachCorpus.RECORD.unpack
+        pack: Callable[..., bytes] = BreachCorpus.RECORD.pack
+        fanout: List[int] = [0] * (BreachCorpus._PREFIXES + 1)
+        written: int = 0
+        with open(path, 'wb', buffering=1 << 20) as index:
+            index.write(b'\0' * BreachCorpus._HEADER)
+            last: Optional[Tuple[bytes, int]] = None
+            for record in records:
+                digest, times = unpack(record)
+                if last is not None and last[0] == digest:
+                    last = (digest, min(last[1] + times, BreachCorpus._MAX_TIMES))
+                    continue
+                if last is not None:
+                    index.write(pack(*last))
+                    fanout[int.from_bytes(last[0][:2], 'big') + 1] += 1
+                    written += 1
+                last = (digest, times)
+            if last is not None:
+                index.write(pack(*last))
+                fanout[int.from_bytes(last[0][:2], 'big') + 1] += 1
+                written += 1
+            # the records of each prefix start where the previous ones end
+            for prefix in range(BreachCorpus._PREFIXES):
+                fanout[prefix + 1] += fanout[prefix]
+            index.seek(0)
+            index.write(BreachCorpus.MAGIC)
+            index.write(BreachCorpus._COUNT.pack(written))
+            index.write(BreachCorpus._FANOUT.pack(*fanout))
+        return written
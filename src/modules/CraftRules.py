@@ -0,0 +1,131 @@
+from typing import (
+    TYPE_CHECKING,
+    ClassVar,
+    Optional,
+    Union,
+    Any,
+    Tuple,
+    Dict
+)
+# os.path and not pathlib, this module is imported by the crftp oneliner
+from os import stat
+from os.path import expanduser, join
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+from modules.CreateSecurePassword import CreateSecurePasswords, RuleSet
+
+class CraftRules:
+    """
+    CraftRules: The rule sets of crftp, read from rules.json in the csp
+    folder. Each rule set has a name, its substitutions (of one or several
+    letters), the capitalization policy of the words and the text that joins
+    them, and a rule set can be chosen by default or for each vault:
+
+        {
+            "default": "leet",
+            "rules": {
+                "leet": {
+                    "substitutions": {"a": "@", "ck": "x", "ph": "f"},
+                    "capitalize": "last",
+                    "join": "-"
+                }
+            },
+            "vaults": {"work": "leet"}
+        }
+
+    The rule sets are compiled once per version of the file, shared by every
+    instance, so choosing another rule set does not compile it again and each
+    one keeps the words that it has crafted. The rule set classic, the
+    letters of CreateSecurePasswords, is always available.
+
+    Attributes:
+        FILE_NAME (ClassVar[str]): Name of the rules file in the csp folder.
+    """
+    FILE_NAME: ClassVar[str] = 'rules.json'
+    # path -> (modification time, compiled rule sets, raw file)
+    _compiled: ClassVar[Dict[str, Tuple[int, Dict[str, RuleSet], Dict[str, Any]]]] = {}
+
+    def __init__(self, root_dir: Optional[Union[str, 'Path']] = None) -> None:
+        """
+        Initialize the instance of class CraftRules.
+
+        Args:
+            root_dir (Path, optional): The csp folder (Def: ~/.csp, as
+            PathCSP.ROOT_DIR, which is not imported to keep crftp light).
+        """
+        self.path: str = join(root_dir or expanduser('~/.csp'), CraftRules.FILE_NAME)
+
+    def _load(self) -> Tuple[Dict[str, RuleSet], Dict[str, Any]]:
+        """
+        Return the compiled rule sets and the raw file, compiling them only if
+        the file changed since the last time.
+
+        Raises:
+            ValueError: If the file or one of its rule sets is not valid.
+        """
+        try:
+            mtime: int = stat(self.path).st_mtime_ns
+        except OSError:
+            return ({'classic': CreateSecurePasswords.RULES}, {})
+        cached = CraftRules._compiled.get(self.path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1:]
+        from json import loads, JSONDecodeError
+        try:
+            with open(self.path, encoding='utf-8') as rules_file:
+                data: Any = loads(rules_file.read())
+        except (OSError, JSONDecodeError) as e:
+            raise ValueError(f'the file {self.path} can not be read: {e}')
+        if not isinstance(data, dict) or not isinstance(data.get('rules', {}), dict):
+            raise ValueError(f'the file {self.path} has no rules')
+        if not isinstance(data.get('default', ''), str):
+            raise ValueError('the default rule set must be a name')
+        vaults: Any = data.get('vaults', {})
+        if not isinstance(vaults, dict) or not all(
+            isinstance(name, str) for name in vaults.values()
+        ):
+            raise ValueError('the rule sets of the vaults must be names')
+        rule_sets: Dict[str, RuleSet] = {'classic': CreateSecurePasswords.RULES}
+        for name, rules in data.get('rules', {}).items():
+            if not isinstance(rules, dict):
+                raise ValueError(f'the rule set {name} is not valid')
+            try:
+                rule_sets[name] = RuleSet(
+                    name,
+                    rules.get('substitutions', {}),
+                    rules.get('capitalize', 'first'),
+                    rules.get('join', '')
+                )
+            except TypeError:
+                raise ValueError(f'the rule set {name} is not valid')
+        CraftRules._compiled[self.path] = (mtime, rule_sets, data)
+        return (rule_sets, data)
+
+    def select(
+        self,
+        name:   Optional[str] = None,
+        vault:  Optional[str] = None
+    ) -> RuleSet:
+        """
+        Choose the rule set: the one named, else the one of the vault, else
+        the default one of the file, else classic.
+
+        Args:
+            name (str, optional): The name of a rule set.
+            vault (str, optional): The name of the vault in use.
+
+        Raises:
+            ValueError: If the rule set does not exist or is not valid.
+        """
+        rule_sets, data = self._load()
+        if name is None:
+            name = (
+                data.get('vaults', {}).get(vault)
+                or data.get('default')
+                or 'classic'
+            )
+        if name not in rule_sets:
+            raise ValueError(f'the rule set {name} does not exist')
+        return rule_sets[name]
@@ -0,0 +1,304 @@
+from typing import (
+    ClassVar,
+    NamedTuple,
+    Optional,
+    Iterator,
+    FrozenSet,
+    Pattern,
+    Tuple,
+    List,
+    Dict,
+    Set
+)
+from re import compile, escape
+from math import log2
+from heapq import heappush, heapreplace
+from itertools import count, product
+from string import ascii_lowercase, ascii_uppercase, digits
+
+from modules.CreateSecurePassword import CreateSecurePasswords, RuleSet
+
+# a piece of a word: its text and the substitution key that matches it
+Piece = Tuple[str, Optional[str]]
+
+class Variant(NamedTuple):
+    """
+    Variant: One crafted candidate of a phrase.
+
+    Attributes:
+        password (str): The candidate.
+        bits (float): Its strength, see CraftVariants.score().
+        strong (bool): If it meets is_strong_password().
+        substitutions (Tuple[str]): The keys of the rules that were applied.
+        capitalize (str): The capitalization policy of the words.
+        join (str): The text between the words.
+    """
+    password:       str
+    bits:           float
+    strong:         bool
+    substitutions:  Tuple[str, ...]
+    capitalize:     str
+    join:           str
+
+class CraftVariants:
+    """
+    CraftVariants: Enumerates the variants of a phrase instead of the single
+    password of crftp: each subset of the substitutions of the rule set that
+    appear in the phrase, each capitalization policy and each separator
+    between the words. There are 2^keys * policies * separators variants, so
+    they are generated lazily (variants()) and the best ones are chosen by a
+    branch and bound search (top()): the substitutions are decided one by one
+    and a branch is dropped when even its best possible variant can not beat
+    the k-th best found, so most of the space is never built.
+
+    The variants are ranked by meeting is_strong_password(), then by bits of
+    strength and then by using fewer substitutions, which are easier to
+    remember.
+
+    Attributes:
+        SEPARATORS (ClassVar[Tuple[str]]): Texts tried between the words.
+        MAX_VARIANTS (ClassVar[int]): Variants that top() scores at most, it
+        stops there with the best ones found (exhausted is False).
+    """
+    SEPARATORS: ClassVar[Tuple[str, ...]] = ('', '-', '_', '.', '!', '#', '@', '+')
+    MAX_VARIANTS: ClassVar[int] = 100_000
+    _POOLS: ClassVar[Dict[str, int]] = {
+        'lower': 26,
+        'upper': 26,
+        'digit': 10,
+        'symbol': 33,
+        'other': 100,
+    }
+
+    def __init__(
+        self,
+        phrase:     str,
+        separator:  Optional[str] = None,
+        rules:      Optional[RuleSet] = None,
+        separators: Tuple[str, ...] = SEPARATORS,
+        capitalize: Tuple[str, ...] = RuleSet.CAPITALIZE
+    ) -> None:
+        """
+        Initialize the instance of class CraftVariants.
+
+        Args:
+            phrase (str): The phrase.
+            separator (str, optional): Between the words (Def: whitespace).
+            rules (RuleSet, optional): Its substitutions are the ones tried
+            (Def: CreateSecurePasswords.RULES).
+            separators (Tuple[str]): Texts tried between the words.
+            capitalize (Tuple[str]): Capitalization policies tried.
+
+        Raises:
+            ValueError: If a capitalization policy is not valid.
+
+        Attributes:
+            keys (Tuple[str]): The substitution keys found in the phrase, in
+            order of appearance.
+            exhausted (bool): If the last top() considered every variant.
+        """
+        for policy in capitalize:
+            if policy not in RuleSet.CAPITALIZE:
+                raise ValueError(f'the capitalization {policy} is not valid')
+        self.rules: RuleSet = CreateSecurePasswords.RULES if rules is None else rules
+        self.separators: Tuple[str, ...] = tuple(dict.fromkeys(separators)) or ('',)
+        self.capitalize: Tuple[str, ...] = tuple(dict.fromkeys(capitalize)) or ('none',)
+        matcher: Optional[Pattern] = compile('|'.join(
+            escape(old) for old in sorted(self.rules.substitutions, key=len, reverse=True)
+        )) if self.rules.substitutions else None
+        self.words: List[List[Piece]] = [
+            self._pieces(word, matcher)
+            for word in phrase.split(separator) if word
+        ]
+        self.keys: Tuple[str, ...] = tuple(dict.fromkeys(
+            key for pieces in self.words for _, key in pieces if key is not None
+        ))
+        self.exhausted: bool = True
+
+    @staticmethod
+    def _pieces(word: str, matcher: Optional[Pattern]) -> List[Piece]:
+        pieces: List[Piece] = []
+        pos: int = 0
+        if matcher is not None:
+            for match in matcher.finditer(word):
+                if match.start() > pos:
+                    pieces.append((word[pos:match.start()], None))
+                pieces.append((match.group(), match.group()))
+                pos = match.end()
+        if pos < len(word):
+            pieces.append((word[pos:], None))
+        return pieces
+
+    @classmethod
+    def _classes(cls, text: str, letters: bool = False) -> Set[str]:
+        """
+        The character classes of a text, with both cases of its letters if
+        letters is True (it can still be capitalized).
+        """
+        classes: Set[str] = set()
+        for char in text:
+            if char in ascii_lowercase or char in ascii_uppercase:
+                classes.update(('lower', 'upper') if letters else (
+                    'lower' if char in ascii_lowercase else 'upper',
+                ))
+            elif char in digits:
+                classes.add('digit')
+            elif char.isascii():
+                classes.add('symbol')
+            elif char.isalpha() and letters:
+                classes.update(('lower', 'upper', 'other'))
+            else:
+                classes.add('other')
+        return classes
+
+    @classmethod
+    def score(cls, password: str) -> float:
+        """
+        Bits of strength of a password: its length by the bits of the pool of
+        the character classes that it uses.
+        """
+        if not password:
+            return 0.0
+        pool: int = sum(cls._POOLS[name] for name in cls._classes(password))
+        return len(password) * log2(pool)
+
+    def _build(self, chosen: FrozenSet[str], capitalize: str, join: str) -> str:
+        """
+        Craft the variant with the substitutions chosen, as RuleSet does.
+        """
+        substitutions: Dict[str, str] = self.rules.substitutions
+        words: List[str] = []
+        for pieces in self.words:
+            parts: List[str] = []
+            kept: List[int] = []
+            for text, key in pieces:
+                if key is not None and key in chosen:
+                    parts.append(substitutions[key])
+                    continue
+                kept.append(len(parts))
+                parts.append(text)
+            if kept:
+                match capitalize:
+                    case 'first':
+                        part: str = parts[kept[0]]
+                        parts[kept[0]] = f'{part[0].capitalize()}{part[1:]}'
+                    case 'last':
+                        part: str = parts[kept[-1]]
+                        parts[kept[-1]] = f'{part[:-1]}{part[-1].capitalize()}'
+                    case 'all':
+                        for index in kept:
+                            parts[index] = parts[index].upper()
+            words.append(''.join(parts))
+        return join.join(words)
+
+    def _variant(self, chosen: FrozenSet[str], capitalize: str, join: str) -> Variant:
+        password: str = self._build(chosen, capitalize, join)
+        return Variant(
+            password,
+            self.score(password),
+            CreateSecurePasswords.is_strong_password(password),
+            tuple(key for key in self.keys if key in chosen),
+            capitalize,
+            join
+        )
+
+    def variants(self) -> Iterator[Variant]:
+        """
+        Yield every variant, one at a time: the substitutions of all the keys
+        first, and then one key less each time.
+
+        Returns:
+            Iterator[Variant]: The variants, there can be equal passwords.
+        """
+        for applied in product((True, False), repeat=len(self.keys)):
+            chosen: FrozenSet[str] = frozenset(
+                key for key, apply in zip(self.keys, applied) if apply
+            )
+            for capitalize, join in product(self.capitalize, self.separators):
+                yield self._variant(chosen, capitalize, join)
+
+    def _bound(self, chosen: FrozenSet[str], decided: int) -> float:
+        """
+        The most bits that a variant of the branch can have: the undecided
+        keys count with their longest text and both their classes, and the
+        separators with the longest one and all their classes. The letters
+        count as capitalized ('ß' gives 'SS').
+        """
+        substitutions: Dict[str, str] = self.rules.substitutions
+        undecided: FrozenSet[str] = frozenset(self.keys[decided:])
+        length: int = (len(self.words) - 1) * max(map(len, self.separators))
+        classes: Set[str] = set()
+        for join in self.separators:
+            classes |= self._classes(join)
+        for pieces in self.words:
+            for text, key in pieces:
+                if key is None:
+                    length += len(text.upper())
+                    classes |= self._classes(text, letters=True)
+                elif key in undecided:
+                    length += max(len(text.upper()), len(substitutions[key]))
+                    classes |= self._classes(text, letters=True)
+                    classes |= self._classes(substitutions[key])
+                elif key in chosen:
+                    length += len(substitutions[key])
+                    classes |= self._classes(substitutions[key])
+                else:
+                    length += len(text.upper())
+                    classes |= self._classes(text, letters=True)
+        if not length:
+            return 0.0
+        return length * log2(sum(self._POOLS[name] for name in classes))
+
+    def top(self, k: int = 5) -> List[Variant]:
+        """
+        The k best variants with different passwords, best first.
+
+        Args:
+            k (int): How many (Def: 5).
+
+        Raises:
+            ValueError: If k is lower than 1.
+        """
+        if k < 1:
+            raise ValueError('the number of variants must be at least 1')
+        heap: List[Tuple[Tuple[bool, float, int], int, Variant]] = []
+        found: Set[str] = set()
+        order: Iterator[int] = count()
+        scored: int = 0
+        self.exhausted = True
+        # depth first, each key is applied and then not applied
+        stack: List[Tuple[FrozenSet[str], int]] = [(frozenset(), 0)]
+        while stack:
+            chosen, decided = stack.pop()
+            if len(heap) == k and heap[0][0] >= (
+                True,
+                self._bound(chosen, decided),
+                -len(chosen)
+            ):
+                continue
+            if decided < len(self.keys):
+                key: str = self.keys[decided]
+                stack.append((chosen, decided + 1))
+                stack.append((chosen | {key}, decided + 1))
+                continue
+            for capitalize, join in product(self.capitalize, self.separators):
+                if scored >= CraftVariants.MAX_VARIANTS:
+                    self.exhausted = False
+                    stack.clear()
+                    break
+                scored += 1
+                variant: Variant = self._variant(chosen, capitalize, join)
+                if variant.password in found:
+                    continue
+                rank: Tuple[bool, float, int] = (
+                    variant.strong,
+                    variant.bits,
+                    -len(variant.substitutions)
+                )
+                if len(heap) < k:
+                    heappush(heap, (rank, next(order), variant))
+                    found.add(variant.password)
+                elif rank > heap[0][0]:
+                    found.discard(heapreplace(heap, (rank, next(order), variant))[2].password)
+                    found.add(variant.password)
+        return [variant for *_, variant in sorted(heap, reverse=True)]
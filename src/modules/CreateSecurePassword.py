@@ -1,13 +1,159 @@
-from typing import ClassVar, Tuple, List, Dict
+from typing import (
+    ClassVar,
+    Optional,
+    Iterable,
+    Iterator,
+    Pattern,
+    Tuple,
+    List,
+    Dict
+)
+from argparse import ArgumentParser
+from re import compile, escape
+from sys import stdin, stdout, stderr
+from time import monotonic
+
+class RuleSet(dict):
+    """
+    RuleSet: A compiled set of crafting rules: the substitutions, the letter
+    of each word that is capitalized and the text that joins the words. The
+    substitutions of several letters are matched with one regular expression
+    (the longest one wins where several start) and the rest with a
+    translation table.
+
+    It is also the crafted form of each word, filled the first time that a
+    word is seen. Phrases repeat most of their words, so crafting a phrase is
+    mostly lookups that map() does in C, and the rules are only applied to
+    new words.
+
+    Attributes:
+        CAPITALIZE (ClassVar[Tuple[str]]): The capitalization policies, which
+        letters of each word that are not replaced are capitalized.
+        MAX_WORDS (ClassVar[int]): When it is reached the words are dropped,
+        so a stream of unique words does not grow it forever.
+    """
+    CAPITALIZE: ClassVar[Tuple[str]] = ('first', 'last', 'all', 'none')
+    MAX_WORDS: ClassVar[int] = 1 << 16
+
+    def __init__(
+        self,
+        name:           str,
+        substitutions:  Dict[str, str],
+        capitalize:     str = 'first',
+        join:           str = ''
+    ) -> None:
+        """
+        Initialize the instance of class RuleSet.
+
+        Args:
+            name (str): The name of the rule set.
+            substitutions (Dict[str, str]): The replacement of each letter or
+            group of letters.
+            capitalize (str): One of CAPITALIZE (Def: first).
+            join (str): Put between the crafted words (Def: nothing).
+
+        Raises:
+            ValueError: If a rule is not valid.
+        """
+        super().__init__()
+        if not isinstance(substitutions, dict) or not all(
+            isinstance(old, str) and old and isinstance(new, str)
+            for old, new in substitutions.items()
+        ):
+            raise ValueError(f'the substitutions of {name} must map text to text')
+        if capitalize not in RuleSet.CAPITALIZE:
+            raise ValueError(f'the capitalization {capitalize} of {name} is not valid')
+        if not isinstance(join, str):
+            raise ValueError(f'the join of {name} must be a text')
+        self.name: str = name
+        self.substitutions: Dict[str, str] = dict(substitutions)
+        self.capitalize: str = capitalize
+        self.join: str = join
+        self.table: Dict[int, str] = str.maketrans({
+            old: new for old, new in substitutions.items() if len(old) == 1
+        })
+        self.pattern: Optional[Pattern] = compile('|'.join(
+            escape(old) for old in sorted(substitutions, key=len, reverse=True)
+        )) if any(len(old) > 1 for old in substitutions) else None
+        # letters kept of a word, with a translation table only
+        self.keep: Pattern = compile(
+            f'[^{"".join(map(escape, substitutions))}]+'
+        ) if substitutions else compile('.+')
+
+    def _pieces(self, word: str) -> Tuple[List[str], List[int]]:
+        """
+        Split a word in the replaced and the kept pieces, and the indexes of
+        the kept pieces.
+        """
+        pieces: List[str] = []
+        kept: List[int] = []
+        pos: int = 0
+        if self.pattern is None:
+            for match in self.keep.finditer(word):
+                if match.start() > pos:
+                    pieces.append(word[pos:match.start()].translate(self.table))
+                kept.append(len(pieces))
+                pieces.append(match.group())
+                pos = match.end()
+            if pos < len(word):
+                pieces.append(word[pos:].translate(self.table))
+            return (pieces, kept)
+        for match in self.pattern.finditer(word):
+            if match.start() > pos:
+                kept.append(len(pieces))
+                pieces.append(word[pos:match.start()])
+            pieces.append(self.substitutions[match.group()])
+            pos = match.end()
+        if pos < len(word):
+            kept.append(len(pieces))
+            pieces.append(word[pos:])
+        return (pieces, kept)
+
+    def __missing__(self, word: str) -> str:
+        if len(self) >= RuleSet.MAX_WORDS:
+            self.clear()
+        pieces, kept = self._pieces(word)
+        if kept:
+            # the capitalized letters are not replaced ('ß' gives 'Ss')
+            match self.capitalize:
+                case 'first':
+                    piece: str = pieces[kept[0]]
+                    pieces[kept[0]] = f'{piece[0].capitalize()}{piece[1:]}'
+                case 'last':
+                    piece: str = pieces[kept[-1]]
+                    pieces[kept[-1]] = f'{piece[:-1]}{piece[-1].capitalize()}'
+                case 'all':
+                    for index in kept:
+                        pieces[index] = pieces[index].upper()
+        crafted: str = ''.join(pieces)
+        self[word] = crafted
+        return crafted
+
+    def craft(self, phrase: str, separator: Optional[str] = None) -> str:
+        """
+        Craft the password of one phrase.
+
+        Args:
+            phrase (str): The phrase.
+            separator (str, optional): Between the words (Def: whitespace).
+        """
+        return self.join.join(map(self.__getitem__, phrase.split(separator)))
 
 class CreateSecurePasswords:
     """
     CreateSecurePasswords: Handles the creation of strong passwords based on a
     given phrase pattern.
 
+    The phrases are crafted with a RuleSet, by default the one compiled from
+    DICTIONARY_LETTER (RULES), other rule sets are loaded from the rules file
+    (CraftRules). Many phrases can be crafted in a stream (craft_many).
+
     Attributes:
         DICTIONARY_LETTER (ClassVar[Dict[str, str]]): A dictionary mapping specific
         letters to their corresponding replacements for creating strong passwords.
+        FROM_FILE (ClassVar[str]): Option of crftp to read the phrases, one
+        per line, from a file or from stdin ('-').
+        RULES (ClassVar[RuleSet]): The default rule set, named classic.
     """
     DICTIONARY_LETTER: ClassVar[Dict[str, str]] = {
         'a': '4',
@@ -17,22 +163,217 @@ class CreateSecurePasswords:
         'u': '()',
         's': '$',
     }
+    FROM_FILE: ClassVar[str] = '--from-file'
+    RULES: ClassVar[RuleSet] = RuleSet('classic', DICTIONARY_LETTER)
 
-    def __init__(self, password: str, separator: str) -> None:
+    def __init__(
+        self,
+        password:   str,
+        separator:  str,
+        rules:      Optional[RuleSet] = None
+    ) -> None:
         """
         Initialize the instance of class CreateSecurePassword.
 
         Args:
             password (str): The password to be strengthened.
             separator (str): The character used as a separator between words.
+            rules (RuleSet, optional): The rules to craft it (Def: RULES).
         
         Attributes:
-            chars (Tuple[List[str]]): A tuple contanining list of character obteining
-            by splitting the input password using the specified separator
+            words (List[str]): The words obtained by splitting the input
+            password using the specified separator.
+        """
+        self.words: List[str] = password.split(separator)
+        self.rules: RuleSet = CreateSecurePasswords.RULES if rules is None else rules
+
+    @classmethod
+    def from_words(
+        cls,
+        words: List[str],
+        rules: Optional[RuleSet] = None
+    ) -> 'CreateSecurePasswords':
+        """
+        Create the instance from the arguments of crftp: the password and
+        optionally the separator, or more than two words that are joined by
+        spaces.
+
+        Args:
+            words (List[str]): The arguments, at least one.
+            rules (RuleSet, optional): The rules to craft it (Def: RULES).
+        """
+        if len(words) > 2:
+            return cls(password=' '.join(words), separator=' ', rules=rules)
+        return cls(
+            password=words[0],
+            separator=words[1] if len(words) > 1 else None,
+            rules=rules
+        )
+
+    @classmethod
+    def oneliner(cls, argv: List[str]) -> Optional[int]:
         """
-        self.chars: Tuple[List[str]] = [
-            [*word] for word in password.split(separator)
+        Run the oneliner mode when it only crafts a password, without loading
+        the rest of the tool (rich, prompt_toolkit and the databases). The
+        messages are the same ones of the normal mode, without colours.
+
+        Args:
+            argv (List[str]): The arguments after 'oneliner'.
+
+        Returns:
+            int: The exit status, or None if there are other arguments, then
+            the caller has to run the normal oneliner mode.
+        """
+        parser: ArgumentParser = ArgumentParser(add_help=False)
+        parser.add_argument('-cr', '--craft-password', nargs='*', default=None)
+        parser.add_argument(cls.FROM_FILE, default=None, dest='from_file')
+        parser.add_argument('--rules', default=None)
+        try:
+            args, unknown = parser.parse_known_args(argv)
+        except SystemExit:
+            return None
+        if unknown or (args.craft_password is None and args.from_file is None):
+            return None
+        words: List[str] = [
+            word for arg in args.craft_password or [] for word in arg.split(' ') if word
         ]
+        if not words and args.from_file is None:
+            return None
+
+        from modules.CraftRules import CraftRules
+        try:
+            # without a vault, the rule set given or the default one
+            rules: RuleSet = CraftRules().select(args.rules)
+        except ValueError as e:
+            print(f'[!] The rules could not be used -> {e}.')
+            return 1
+        if args.from_file is not None:
+            return cls._oneliner_from_file(args.from_file, words, rules)
+
+        csp: CreateSecurePasswords = cls.from_words(words, rules)
+        reforce_pass: str = csp.create_strong_pass()
+        print('[*] Password reforce succesfull.')
+        if not csp.is_strong_password(reforce_pass):
+            print(
+                '[?] The generated password does not meet security '
+                'requirements. Use it at your own risk.'
+            )
+        from modules.BreachCorpus import BreachCorpus
+        corpus: BreachCorpus = BreachCorpus()
+        if corpus.exists:
+            try:
+                breached: int = corpus.count(reforce_pass)
+            except ValueError as e:
+                print(f'[?] The breach index could not be used -> {e}.')
+                breached = 0
+            if breached:
+                print(
+                    f'[?] The generated password was seen {breached:,} times '
+                    'in the breach index, attackers try it first.'
+                )
+        from pyperclip import copy, PyperclipException
+        try:
+            copy(reforce_pass)
+        except PyperclipException:
+            print(f'[+] {reforce_pass}.')
+            print('[!] There is no clipboard available in this system.')
+            return 0
+        print(f'[+] {reforce_pass} -> copied to clipboard.')
+        return 0
+
+    @classmethod
+    def _oneliner_from_file(
+        cls,
+        source:     str,
+        separator:  List[str],
+        rules:      RuleSet
+    ) -> int:
+        """
+        Craft every phrase of a file, or stdin, and write the passwords to
+        stdout in the same order, one per line. The summary goes to stderr so
+        the output can be piped.
+        """
+        start: float = monotonic()
+        crafted: int = 0
+        try:
+            for password in cls.craft_many(
+                cls.read_phrases(source),
+                separator[0] if separator else None,
+                rules
+            ):
+                stdout.write(f'{password}\n')
+                crafted += 1
+        except OSError as e:
+            print(f'[!] The phrases could not be read -> {e}.', file=stderr)
+            return 1
+        except KeyboardInterrupt:
+            return 130
+        elapsed: float = monotonic() - start
+        print(
+            f'[*] {crafted} passwords crafted in {elapsed:.2f}s '
+            f'({crafted / max(elapsed, 1e-6):,.0f} phrases/s).',
+            file=stderr
+        )
+        return 0
+
+    @staticmethod
+    def read_phrases(source: str) -> Iterator[str]:
+        """
+        Yield the lines of a file, or of stdin if source is '-', as they are
+        read, without the line break.
+
+        Raises:
+            OSError: If the file can not be read.
+        """
+        if source == '-':
+            for line in stdin:
+                yield line.rstrip('\r\n')
+            return None
+        with open(source, encoding='utf-8') as phrases:
+            for line in phrases:
+                yield line.rstrip('\r\n')
+
+    @classmethod
+    def craft(
+        cls,
+        phrase:     str,
+        separator:  Optional[str] = None,
+        rules:      Optional[RuleSet] = None
+    ) -> str:
+        """
+        Craft the password of one phrase, as create_strong_pass.
+
+        Args:
+            phrase (str): The phrase.
+            separator (str, optional): Between the words (Def: whitespace).
+            rules (RuleSet, optional): The rules to craft it (Def: RULES).
+        """
+        return (cls.RULES if rules is None else rules).craft(phrase, separator)
+
+    @classmethod
+    def craft_many(
+        cls,
+        phrases:    Iterable[str],
+        separator:  Optional[str] = None,
+        rules:      Optional[RuleSet] = None
+    ) -> Iterator[str]:
+        """
+        Craft a stream of phrases, the passwords are yielded in the same order
+        as soon as each one is crafted, so the phrases are never all in memory.
+
+        Args:
+            phrases (Iterable[str]): The phrases, e.g. read_phrases().
+            separator (str, optional): Between the words (Def: whitespace).
+            rules (RuleSet, optional): The rules to craft them (Def: RULES).
+
+        Returns:
+            Iterator[str]: One password per phrase, an empty phrase gives an
+            empty password so the output lines match the input lines.
+        """
+        rules = cls.RULES if rules is None else rules
+        crafted, join = rules.__getitem__, rules.join.join
+        for phrase in phrases:
+            yield join(map(crafted, phrase.split(separator)))
 
     def create_strong_pass(self) -> str:
         """
@@ -42,30 +383,21 @@ class CreateSecurePasswords:
             str: The generated strong password
             
         Description:
-            The method iterates throught the characters in each word of the password
-            replacing specific letters according to the predifined DICTIONARY_LETTER.
-            It also capitalizes the firts letter in each word for additional strength.
-        """
-        dict_letter = CreateSecurePasswords.DICTIONARY_LETTER
-        password: str = ''
-        for chars in self.chars:
-            caps: bool = False
-            for char in chars:
-                if char in dict_letter.keys():
-                    password += dict_letter.get(char)
-                    continue
-                if not caps:
-                    caps = True
-                    password += char.capitalize()
-                    continue
-                password += char
-        return password
+            The words are joined replacing specific letters according to the
+            rule set, by default the predifined DICTIONARY_LETTER. It also
+            capitalizes the first letter of each word that is not replaced,
+            for additional strength.
+        """
+        return self.rules.join.join(map(self.rules.__getitem__, self.words))
 
     @classmethod
     def is_strong_password(self, password) -> bool:
         """
         Checks that the password argument meets the security requirements:
-        [length >= 8, min one uppercase, lowercase, number and special char]
+        the guesses that an attacker needs to find it, estimated by
+        StrengthEstimator, reach its STRONG_SCORE. Dictionary words, leet,
+        keyboard patterns or sequences are weak even with every class of
+        character (Password1! is weak).
 
         Args:
             password (str): the password string.
@@ -74,22 +406,5 @@ class CreateSecurePasswords:
             bool: if all requirements its valids, return True otherwise 
             return False
         """
-        req: Dict[str, bool] = {
-            'length': False,
-            'upper': False,
-            'lower': False,
-            'digit': False,
-            'char': False
-        }
-        if len(password) >= 8:
-            req['length'] = True
-        for char in password:
-            if char.isupper():
-                req['upper'] = True
-            elif char.islower():
-                req['lower'] = True
-            elif char.isdigit():
-                req['digit'] = True
-            elif not char.isalnum() and not char.isspace():
-                req['char'] = True
-        return all(success for success in req.values())
\ No newline at end of file
+        from modules.Strength import StrengthEstimator
+        return StrengthEstimator.estimate(password).strong
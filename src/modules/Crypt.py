@@ -1,11 +1,27 @@
-from typing import Union, List, Any, ClassVar, Tuple
+from typing import (
+    Union,
+    List,
+    Dict,
+    Any,
+    ClassVar,
+    Callable,
+    Optional,
+    Sequence,
+    Tuple
+)
 from abc import ABC, abstractmethod
 from random import choice
-from hashlib import md5, sha512, blake2b
-from base64 import b64encode, b64decode
+from hashlib import md5, sha512, blake2b, pbkdf2_hmac, scrypt
+from json import dumps, loads, JSONDecodeError
+from math import log2
+from time import perf_counter
+from os import cpu_count, environ
+from multiprocessing import get_context
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 
 from Crypto.Cipher import AES
-from Crypto.Protocol.KDF import PBKDF2
+from Crypto.Random import get_random_bytes
 
 class Hasher(ABC):
     _IDS: ClassVar[List[str]] = ['1sk', '7wpkgh', 'q0pzth']
@@ -40,22 +56,388 @@ class _Blake2(Hasher):
     def encrypt(self, data: str) -> str:
         return f'{blake2b(data.encode()).hexdigest()}{self._IDS[2]}'
 
+class KDFParams:
+    """
+    KDFParams: Algorithm, cost and salt used to derive the key of a vault from
+    its masterkey. They are stored in the vault, so each one can be tuned to
+    the machine with calibrate() without affecting the others. The vaults
+    created before it have no parameters and use LEGACY: PBKDF2-SHA1 with
+    1000 iterations and a salt shared by every vault.
+
+    Attributes:
+        ALGORITHMS (ClassVar[Tuple[str]]): The algorithms that can be chosen.
+        DEFAULT_ALGORITHM (ClassVar[str]): Algorithm of the new vaults.
+        DEFAULT_COST (ClassVar[Dict[str, int]]): Iterations of PBKDF2 or N of
+        scrypt of the new vaults, until calibrate() is run.
+        MIN_COST (ClassVar[Dict[str, int]]): Lowest cost that calibrate() can
+        choose, however fast the machine is not.
+        MAX_SCRYPT_N (ClassVar[int]): Highest N of scrypt, it uses 128 * r * N
+        bytes of memory (256 MiB).
+        SCRYPT_R (ClassVar[int]): Block size of scrypt.
+        SALT_SIZE (ClassVar[int]): Bytes of the random salt.
+        TARGET_MS (ClassVar[float]): Default unlock time of calibrate(), read
+        from the CSP_KDF_TARGET_MS environment variable (Def: 250).
+    """
+    ALGORITHMS: ClassVar[Tuple[str]] = ('pbkdf2-sha256', 'pbkdf2-sha512', 'scrypt')
+    DEFAULT_ALGORITHM: ClassVar[str] = 'pbkdf2-sha256'
+    DEFAULT_COST: ClassVar[Dict[str, int]] = {
+        'pbkdf2-sha256': 600_000,
+        'pbkdf2-sha512': 210_000,
+        'scrypt': 1 << 15,
+    }
+    MIN_COST: ClassVar[Dict[str, int]] = {
+        'pbkdf2-sha256': 100_000,
+        'pbkdf2-sha512': 50_000,
+        'scrypt': 1 << 14,
+    }
+    MAX_SCRYPT_N: ClassVar[int] = 1 << 18
+    SCRYPT_R: ClassVar[int] = 8
+    SALT_SIZE: ClassVar[int] = 16
+    TARGET_MS: ClassVar[float] = float(environ.get('CSP_KDF_TARGET_MS', 250))
+    _LEGACY_SALT: ClassVar[bytes] = b'cspissoclean'
+
+    def __init__(self, algorithm: str, cost: int, salt: bytes) -> None:
+        """
+        Initialize the instance of class KDFParams.
+
+        Args:
+            algorithm (str): One of ALGORITHMS, or 'pbkdf2-sha1' for LEGACY.
+            cost (int): Iterations of PBKDF2 or N (power of 2) of scrypt.
+            salt (bytes): The salt of the vault.
+
+        Raises:
+            ValueError: If the algorithm or the cost are not valid.
+        """
+        if algorithm not in (*KDFParams.ALGORITHMS, 'pbkdf2-sha1'):
+            raise ValueError(f'the key derivation {algorithm} is not supported')
+        if cost < 1 or (algorithm == 'scrypt' and cost & (cost - 1)):
+            raise ValueError(f'the cost {cost} is not valid for {algorithm}')
+        self.algorithm: str = algorithm
+        self.cost: int = cost
+        self.salt: bytes = salt
+
+    @classmethod
+    def create(
+        cls,
+        algorithm:  Optional[str] = None,
+        cost:       Optional[int] = None
+    ) -> 'KDFParams':
+        """
+        Parameters for a new key, with a new random salt.
+
+        Args:
+            algorithm (str, optional): Def: DEFAULT_ALGORITHM.
+            cost (int, optional): Def: DEFAULT_COST of the algorithm.
+        """
+        algorithm = algorithm or cls.DEFAULT_ALGORITHM
+        if algorithm not in cls.ALGORITHMS:
+            raise ValueError(f'the key derivation {algorithm} is not supported')
+        return cls(
+            algorithm,
+            cost or cls.DEFAULT_COST[algorithm],
+            get_random_bytes(cls.SALT_SIZE)
+        )
+
+    @classmethod
+    def legacy(cls) -> 'KDFParams':
+        """
+        Parameters of the vaults created before they were stored.
+        """
+        return cls('pbkdf2-sha1', 1000, cls._LEGACY_SALT)
+
+    @property
+    def is_legacy(self) -> bool:
+        return self.algorithm not in KDFParams.ALGORITHMS
+
+    def derive(self, masterkey: str) -> bytes:
+        """
+        Derive the 32 bytes key of AES-256 from the masterkey.
+
+        Raises:
+            ValueError: If the masterkey of a LEGACY vault has characters out
+            of latin-1, pycryptodome encoded it as latin-1 to derive the key.
+        """
+        if self.is_legacy:
+            return pbkdf2_hmac(
+                'sha1',
+                masterkey.encode('latin-1'),
+                self.salt,
+                self.cost,
+                32
+            )
+        if self.algorithm == 'scrypt':
+            return scrypt(
+                masterkey.encode(),
+                salt=self.salt,
+                n=self.cost,
+                r=KDFParams.SCRYPT_R,
+                p=1,
+                maxmem=256 * KDFParams.SCRYPT_R * self.cost,
+                dklen=32
+            )
+        return pbkdf2_hmac(
+            self.algorithm.split('-')[1],
+            masterkey.encode(),
+            self.salt,
+            self.cost,
+            32
+        )
+
+    def measure(self) -> float:
+        """
+        Time a derivation with these parameters.
+
+        Returns:
+            float: The milliseconds that it took.
+        """
+        start: float = perf_counter()
+        self.derive('calibration')
+        return (perf_counter() - start) * 1000
+
+    @classmethod
+    def calibrate(
+        cls,
+        algorithm:  Optional[str] = None,
+        target_ms:  Optional[float] = None
+    ) -> 'KDFParams':
+        """
+        Benchmark the algorithm in this machine and choose the cost whose
+        derivation takes about target_ms. PBKDF2 is linear in its iterations,
+        so they are scaled from a probe of at least 100 ms; N of scrypt must
+        be a power of 2, the closest one to the target is chosen.
+
+        Args:
+            algorithm (str, optional): Def: DEFAULT_ALGORITHM.
+            target_ms (float, optional): Def: TARGET_MS.
+
+        Returns:
+            KDFParams: The parameters found, with a new random salt. The cost
+            is never below MIN_COST.
+        """
+        algorithm = algorithm or cls.DEFAULT_ALGORITHM
+        target_ms = target_ms or cls.TARGET_MS
+        probe: KDFParams = cls.create(algorithm, cls.MIN_COST[algorithm] // 8)
+        while (elapsed := probe.measure()) < 100 and (
+            algorithm != 'scrypt' or probe.cost < cls.MAX_SCRYPT_N
+        ):
+            probe.cost *= 2
+        cost: float = probe.cost * target_ms / elapsed
+        if algorithm == 'scrypt':
+            cost = min(1 << round(log2(cost)), cls.MAX_SCRYPT_N)
+        else:
+            cost = round(cost, -3)
+        probe.cost = max(int(cost), cls.MIN_COST[algorithm])
+        return probe
+
+    def to_json(self) -> str:
+        return dumps({
+            'algorithm': self.algorithm,
+            'cost': self.cost,
+            'salt': self.salt.hex()
+        })
+
+    @classmethod
+    def from_json(cls, raw: Union[str, bytes]) -> 'KDFParams':
+        """
+        Parameters stored with to_json().
+
+        Raises:
+            ValueError: If they are malformed.
+        """
+        try:
+            params: Dict[str, Any] = loads(raw)
+            return cls(
+                params['algorithm'],
+                int(params['cost']),
+                bytes.fromhex(params['salt'])
+            )
+        except (JSONDecodeError, KeyError, TypeError) as e:
+            raise ValueError(f'the key derivation parameters are not valid: {e}')
+
+    def __str__(self) -> str:
+        if self.algorithm == 'scrypt':
+            return f'scrypt N=2^{self.cost.bit_length() - 1} r={KDFParams.SCRYPT_R}'
+        return f'{self.algorithm} {self.cost:,} iterations'
+
+def _decrypt_chunk(key: bytes, rows: Sequence[Tuple[bytes]]) -> List[str]:
+    """
+    Worker of PassCrypt.decrypt_many(), decrypt a chunk of rows in order.
+    """
+    passcrypt: PassCrypt = PassCrypt.from_key(key)
+    try:
+        return [passcrypt.decrypt(row) for row in rows]
+    finally:
+        passcrypt.wipe()
+
 class PassCrypt:
-    def __init__(self, masterkey: str) -> None:
-        self.key: bytes = PBKDF2(masterkey, b'cspissoclean', dkLen=32)
+    """
+    PassCrypt: AES-GCM cipher of the passwords. The passwords of a vault are
+    encrypted with a random data key, which is stored wrapped (encrypted) by
+    the key derived from the masterkey, so changing the masterkey only wraps
+    it again instead of encrypting every entry.
+
+    Each password is decrypted with its own cipher object, which in
+    pycryptodome costs about 0.1 ms of Python that holds the GIL, so the batch
+    API spreads big batches across a pool of processes shared by the session.
+
+    Attributes:
+        WORKERS (ClassVar[int]): Processes of the pool (Def: cpu count).
+        PARALLEL_THRESHOLD (ClassVar[int]): Minimum rows of a batch to use the
+        pool, smaller batches are faster in this process.
+        MIN_CHUNK (ClassVar[int]): Minimum rows sent to each worker.
+        KEY_SIZE (ClassVar[int]): Bytes of the keys (AES-256).
+    """
+    WORKERS: ClassVar[int] = cpu_count() or 1
+    # chosen with bench/decrypt.py on a machine with a single CPU, where the
+    # pool can not be faster (0.94x-1.08x of serial from 1k to 100k rows);
+    # it has to be measured again on a machine with more cores to tune it
+    PARALLEL_THRESHOLD: ClassVar[int] = 4000
+    MIN_CHUNK: ClassVar[int] = 1000
+    KEY_SIZE: ClassVar[int] = 32
+    _WRAP_AAD: ClassVar[bytes] = b'csp-data-key'
+    _pool: ClassVar[Optional[ProcessPoolExecutor]] = None
+
+    def __init__(self, masterkey: str, kdf: Optional[KDFParams] = None) -> None:
+        """
+        Derive the key of the vault from its masterkey.
+
+        Args:
+            masterkey (str): The masterkey of the vault.
+            kdf (KDFParams, optional): The parameters stored in the vault,
+            KDFParams.legacy() if it has none.
+        """
+        # mutable so that the key can be wiped
+        self.key: bytearray = bytearray(
+            (kdf or KDFParams.legacy()).derive(masterkey)
+        )
+
+    @classmethod
+    def from_key(cls, key: bytes) -> 'PassCrypt':
+        """
+        Create the cipher from an already derived key, without the KDF.
+        """
+        passcrypt: PassCrypt = cls.__new__(cls)
+        passcrypt.key = bytearray(key)
+        return passcrypt
+
+    @classmethod
+    def generate(cls) -> 'PassCrypt':
+        """
+        Create a cipher with a new random data key.
+        """
+        return cls.from_key(get_random_bytes(cls.KEY_SIZE))
+
+    def wrap(self, passcrypt: 'PassCrypt') -> bytes:
+        """
+        Encrypt the key of another cipher with the key of this one.
+
+        Args:
+            passcrypt (PassCrypt): The cipher with the data key.
+
+        Returns:
+            bytes: nonce (12) | tag (16) | encrypted key (32).
+        """
+        cipher = AES.new(self.key, AES.MODE_GCM, nonce=get_random_bytes(12))
+        cipher.update(PassCrypt._WRAP_AAD)
+        wrapped, tag = cipher.encrypt_and_digest(bytes(passcrypt.key))
+        return cipher.nonce + tag + wrapped
+
+    def unwrap(self, wrapped: bytes) -> 'PassCrypt':
+        """
+        Decrypt a key encrypted with wrap().
+
+        Returns:
+            PassCrypt: The cipher with the data key.
+
+        Raises:
+            ValueError: If the key is not the one that wrapped it or the
+            wrapped key was modified.
+        """
+        cipher = AES.new(self.key, AES.MODE_GCM, nonce=wrapped[:12])
+        cipher.update(PassCrypt._WRAP_AAD)
+        return PassCrypt.from_key(
+            cipher.decrypt_and_verify(wrapped[28:], wrapped[12:28])
+        )
+
+    def wipe(self) -> None:
+        """
+        Overwrite the key in memory with zeros, the instance can not be used
+        after it.
+        """
+        self.key[:] = bytes(len(self.key))
     
-    def encrypt(self, password: str) -> Tuple[str]:
+    def encrypt(self, password: str) -> Tuple[bytes]:
         cipher = AES.new(self.key, AES.MODE_GCM)
         cip_password, tag = cipher.encrypt_and_digest(password.encode())
-        return (
-            b64encode(cip_password).decode(),
-            b64encode(cipher.nonce).decode(),
-            b64encode(tag).decode()
-        )
+        return (cip_password, cipher.nonce, tag)
     
-    def decrypt(self, encrypted_data: Tuple[str]) -> str:
-        decode = lambda x: b64decode(x)
-        cip_password, nonce, tag = map(decode, encrypted_data)
+    def decrypt(self, encrypted_data: Tuple[bytes]) -> str:
+        cip_password, nonce, tag = encrypted_data
         cipher = AES.new(self.key, AES.MODE_GCM, nonce=nonce)
         password: bytes = cipher.decrypt_and_verify(cip_password, tag)
-        return password.decode()
\ No newline at end of file
+        return password.decode()
+
+    def decrypt_many(self, rows: Sequence[Tuple[bytes]]) -> List[str]:
+        """
+        Decrypt a batch of passwords, in parallel if the batch is big enough.
+
+        Args:
+            rows (Sequence[Tuple[bytes]]): Encrypted passwords with format
+            (ciphertext, nonce, tag).
+
+        Returns:
+            List[str]: The passwords, in the same order as rows.
+        """
+        return PassCrypt.map_chunks(_decrypt_chunk, (bytes(self.key),), rows)
+
+    @classmethod
+    def map_chunks(
+        cls,
+        func:   Callable[..., List[Any]],
+        args:   Tuple[Any, ...],
+        rows:   Sequence[Any]
+    ) -> List[Any]:
+        """
+        Run func(*args, chunk) over the rows split in one chunk per worker and
+        join the results in order. Small batches, machines with one CPU or a
+        pool that can not start run func in this process.
+
+        Args:
+            func (Callable): Module level function (it is sent to the workers)
+            that receives the args and a chunk of rows and returns a list.
+            args (Tuple[Any]): The first arguments of func, usually the key.
+            rows (Sequence[Any]): The rows to process.
+
+        Returns:
+            List[Any]: The concatenated results of every chunk.
+        """
+        workers: int = min(cls.WORKERS, len(rows) // cls.MIN_CHUNK)
+        if workers > 1 and len(rows) >= cls.PARALLEL_THRESHOLD:
+            size: int = -(-len(rows) // workers)
+            chunks: List[Sequence[Any]] = [
+                rows[i:i + size] for i in range(0, len(rows), size)
+            ]
+            try:
+                return [
+                    result
+                    for results in cls._get_pool().map(
+                        func,
+                        *([arg] * len(chunks) for arg in args),
+                        chunks
+                    )
+                    for result in results
+                ]
+            except BrokenProcessPool:
+                cls._pool = None
+                cls.WORKERS = 1
+        return func(*args, rows)
+
+    @classmethod
+    def _get_pool(cls) -> ProcessPoolExecutor:
+        # spawn instead of fork, the session has threads (timers of the keys)
+        if cls._pool is None:
+            cls._pool = ProcessPoolExecutor(
+                cls.WORKERS,
+                mp_context=get_context('spawn')
+            )
+        return cls._pool
@@ -8,11 +8,16 @@ from typing import (
     Any,
     List,
     Dict,
-    Literal
+    Literal,
+    Iterable,
+    Iterator,
+    Set
 )
 from functools import wraps
-from sys import exc_info
+from contextlib import contextmanager
+from difflib import SequenceMatcher
 from pathlib import Path
+from base64 import b64decode
 from sqlite3 import (
     connect,
     Cursor,
@@ -21,16 +26,61 @@ from sqlite3 import (
     OperationalError
 )
 
-from modules.Crypt import Hasher
+from modules.Crypt import Hasher, KDFParams
 
 class DataManagement:
     """
     DataManagement class handles database operations for the CSP tool
 
     Attributes:
+        SCHEMA_VERSION (ClassVar[int]): Version of the schema expected by the
+        tool, stored in the database with PRAGMA user_version.
+        _MIGRATION_BATCH (ClassVar[int]): Rows converted per commit when a
+        migration has to rewrite the existing entries.
+        _SEARCH_FIELDS (ClassVar[Tuple[str]]): Fields indexed for text search.
+        _ORDER_FIELDS (ClassVar[Tuple[str]]): Fields that can sort a listing,
+        each one backed by an index for keyset pagination.
+        _FUZZY_CANDIDATES (ClassVar[int]): Maximum rows fetched from the full
+        text index before ranking them in a fuzzy search.
+        _IDS_PER_QUERY (ClassVar[int]): Ids bound in each query of
+        existing_ids(), below the limit of variables of any SQLite build (999).
+        PROFILES (ClassVar[Dict[str, Dict[str, Any]]]): Pragmas applied to the
+        connections depending on how the tool is used. 'prompt' keeps a larger
+        page cache and memory map for a long session, 'oneliner' keeps them
+        small so short invocations open faster.
+        _CONNECTIONS (ClassVar[Dict[Path, Connection]]): Connections opened in
+        this session, one per database file.
+        _TX_DEPTHS (ClassVar[Dict[Connection, int]]): Nesting level of the
+        unit of work open in each connection. It belongs to the connection and
+        not to the instance, the instances of a file share its connection.
         _QUERIES (ClassVar[Dict[str, str]]): A dictionary containing predefinied
         SQL queries.
     """
+    # synchronous FULL: in WAL mode NORMAL can lose the last commits (an
+    # entry just added, a new masterkey) on a power loss. FULL costs one sync
+    # of the log per commit, and the bulk writes commit once per unit of work
+    PROFILES: ClassVar[Dict[str, Dict[str, Any]]] = {
+        'prompt': {
+            'synchronous': 'FULL',
+            'cache_size': -16000,
+            'mmap_size': 268435456,
+            'temp_store': 'MEMORY',
+        },
+        'oneliner': {
+            'synchronous': 'FULL',
+            'cache_size': -2000,
+            'mmap_size': 0,
+            'temp_store': 'MEMORY',
+        },
+    }
+    _CONNECTIONS: ClassVar[Dict[Path, Connection]] = {}
+    _TX_DEPTHS: ClassVar[Dict[Connection, int]] = {}
+    SCHEMA_VERSION: ClassVar[int] = 4
+    _MIGRATION_BATCH: ClassVar[int] = 5000
+    _SEARCH_FIELDS: ClassVar[Tuple[str]] = ('site', 'username')
+    _ORDER_FIELDS: ClassVar[Tuple[str]] = ('id', 'site', 'username')
+    _FUZZY_CANDIDATES: ClassVar[int] = 200
+    _IDS_PER_QUERY: ClassVar[int] = 500
     _QUERIES: ClassVar[Dict[str, str]] = {
         'create_tb': '''
             CREATE TABLE IF NOT EXISTS login (
@@ -40,27 +90,129 @@ class DataManagement:
                 password TEXT REQUIRED
             )
         ''',
+        'create_idx_site_username': '''
+            CREATE INDEX IF NOT EXISTS idx_login_site_username
+            ON login (site, username)
+        ''',
+        'create_idx_username': '''
+            CREATE INDEX IF NOT EXISTS idx_login_username
+            ON login (username)
+        ''',
+        'exists_fts': '''
+            SELECT 1 FROM sqlite_master
+            WHERE type = 'table' AND name = 'login_fts'
+        ''',
+        'create_fts': '''
+            CREATE VIRTUAL TABLE IF NOT EXISTS login_fts USING fts5(
+                site,
+                username,
+                content = 'login',
+                content_rowid = 'id',
+                tokenize = 'trigram'
+            )
+        ''',
+        'create_fts_trg_insert': '''
+            CREATE TRIGGER IF NOT EXISTS login_fts_ai AFTER INSERT ON login
+            BEGIN
+                INSERT INTO login_fts (rowid, site, username)
+                VALUES (new.id, new.site, new.username);
+            END
+        ''',
+        'create_fts_trg_delete': '''
+            CREATE TRIGGER IF NOT EXISTS login_fts_ad AFTER DELETE ON login
+            BEGIN
+                INSERT INTO login_fts (login_fts, rowid, site, username)
+                VALUES ('delete', old.id, old.site, old.username);
+            END
+        ''',
+        'create_fts_trg_update': '''
+            CREATE TRIGGER IF NOT EXISTS login_fts_au AFTER UPDATE OF site, username
+            ON login
+            BEGIN
+                INSERT INTO login_fts (login_fts, rowid, site, username)
+                VALUES ('delete', old.id, old.site, old.username);
+                INSERT INTO login_fts (rowid, site, username)
+                VALUES (new.id, new.site, new.username);
+            END
+        ''',
+        'create_idx_site_order': '''
+            CREATE INDEX IF NOT EXISTS idx_login_site_order
+            ON login (IFNULL(site, ''), id)
+        ''',
+        'create_idx_username_order': '''
+            CREATE INDEX IF NOT EXISTS idx_login_username_order
+            ON login (IFNULL(username, ''), id)
+        ''',
+        'create_tb_metadata': '''
+            CREATE TABLE IF NOT EXISTS metadata (
+                name TEXT PRIMARY KEY,
+                value BLOB
+            )
+        ''',
+        'get_metadata': '''
+            SELECT value FROM metadata
+            WHERE name = ?
+        ''',
+        'set_metadata': '''
+            INSERT INTO metadata (name, value) VALUES (?, ?)
+            ON CONFLICT (name) DO UPDATE SET value = excluded.value
+        ''',
+        'rebuild_fts': '''
+            INSERT INTO login_fts (login_fts) VALUES ('rebuild')
+        ''',
         'set_masterkey': '''
             INSERT INTO login (site, username, password)
             VALUES ('csp', 'masterkey', ?)
         ''',
         'set_data': '''
-            INSERT INTO login (site, username, password)
-            VALUES (?, ?, ?)
+            INSERT INTO login (site, username, ciphertext, nonce, tag)
+            VALUES (?, ?, ?, ?, ?)
         ''',
         'get_masterkey': '''
             SELECT password FROM login
             WHERE id = 1
         ''',
         'get_data': '''
-            SELECT * FROM login
+            SELECT id, site, username, ciphertext, nonce, tag FROM login
             WHERE id != 1
         ''',
         #'get_specific_data': 'SELECT password FROM login WHERE | = ? AND id != 1',
         'get_specific_data': '''
-            SELECT * FROM login
+            SELECT id, site, username, ciphertext, nonce, tag FROM login
             WHERE id != 1 AND | = ?
         ''',
+        'get_page_data': '''
+            SELECT {columns} FROM login
+            WHERE id != 1 {keyset}
+            ORDER BY {key} {dir}, id {dir}
+            LIMIT :limit
+        ''',
+        'get_page_keyset': '''
+            AND {key} {cmp}= (SELECT {key} FROM login WHERE id = :after)
+            AND (
+                {key} {cmp} (SELECT {key} FROM login WHERE id = :after)
+                OR id {cmp} :after
+            )
+        ''',
+        'get_prefix_data': '''
+            SELECT id, site, username, ciphertext, nonce, tag FROM login
+            WHERE id != 1 AND | >= ? AND | < ?
+            ORDER BY length(|), |
+        ''',
+        'get_substr_data': '''
+            SELECT id, site, username, ciphertext, nonce, tag FROM login
+            WHERE id != 1 AND | LIKE ? ESCAPE '\\'
+            ORDER BY instr(lower(|), lower(?)), length(|)
+        ''',
+        'get_fts_data': '''
+            SELECT login.id, login.site, login.username,
+                login.ciphertext, login.nonce, login.tag
+            FROM login_fts
+            JOIN login ON login.id = login_fts.rowid
+            WHERE login_fts MATCH ? AND login.id != 1
+            ORDER BY rank
+            LIMIT ?
+        ''',
         'update_masterkey': '''
             UPDATE login SET password = ?
             WHERE id = 1
@@ -69,32 +221,100 @@ class DataManagement:
             UPDATE login SET | = ?
             WHERE id != 1 AND id = ?
         ''',
+        'update_password': '''
+            UPDATE login SET ciphertext = ?, nonce = ?, tag = ?
+            WHERE id != 1 AND id = ?
+        ''',
         'drop_data': '''
             DELETE FROM login
             WHERE id != 1 and id = ?
         ''',
+        'exists_entry': '''
+            SELECT 1 FROM login
+            WHERE id != 1 AND site IS ? AND username IS ?
+            LIMIT 1
+        ''',
+        'get_existing_ids': '''
+            SELECT id FROM login
+            WHERE id != 1 AND id IN (|)
+        ''',
+        'get_existing_ids_between': '''
+            SELECT id FROM login
+            WHERE id != 1 AND id BETWEEN ? AND ?
+        ''',
         'counter_entries': '''
             SELECT COUNT(*) FROM login
+        ''',
+        'counter_data': '''
+            SELECT COUNT(*) FROM login WHERE id != 1
+        ''',
+        'get_version': '''
+            PRAGMA user_version
+        ''',
+        'set_version': '''
+            PRAGMA user_version = |
+        ''',
+        'get_columns': '''
+            PRAGMA table_info(login)
+        ''',
+        'add_column': '''
+            ALTER TABLE login ADD COLUMN | BLOB
+        ''',
+        'get_legacy_passwords': '''
+            SELECT id, password FROM login
+            WHERE id > ? AND ciphertext IS NULL AND password IS NOT NULL
+            ORDER BY id
+            LIMIT ?
+        ''',
+        'set_binary_password': '''
+            UPDATE login SET ciphertext = ?, nonce = ?, tag = ?, password = NULL
+            WHERE id = ?
         '''
     }
 
-    def __init__(self, db_path: Path) -> None:
+    def __init__(
+        self,
+        db_path:    Path,
+        profile:    str = 'prompt',
+        shared:     bool = True
+    ) -> None:
         """
         Initializes a DataManagement instace.
 
+        Args:
+            db_path (Path): The path of the database file.
+            profile (str): The pragma profile of PROFILES used if the
+            connection is not opened yet.
+            shared (bool): Use the connection of the session, False opens a
+            private one for another thread that has to be closed with
+            save_and_exit(True).
+
         Atributes:
-            conn (Connection): Represents the connection to the SQLite database
+            db_path (Path): The path of the database file.
+            conn (Connection): Represents the connection to the SQLite database,
+            shared by the whole session (see get_connection()) and in autocommit
+            mode so that transactions are only started through transaction().
             cursor (Cursor): Represents the cursor used to execute SQL queries
         """
-        self.conn: Connection = connect(db_path)
+        self.db_path: Path = Path(db_path)
+        self.conn: Connection = DataManagement.get_connection(
+            db_path,
+            profile,
+            shared
+        )
         self.cursor: Cursor = self.conn.cursor()
+        self.fts_enabled: bool = self.cursor.execute(
+            DataManagement.predefined_sql('exists_fts')
+        ).fetchone() is not None
 
     def handler_err_db(method: Callable) -> Callable:
         """
         Decorator funtion for handling database errors. This catches any exeptions
-        that occur during the execution of the decorated method, prints info about
-        error, and then either saves and exits if the error is critical or just
-        saves if the error is non-critical,
+        that occur during the execution of the decorated method and prints info
+        about error. Outside of a transaction the error is swallowed as before,
+        inside one it is re-raised so transaction() can roll back the whole unit
+        of work. The decorator no longer commits: statements executed outside a
+        transaction are autocommited by SQLite itself.
 
         Args:
             method (Callable): The method to be decorated.
@@ -115,16 +335,81 @@ class DataManagement:
                     # yo can only execute one statement at time
                 print({e.__class__})
                 print(f'(|{method.__name__}|" Error de SQLite: {e}')
-            finally:
-                # exc_info() -> Tuple(type_exc, val_exc, tracebakc_exc)
-                type_exc: BaseException
-                type_exc, _, _ = exc_info()
-                if type_exc is not None:
-                    self_cls.save_and_exit(True)
-                else:
-                    self_cls.save_and_exit()
+                if self_cls.in_transaction:
+                    raise
         return wrapper
 
+    @property
+    def _tx_depth(self) -> int:
+        """
+        Nesting level of the unit of work open in the connection, 0 when no
+        unit of work is active.
+        """
+        return DataManagement._TX_DEPTHS.get(self.conn, 0)
+
+    @_tx_depth.setter
+    def _tx_depth(self, depth: int) -> None:
+        if depth:
+            DataManagement._TX_DEPTHS[self.conn] = depth
+        else:
+            DataManagement._TX_DEPTHS.pop(self.conn, None)
+
+    @property
+    def in_transaction(self) -> bool:
+        """
+        Indicates whether a unit of work opened with transaction() is active.
+        """
+        return self._tx_depth > 0
+
+    @contextmanager
+    def transaction(self) -> Iterator[Self]:
+        """
+        Open a unit of work on the database. All the statements executed inside
+        the block are commited together when it ends, or rolled back if any
+        exception escapes from it. Nested calls use SAVEPOINTs, so a failure in
+        an inner block only undoes its own work. The exception is re-raised
+        after the rollback, so the caller can tell that nothing was stored.
+
+        Yields:
+            DataManagement: The same instance, to allow 'with dm.transaction() as tx'.
+
+        Raises:
+            sqlite3.Error: If a statement or the commit fails, or the database
+            was closed by save_and_exit() inside the block (its work was
+            rolled back).
+
+        Example:
+            with data_mgmt.transaction():
+                data_mgmt.new_entry(...)
+                data_mgmt.delete_data(...)
+        """
+        depth: int = self._tx_depth
+        savepoint: str = f'csp_sp_{depth}'
+        if depth == 0:
+            self.conn.execute('BEGIN')
+        else:
+            self.conn.execute(f'SAVEPOINT {savepoint}')
+        self._tx_depth += 1
+        try:
+            yield self
+        except BaseException:
+            # unless save_and_exit() already rolled it back
+            if self._tx_depth > depth:
+                self._tx_depth = depth
+                if depth != 0:
+                    self.conn.execute(f'ROLLBACK TO {savepoint}')
+                    self.conn.execute(f'RELEASE {savepoint}')
+                else:
+                    self.conn.rollback()
+            raise
+        if self._tx_depth <= depth:
+            raise Error('the database was closed, the changes were rolled back')
+        self._tx_depth = depth
+        if depth == 0:
+            self.conn.commit()
+        else:
+            self.conn.execute(f'RELEASE {savepoint}')
+
     @classmethod
     def predefined_sql(cls, key_query: str) -> str:
         """
@@ -146,6 +431,7 @@ class DataManagement:
     def create_database(cls, db_path: Path) -> Union[bool, None]:
         """
         Create the SQLite database if the doesn't exist and set the master key.
+        The connection opened is kept for the session (see get_connection()).
 
         Args:
             cls: The class object.
@@ -155,16 +441,163 @@ class DataManagement:
             database, None otherwise.
         """
         try:
-            conn: Connection = connect(db_path)
-            cursor: Cursor = conn.cursor()
-            # create table
-            query = cls.predefined_sql('create_tb')
-            cursor.execute(query)
+            # the table is created and migrated when the connection is opened
+            cls.get_connection(db_path)
         except Error as e:
             print(f'[!] SQLite Err: {e}')
-        finally:
+
+    @classmethod
+    def get_connection(
+        cls,
+        db_path:    Path,
+        profile:    str = 'prompt',
+        shared:     bool = True
+    ) -> Connection:
+        """
+        Connection factory for the database files. The first call for a file
+        opens it in autocommit mode, switches it to WAL (readers no longer wait
+        for writers), applies the pragmas of the profile and upgrades its
+        schema. Later calls in the same session reuse that connection.
+
+        Args:
+            db_path (Path): The path of the database file.
+            profile (str): Key of PROFILES with the pragmas to apply.
+            shared (bool): False opens a new connection that is not kept for
+            the session, SQLite connections can only be used by the thread
+            that opened them.
+
+        Returns:
+            Connection: The connection of the session for the database.
+        """
+        key: Path = Path(db_path).resolve()
+        conn: Optional[Connection] = cls._CONNECTIONS.get(key) if shared else None
+        if conn is not None:
+            return conn
+
+        conn = connect(key, isolation_level=None)
+        conn.execute('PRAGMA journal_mode = WAL')
+        for pragma, value in cls.PROFILES[profile].items():
+            conn.execute(f'PRAGMA {pragma} = {value}')
+        conn.execute(cls.predefined_sql('create_tb'))
+        # databases created with an older schema are upgraded on first open
+        cls.migrate(conn)
+        if shared:
+            cls._CONNECTIONS[key] = conn
+        return conn
+
+    @classmethod
+    def migrate(cls, conn: Connection) -> bool:
+        """
+        Upgrade the schema of the database to SCHEMA_VERSION. The version is
+        read from PRAGMA user_version and every pending _migrate_v{n} method
+        runs in order inside a transaction, commited with its new version, so
+        an old database can jump several versions in a single open.
+
+        Args:
+            conn (Connection): Connection to the database to upgrade.
+
+        Returns:
+            bool: True if the full text index is available.
+        """
+        version: int = conn.execute(cls.predefined_sql('get_version')).fetchone()[0]
+        for target in range(version + 1, cls.SCHEMA_VERSION + 1):
+            conn.execute('BEGIN')
+            getattr(cls, f'_migrate_v{target}')(conn)
+            conn.execute(cls.predefined_sql('set_version').replace('|', str(target)))
             conn.commit()
-            conn.close()
+        return conn.execute(cls.predefined_sql('exists_fts')).fetchone() is not None
+
+    @classmethod
+    def _migrate_v1(cls, conn: Connection) -> None:
+        """
+        v1: Indexes on site and username and the full text shadow table.
+        """
+        cls.create_search_schema(conn.cursor())
+
+    @classmethod
+    def _migrate_v2(cls, conn: Connection) -> None:
+        """
+        v2: The passwords are stored in the BLOB columns ciphertext, nonce and
+        tag instead of 'b64(ct)|b64(nonce)|b64(tag)' in the TEXT column
+        password, which only keeps the hash of the masterkey (id 1). The
+        entries are converted in batches of _MIGRATION_BATCH rows, each one
+        commited, and the migration resumes where it stopped if interrupted.
+        """
+        columns: List[str] = [
+            column[1] for column in conn.execute(cls.predefined_sql('get_columns'))
+        ]
+        for column in ('ciphertext', 'nonce', 'tag'):
+            if column in columns: continue
+            conn.execute(cls.predefined_sql('add_column').replace('|', column))
+
+        last_id: int = 1
+        while True:
+            rows: List[Tuple[int, str]] = conn.execute(
+                cls.predefined_sql('get_legacy_passwords'),
+                (last_id, cls._MIGRATION_BATCH,)
+            ).fetchall()
+            if not rows:
+                break
+            converted: List[Tuple[bytes, bytes, bytes, int]] = []
+            for id, password in rows:
+                try:
+                    parts: List[str] = password.split('|')
+                    if len(parts) != 3:
+                        raise ValueError('expected ciphertext|nonce|tag')
+                    converted.append((*map(b64decode, parts), id))
+                except ValueError as e:
+                    print(f'[!] The entry {id} is not valid and was not converted: {e}')
+            conn.executemany(cls.predefined_sql('set_binary_password'), converted)
+            conn.commit()
+            conn.execute('BEGIN')
+            last_id = rows[-1][0]
+
+    @classmethod
+    def _migrate_v3(cls, conn: Connection) -> None:
+        """
+        v3: Indexes matching the sort keys of the paginated listing.
+        """
+        conn.execute(cls.predefined_sql('create_idx_site_order'))
+        conn.execute(cls.predefined_sql('create_idx_username_order'))
+
+    @classmethod
+    def _migrate_v4(cls, conn: Connection) -> None:
+        """
+        v4: Table metadata with the parameters of the vault, its key derivation
+        and its wrapped data key. The vaults without them keep the legacy
+        derivation until the next login upgrades them.
+        """
+        conn.execute(cls.predefined_sql('create_tb_metadata'))
+
+    @classmethod
+    def create_search_schema(cls, cursor: Cursor) -> bool:
+        """
+        Create the indexes on site and username, and the FTS5 shadow table
+        login_fts (trigram tokenizer) kept in sync with login by triggers. When
+        the shadow table is new, it is filled with the existing entries.
+
+        Args:
+            cursor (Cursor): Cursor of the database to update.
+
+        Returns:
+            bool: True if the full text index is available, False if SQLite
+            was built without FTS5 (searches fall back to the B-tree indexes).
+        """
+        cursor.execute(cls.predefined_sql('create_idx_site_username'))
+        cursor.execute(cls.predefined_sql('create_idx_username'))
+        try:
+            exists: bool = cursor.execute(
+                cls.predefined_sql('exists_fts')
+            ).fetchone() is not None
+            cursor.execute(cls.predefined_sql('create_fts'))
+            cursor.execute(cls.predefined_sql('create_fts_trg_insert'))
+            cursor.execute(cls.predefined_sql('create_fts_trg_delete'))
+            cursor.execute(cls.predefined_sql('create_fts_trg_update'))
+            if not exists:
+                cursor.execute(cls.predefined_sql('rebuild_fts'))
+        except OperationalError:
+            return False
+        return True
 
     @classmethod
     def masterkey_exists(cls, db_path: Path, conn: Connection = None) -> bool:
@@ -179,7 +612,7 @@ class DataManagement:
         """
         try:
             if conn is None:
-                conn: Connection = connect(db_path)
+                conn: Connection = cls.get_connection(db_path)
             cursor: Cursor = conn.cursor()
             query: str = cls.predefined_sql('counter_entries')
             cursor.execute(query)
@@ -190,7 +623,6 @@ class DataManagement:
             print(f'[!] {oe.__class__.__name__}: {oe}')
             return False
 
-    # in future store masterkey in cache so as not to query the db
     @handler_err_db
     def check_master_key(self, masterkey: str) -> bool:
         """
@@ -232,6 +664,49 @@ class DataManagement:
         query: str = DataManagement.predefined_sql('set_masterkey')
         self.cursor.execute(query, (hashed_masterkey,))
 
+    @handler_err_db
+    def get_metadata(self, name: str) -> Optional[Any]:
+        """
+        Read a value of the table metadata, None if it is not set.
+        """
+        query: str = DataManagement.predefined_sql('get_metadata')
+        row: Optional[Tuple[Any]] = self.cursor.execute(query, (name,)).fetchone()
+        return None if row is None else row[0]
+
+    @handler_err_db
+    def set_metadata_many(self, values: Iterable[Tuple[str, Any]]) -> None:
+        query: str = DataManagement.predefined_sql('set_metadata')
+        self.cursor.executemany(query, values)
+
+    def get_kdf(self) -> Optional[KDFParams]:
+        """
+        The key derivation parameters of the vault.
+
+        Returns:
+            KDFParams: The stored parameters, None if the vault still uses the
+            legacy derivation.
+        """
+        raw: Optional[str] = self.get_metadata('kdf')
+        return None if raw is None else KDFParams.from_json(raw)
+
+    def get_wrapped_key(self) -> Optional[bytes]:
+        """
+        The data key of the vault, wrapped by the key derived from the
+        masterkey. None if the entries are still encrypted with the derived
+        key itself.
+        """
+        return self.get_metadata('data_key')
+
+    def set_key_slot(self, kdf: KDFParams, wrapped_key: bytes) -> None:
+        """
+        Store in one statement the key derivation parameters and the data key
+        wrapped by the key derived with them.
+        """
+        self.set_metadata_many((
+            ('kdf', kdf.to_json()),
+            ('data_key', wrapped_key),
+        ))
+
     @handler_err_db
     def list_data(self, field = None, data_to_find = None) -> List[Tuple[Any]]:
         """
@@ -261,10 +736,115 @@ class DataManagement:
         data: List[Tuple[Any]] = self.cursor.fetchall()
         return data
 
+    @handler_err_db
+    def iter_data(
+        self,
+        order:  str = 'id',
+        after:  Optional[int] = None,
+        limit:  Optional[int] = None,
+        desc:   bool = False,
+        masked: bool = False
+    ) -> Cursor:
+        """
+        Lazy, keyset paginated listing of the database. Returns the cursor
+        itself, so rows are only fetched while they are consumed, and the page
+        starts right after the entry 'after' in the chosen order using the
+        index of that order instead of skipping the previous rows.
+
+        Args:
+            order (str): The field to sort by ['id', 'site', 'username'].
+            after (int, optional): The id of the last entry of the previous page.
+            limit (int, optional): Maximum number of entries of the page.
+            desc (bool): Sort in descending order.
+            masked (bool): Only fetch id, site and username, for listings
+            that do not show the passwords.
+
+        Returns:
+            Cursor: An iterable of tuples with the retrieved data.
+        """
+        if order not in DataManagement._ORDER_FIELDS:
+            raise ValueError(f'the field {order} can not be used to sort')
+        key: str = 'id' if order == 'id' else f"IFNULL({order}, '')"
+        keyset: str = ''
+        if after is not None:
+            keyset = DataManagement.predefined_sql('get_page_keyset').format(
+                key=key,
+                cmp='<' if desc else '>'
+            )
+        query: str = DataManagement.predefined_sql('get_page_data').format(
+            columns=(
+                'id, site, username' if masked
+                else 'id, site, username, ciphertext, nonce, tag'
+            ),
+            keyset=keyset,
+            key=key,
+            dir='DESC' if desc else 'ASC'
+        )
+        params: Dict[str, Any] = {'after': after, 'limit': -1 if limit is None else limit}
+        cursor: Cursor = self.conn.cursor()
+        cursor.execute(query, params)
+        return cursor
+
+    @handler_err_db
+    def search_data(
+        self,
+        field:  str,
+        term:   str,
+        mode:   Literal['prefix', 'substr', 'fuzzy'] = 'substr'
+    ) -> List[Tuple[Any]]:
+        """
+        Search entries whose site or username matches the term, ranking the
+        best matches first.
+            prefix: Range scan on the B-tree index of the field, shortest first.
+            substr: Trigram full text index (terms of three or more chars),
+            otherwise a LIKE scan, ordered by the position of the match.
+            fuzzy: Candidates sharing trigrams with the term ordered by bm25,
+            then ranked by similarity with difflib.
+
+        Args:
+            field (str): The field to search ['site', 'username'].
+            term (str): The text to search.
+            mode (Literal(str)): The search method ['prefix', 'substr', 'fuzzy'].
+
+        Returns:
+            List[Tuple[Any]]: A list of tuples containing the retrieved data.
+        """
+        if field not in DataManagement._SEARCH_FIELDS:
+            raise ValueError(f'the field {field} can not be searched')
+        if mode == 'prefix':
+            upper: str = f'{term[:-1]}{chr(ord(term[-1]) + 1)}'
+            tmp_query: str = DataManagement.predefined_sql('get_prefix_data')
+            query: str = tmp_query.replace('|', field)
+            self.cursor.execute(query, (term, upper,))
+            return self.cursor.fetchall()
+
+        trigrams: List[str] = [term[i:i + 3] for i in range(len(term) - 2)]
+        if not self.fts_enabled or not trigrams:
+            escaped: str = term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            tmp_query: str = DataManagement.predefined_sql('get_substr_data')
+            query: str = tmp_query.replace('|', field)
+            self.cursor.execute(query, (f'%{escaped}%', term,))
+            return self.cursor.fetchall()
+
+        quote = lambda text: '"' + text.replace('"', '""') + '"'
+        query: str = DataManagement.predefined_sql('get_fts_data')
+        if mode == 'substr':
+            match: str = f'{field} : {quote(term)}'
+            self.cursor.execute(query, (match, -1,))
+            return self.cursor.fetchall()
+
+        match: str = f'{field} : ({" OR ".join(map(quote, set(trigrams)))})'
+        self.cursor.execute(query, (match, DataManagement._FUZZY_CANDIDATES,))
+        index: int = 1 if field == 'site' else 2
+        similarity = lambda row: SequenceMatcher(
+            None, term.lower(), str(row[index]).lower()
+        ).ratio()
+        return sorted(self.cursor.fetchall(), key=similarity, reverse=True)
+
     @handler_err_db
     def new_entry(
         self,
-        password:   str,
+        password:   Tuple[bytes, bytes, bytes],
         site:       Optional[str] = None,
         username:   Optional[str] = None
     ) -> bool:
@@ -272,7 +852,8 @@ class DataManagement:
         Adds a new entry to the database.
 
         Args:
-            password (str): The password for the new entry.
+            password (Tuple[bytes]): The encrypted password for the new entry
+            with format (ciphertext, nonce, tag).
             site (str, optional): The site name associated with the new entry.
             username (str, optional): The username associated with the new entry.
 
@@ -280,7 +861,7 @@ class DataManagement:
             bool: True if the new entry is added successfully, False otherwise.
         """
         query: str = DataManagement.predefined_sql('set_data')
-        self.cursor.execute(query, (site, username, password,))
+        self.cursor.execute(query, (site, username, *password,))
         return True
 
     @handler_err_db
@@ -302,6 +883,34 @@ class DataManagement:
         self.cursor.execute(query, (data_upd, id,))
         return True
 
+    @handler_err_db
+    def count_data(self) -> int:
+        """
+        Count the entries of the database, without the masterkey.
+
+        Returns:
+            int: The number of entries.
+        """
+        query: str = DataManagement.predefined_sql('counter_data')
+        return self.cursor.execute(query).fetchone()[0]
+
+    @handler_err_db
+    def update_password(self, password: Tuple[bytes, bytes, bytes], id: int) -> bool:
+        """
+        Update the encrypted password of a entry to the database.
+
+        Args:
+            password (Tuple[bytes]): The new encrypted password with format
+            (ciphertext, nonce, tag).
+            id (int): id of registry
+
+        Return:
+            bool: True if the password is updated successfully, False otherwise.
+        """
+        query: str = DataManagement.predefined_sql('update_password')
+        self.cursor.execute(query, (*password, id,))
+        return True
+
     @handler_err_db
     def delete_data(self, id: int) -> bool:
         """
@@ -317,13 +926,145 @@ class DataManagement:
         self.cursor.execute(query, (id,))
         return True
 
+    @handler_err_db
+    def new_entries(
+        self,
+        entries: Iterable[Tuple[Optional[str], Optional[str], bytes, bytes, bytes]]
+    ) -> int:
+        """
+        Bulk variant of new_entry(), insert every entry with a single
+        executemany(). Run it inside transaction() to pay one commit per batch.
+
+        Args:
+            entries (Iterable[Tuple]): Rows with format (site, username,
+            ciphertext, nonce, tag).
+
+        Returns:
+            int: The number of inserted rows.
+        """
+        query: str = DataManagement.predefined_sql('set_data')
+        self.cursor.executemany(query, entries)
+        return self.cursor.rowcount
+
+    @handler_err_db
+    def update_many(
+        self,
+        field:      str,
+        entries:    Iterable[Tuple[Any, int]]
+    ) -> int:
+        """
+        Bulk variant of update_data(), update the same field of many entries
+        with a single executemany().
+
+        Args:
+            field (str): name of field of the table
+            entries (Iterable[Tuple[Any, int]]): Rows with format (data_upd, id).
+
+        Returns:
+            int: The number of updated rows.
+        """
+        tmp_query: str = DataManagement.predefined_sql('update_data')
+        query: str = tmp_query.replace('|', field)
+        self.cursor.executemany(query, entries)
+        return self.cursor.rowcount
+
+    @handler_err_db
+    def update_passwords(
+        self,
+        entries: Iterable[Tuple[bytes, bytes, bytes, int]]
+    ) -> int:
+        """
+        Bulk variant of update_password(), with a single executemany().
+
+        Args:
+            entries (Iterable[Tuple]): Rows with format (ciphertext, nonce, tag, id).
+
+        Returns:
+            int: The number of updated rows.
+        """
+        query: str = DataManagement.predefined_sql('update_password')
+        self.cursor.executemany(query, entries)
+        return self.cursor.rowcount
+
+    @handler_err_db
+    def delete_many(self, ids: Iterable[int]) -> int:
+        """
+        Bulk variant of delete_data(), delete every id with a single executemany().
+
+        Args:
+            ids (Iterable[int]): The ids of the data to delete.
+
+        Returns:
+            int: The number of deleted rows.
+        """
+        query: str = DataManagement.predefined_sql('drop_data')
+        self.cursor.executemany(query, ((id,) for id in ids))
+        return self.cursor.rowcount
+
+    @handler_err_db
+    def entry_exists(self, site: Optional[str], username: Optional[str]) -> bool:
+        """
+        Checks if an entry with the same site and username already exists.
+
+        Args:
+            site (str, optional): The site name of the entry.
+            username (str, optional): The username of the entry.
+
+        Returns:
+            bool: True if the pair site/username exists, False otherwise.
+        """
+        query: str = DataManagement.predefined_sql('exists_entry')
+        self.cursor.execute(query, (site, username,))
+        return self.cursor.fetchone() is not None
+
+    @handler_err_db
+    def existing_ids(self, ids: Iterable[int]) -> Set[int]:
+        """
+        Filter the given ids, keeping only the ones that exist in the database,
+        with one query per _IDS_PER_QUERY ids instead of one list_data() per id.
+
+        Args:
+            ids (Iterable[int]): The ids to check.
+
+        Returns:
+            Set[int]: The ids that exist in the database.
+        """
+        ids = list(ids)
+        existing: Set[int] = set()
+        tmp_query: str = DataManagement.predefined_sql('get_existing_ids')
+        for start in range(0, len(ids), DataManagement._IDS_PER_QUERY):
+            chunk: List[int] = ids[start:start + DataManagement._IDS_PER_QUERY]
+            query: str = tmp_query.replace('|', ', '.join('?' * len(chunk)))
+            existing.update(row[0] for row in self.cursor.execute(query, chunk))
+        return existing
+
+    @handler_err_db
+    def existing_ids_between(self, first: int, last: int) -> Set[int]:
+        """
+        As existing_ids() for every id from first to last, with one query.
+
+        Returns:
+            Set[int]: The ids of the range that exist in the database.
+        """
+        query: str = DataManagement.predefined_sql('get_existing_ids_between')
+        return {row[0] for row in self.cursor.execute(query, (first, last))}
+
     def save_and_exit(self, close_conn: bool = False) -> None:
         """
-        Commits changes to the database and closes the connecion.
+        Commits changes to the database and closes the connecion. A unit of
+        work still open is rolled back instead: it is only left open when the
+        tool exits or fails in the middle of it.
 
         Args:
             close_conn (bool, optional): Indicates whether to exit the tool.
         """
-        self.conn.commit()
+        if self.in_transaction:
+            self._tx_depth = 0
+            self.conn.rollback()
+        else:
+            self.conn.commit()
         if close_conn:
+            key: Path = self.db_path.resolve()
+            if DataManagement._CONNECTIONS.get(key) is self.conn:
+                DataManagement._CONNECTIONS.pop(key)
             self.conn.close()
@@ -0,0 +1,243 @@
+from typing import (
+    ClassVar,
+    Callable,
+    Optional,
+    Iterator,
+    TextIO,
+    Tuple,
+    List,
+    Dict,
+    Set,
+    Any
+)
+from pathlib import Path
+from csv import DictReader
+from json import JSONDecoder, JSONDecodeError, loads
+from re import compile, Pattern
+
+from modules.DataManagement import DataManagement
+from modules.Crypt import PassCrypt
+
+Entry = Tuple[Optional[str], Optional[str], str]
+
+class ImportCredentials:
+    """
+    ImportCredentials: Streams the credentials exported by browsers and password
+    managers (CSV, JSON or JSON Lines) into the login table. The file is read row
+    by row, so the memory used does not depend on its size, and the entries are
+    encrypted and inserted in batches with a single commit for the whole import.
+
+    Attributes:
+        BATCH_SIZE (ClassVar[int]): Number of rows encrypted and inserted with
+        each executemany().
+        CHUNK_SIZE (ClassVar[int]): Number of characters read from the file each
+        time the JSON buffer runs out.
+        FIELD_ALIASES (ClassVar[Dict[str, Tuple[str]]]): Column names used by the
+        most common exporters for each field of the login table, in order of
+        preference.
+    """
+    BATCH_SIZE: ClassVar[int] = 1000
+    CHUNK_SIZE: ClassVar[int] = 1 << 16
+    FIELD_ALIASES: ClassVar[Dict[str, Tuple[str]]] = {
+        'site': ('site', 'name', 'title', 'url', 'login_uri', 'uri', 'origin_url'),
+        'username': ('username', 'login_username', 'user', 'login', 'email'),
+        'password': ('password', 'login_password', 'pass'),
+    }
+    _JSON_SKIP: ClassVar[Pattern] = compile(r'[\s,]*')
+
+    def __init__(
+        self,
+        data_mgmt:  DataManagement,
+        passcrypt:  PassCrypt,
+        file_path:  Path,
+        file_type:  Optional[str] = None
+    ) -> None:
+        """
+        Initialize the instance of class ImportCredentials.
+
+        Args:
+            data_mgmt (DataManagement): Connection to the destination database.
+            passcrypt (PassCrypt): Cipher used to encrypt the imported passwords.
+            file_path (Path): The exported file to import.
+            file_type (str, optional): One of 'csv', 'json', 'jsonl'. Detected
+            by the file extension when not provided.
+
+        Attributes:
+            imported (int): Number of entries inserted in the database.
+            duplicated (int): Number of entries skipped because the pair
+            site/username already exists.
+            invalid (int): Number of rows skipped because they are not an
+            object or have no password.
+        """
+        self.data_mgmt: DataManagement = data_mgmt
+        self.passcrypt: PassCrypt = passcrypt
+        self.file_path: Path = Path(file_path)
+        self.file_type: str = (
+            file_type or self.file_path.suffix.lstrip('.')
+        ).lower()
+        if self.file_type not in ('csv', 'json', 'jsonl'):
+            raise ValueError(f'the file type {self.file_type} is not supported')
+        self.imported: int = 0
+        self.duplicated: int = 0
+        self.invalid: int = 0
+
+    def run(self, progress: Optional[Callable[[int, int], None]] = None) -> int:
+        """
+        Import every entry of the file inside a single transaction.
+
+        Args:
+            progress (Callable[[int, int]], optional): Called after each batch
+            with the number of bytes read and the number of entries imported.
+
+        Returns:
+            int: The number of entries inserted in the database.
+
+        Raises:
+            sqlite3.Error: If the database can not be written, nothing is
+            imported.
+        """
+        with open(self.file_path, encoding='utf-8-sig', newline='') as file:
+            with self.data_mgmt.transaction():
+                batch: List[Entry] = []
+                for entry in self._iter_entries(file):
+                    batch.append(entry)
+                    if len(batch) < ImportCredentials.BATCH_SIZE:
+                        continue
+                    self._insert_batch(batch)
+                    batch = []
+                    if progress is not None:
+                        progress(file.buffer.tell(), self.imported)
+                self._insert_batch(batch)
+            if progress is not None:
+                progress(file.buffer.tell(), self.imported)
+        return self.imported
+
+    def _insert_batch(self, batch: List[Entry]) -> None:
+        """
+        Drop the duplicated entries of the batch (against the database and
+        against the batch itself), encrypt the remaining passwords and insert
+        them with one executemany().
+
+        Args:
+            batch (List[Entry]): Rows with format (site, username, password).
+        """
+        seen: Set[Tuple[Optional[str], Optional[str]]] = set()
+        new_entries: List[Tuple[Optional[str], Optional[str], bytes, bytes, bytes]] = []
+        for site, username, password in batch:
+            if (site, username) in seen or self.data_mgmt.entry_exists(site, username):
+                self.duplicated += 1
+                continue
+            seen.add((site, username))
+            new_entries.append((site, username, *self.passcrypt.encrypt(password)))
+        if new_entries:
+            self.data_mgmt.new_entries(new_entries)
+            self.imported += len(new_entries)
+
+    def _iter_entries(self, file: TextIO) -> Iterator[Entry]:
+        """
+        Yield the normalized entries of the file, one by one.
+
+        Args:
+            file (TextIO): The opened export file.
+
+        Yields:
+            Entry: Rows with format (site, username, password).
+        """
+        match self.file_type:
+            case 'csv': rows = DictReader(file)
+            case 'jsonl': rows = (loads(line) for line in file if line.strip())
+            case 'json': rows = self._iter_json_items(file)
+        for row in rows:
+            entry: Optional[Entry] = self._normalize(row)
+            if entry is None:
+                self.invalid += 1
+                continue
+            yield entry
+
+    def _iter_json_items(self, file: TextIO) -> Iterator[Dict[str, Any]]:
+        """
+        Incremental reader for JSON exports. Supports a top-level array of
+        entries or an object with an 'items' array (Bitwarden format), decoding
+        one item at a time from a buffer of CHUNK_SIZE characters.
+
+        Args:
+            file (TextIO): The opened export file.
+
+        Yields:
+            Dict[str, Any]: Each item of the array.
+        """
+        decoder: JSONDecoder = JSONDecoder()
+        buffer: str = file.read(ImportCredentials.CHUNK_SIZE)
+        if buffer.lstrip().startswith('{'):
+            marker: str = '"items"'
+            while (index := buffer.find(marker)) == -1:
+                chunk: str = file.read(ImportCredentials.CHUNK_SIZE)
+                if not chunk:
+                    return
+                buffer = buffer[-len(marker):] + chunk
+            buffer = buffer[index + len(marker):]
+        while (index := buffer.find('[')) == -1:
+            buffer = file.read(ImportCredentials.CHUNK_SIZE)
+            if not buffer:
+                return
+
+        pos: int = index + 1
+        eof: bool = False
+        while True:
+            pos = ImportCredentials._JSON_SKIP.match(buffer, pos).end()
+            if pos < len(buffer) and buffer[pos] == ']':
+                return
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except JSONDecodeError:
+                if eof:
+                    raise
+                # the item continues in the next chunk, drop what was consumed
+                chunk: str = file.read(ImportCredentials.CHUNK_SIZE)
+                eof = not chunk
+                buffer = buffer[pos:] + chunk
+                pos = 0
+                continue
+            yield item
+            pos = end
+
+    def _normalize(self, row: Any) -> Optional[Entry]:
+        """
+        Map a row of any supported exporter to the fields of the login table.
+
+        Args:
+            row (Any): The raw row or JSON item, any JSON value that is not an
+            object is not an entry.
+
+        Returns:
+            Entry: (site, username, password), or None if the row is not an
+            object, has no password or a field that is not a single value.
+        """
+        if not isinstance(row, dict):
+            return None
+        if isinstance(row.get('login'), dict):
+            # bitwarden json export
+            login: Dict[str, Any] = row['login']
+            uris: Any = login.get('uris')
+            uri: Optional[str] = None
+            if isinstance(uris, list) and uris and isinstance(uris[0], dict):
+                uri = uris[0].get('uri')
+            row = {
+                'site': row.get('name') or uri,
+                'username': login.get('username'),
+                'password': login.get('password'),
+            }
+        lower_row: Dict[str, Any] = {
+            str(key).strip().lower(): value for key, value in row.items()
+        }
+        entry: Dict[str, Optional[str]] = {}
+        for field, aliases in ImportCredentials.FIELD_ALIASES.items():
+            entry[field] = next(
+                (lower_row[alias] for alias in aliases if lower_row.get(alias)),
+                None
+            )
+        if not entry['password'] or any(
+            isinstance(value, (dict, list)) for value in entry.values()
+        ):
+            return None
+        return (entry['site'], entry['username'], str(entry['password']))
@@ -0,0 +1,170 @@
+from typing import (
+    ClassVar,
+    Optional,
+    Iterator,
+    List,
+    Dict
+)
+from pathlib import Path
+from os import environ
+from time import monotonic
+from threading import Lock, Timer
+from contextlib import contextmanager
+
+from modules.Crypt import PassCrypt
+
+class KeyCache:
+    """
+    KeyCache: Keeps the derived key of each unlocked vault during the session,
+    so selecting again a vault or running sensitive commands does not ask for
+    the masterkey or run the KDF again. A key that is not used for
+    idle_timeout seconds is wiped from memory and its vault must be unlocked
+    again. The operations that use the keys run inside hold(): the keys do
+    not expire while they run, and a key locked or replaced meanwhile is only
+    wiped when the last of them ends.
+
+    Attributes:
+        IDLE_TIMEOUT (ClassVar[float]): Default seconds of inactivity before a
+        key expires, read from the CSP_IDLE_TIMEOUT environment variable
+        (Def: 300). A value of 0 disables the expiration.
+    """
+    IDLE_TIMEOUT: ClassVar[float] = float(environ.get('CSP_IDLE_TIMEOUT', 300))
+
+    def __init__(self, idle_timeout: Optional[float] = None) -> None:
+        """
+        Initialize the instance of class KeyCache.
+
+        Args:
+            idle_timeout (float, optional): Seconds of inactivity before a key
+            expires (Def: KeyCache.IDLE_TIMEOUT).
+        """
+        self.idle_timeout: float = (
+            KeyCache.IDLE_TIMEOUT if idle_timeout is None else idle_timeout
+        )
+        self._keys: Dict[Path, PassCrypt] = {}
+        self._last_use: Dict[Path, float] = {}
+        self._timers: Dict[Path, Timer] = {}
+        self._holds: int = 0
+        self._retired: List[PassCrypt] = []
+        self._lock: Lock = Lock()
+
+    def store(self, db_path: Path, passcrypt: PassCrypt) -> None:
+        """
+        Cache the key of an unlocked vault, replacing and wiping the previous
+        one if it is different.
+
+        Args:
+            db_path (Path): The vault unlocked.
+            passcrypt (PassCrypt): The cipher with the derived key.
+        """
+        db_path = Path(db_path).resolve()
+        with self._lock:
+            old: Optional[PassCrypt] = self._keys.get(db_path)
+            if old is not None and old is not passcrypt:
+                self._wipe(old)
+            self._keys[db_path] = passcrypt
+            self._last_use[db_path] = monotonic()
+            self._schedule(db_path, self.idle_timeout)
+
+    def get(self, db_path: Path) -> Optional[PassCrypt]:
+        """
+        Return the key of the vault and restart its idle time.
+
+        Args:
+            db_path (Path): The vault to look for.
+
+        Returns:
+            PassCrypt: The cached cipher, None if the vault is locked.
+        """
+        db_path = Path(db_path).resolve()
+        with self._lock:
+            passcrypt: Optional[PassCrypt] = self._keys.get(db_path)
+            if passcrypt is not None:
+                self._last_use[db_path] = monotonic()
+            return passcrypt
+
+    def vaults(self) -> List[Path]:
+        """
+        Return the vaults that are unlocked.
+        """
+        with self._lock:
+            return list(self._keys)
+
+    def lock(self, db_path: Optional[Path] = None) -> None:
+        """
+        Wipe the key of a vault, or of every vault if db_path is not given.
+
+        Args:
+            db_path (Path, optional): The vault to lock.
+        """
+        with self._lock:
+            paths = list(self._keys) if db_path is None else [Path(db_path).resolve()]
+            for path in paths:
+                self._discard(path)
+
+    @contextmanager
+    def hold(self) -> Iterator[None]:
+        """
+        Mark the keys as in use while an operation runs, the holds can be
+        nested and come from several threads.
+        """
+        with self._lock:
+            self._holds += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._holds -= 1
+                if not self._holds:
+                    for passcrypt in self._retired:
+                        passcrypt.wipe()
+                    self._retired.clear()
+
+    def _schedule(self, db_path: Path, delay: float) -> None:
+        timer: Optional[Timer] = self._timers.pop(db_path, None)
+        if timer is not None:
+            timer.cancel()
+        if self.idle_timeout <= 0:
+            return
+        timer = Timer(delay, self._expire, args=(db_path,))
+        timer.daemon = True
+        self._timers[db_path] = timer
+        timer.start()
+
+    def _expire(self, db_path: Path) -> None:
+        """
+        Called by the timer of a vault, the key is only wiped if it has not
+        been used since the timer was started, otherwise the timer is started
+        again for the remaining time. While a key can be in use by an
+        operation (hold) it is checked again after a full idle timeout.
+        """
+        with self._lock:
+            if db_path not in self._keys:
+                return
+            if self._holds:
+                self._schedule(db_path, self.idle_timeout)
+                return
+            idle: float = monotonic() - self._last_use[db_path]
+            if idle < self.idle_timeout:
+                self._schedule(db_path, self.idle_timeout - idle)
+                return
+            self._discard(db_path)
+
+    def _discard(self, db_path: Path) -> None:
+        timer: Optional[Timer] = self._timers.pop(db_path, None)
+        if timer is not None:
+            timer.cancel()
+        passcrypt: Optional[PassCrypt] = self._keys.pop(db_path, None)
+        self._last_use.pop(db_path, None)
+        if passcrypt is not None:
+            self._wipe(passcrypt)
+
+    def _wipe(self, passcrypt: PassCrypt) -> None:
+        # a key dropped while an operation can be using it is wiped after it
+        if self._holds:
+            self._retired.append(passcrypt)
+        else:
+            passcrypt.wipe()
+
+    def __contains__(self, db_path: Path) -> bool:
+        return Path(db_path).resolve() in self._keys
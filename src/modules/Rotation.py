@@ -0,0 +1,121 @@
+from typing import (
+    ClassVar,
+    Callable,
+    Optional,
+    Tuple,
+    List
+)
+from time import monotonic
+
+from modules.DataManagement import DataManagement
+from modules.Crypt import PassCrypt
+
+CryptRow = Tuple[int, bytes, bytes, bytes]
+RotatedRow = Tuple[bytes, bytes, bytes, int]
+
+def _rotate_chunk(
+    old_key:    bytes,
+    new_key:    bytes,
+    rows:       List[CryptRow]
+) -> List[RotatedRow]:
+    """
+    Worker of PassCrypt.map_chunks(), decrypt each row with the old key and encrypt it again
+    with the new one.
+
+    Args:
+        old_key (bytes): The key derived from the old masterkey.
+        new_key (bytes): The key derived from the new masterkey.
+        rows (List[CryptRow]): Rows with format (id, ciphertext, nonce, tag).
+
+    Returns:
+        List[RotatedRow]: Rows with format (ciphertext, nonce, tag, id), ready
+        for DataManagement.update_passwords().
+    """
+    old: PassCrypt = PassCrypt.from_key(old_key)
+    new: PassCrypt = PassCrypt.from_key(new_key)
+    try:
+        return [(*new.encrypt(old.decrypt(row[1:4])), row[0]) for row in rows]
+    finally:
+        old.wipe()
+        new.wipe()
+
+class MasterkeyRotation:
+    """
+    MasterkeyRotation: Encrypts again every entry of the database with a new
+    key. The entries are read by id in batches, the crypto of each batch is
+    shared among the pool of processes of PassCrypt (pycryptodome holds the
+    GIL, threads do not scale) and every batch is written with one
+    executemany(), all inside a single transaction: if any entry fails
+    nothing is changed.
+
+    Attributes:
+        BATCH_SIZE (ClassVar[int]): Entries read, rotated and written at once.
+    """
+    BATCH_SIZE: ClassVar[int] = 8000
+
+    def __init__(
+        self,
+        data_mgmt:      DataManagement,
+        old_passcrypt:  PassCrypt,
+        new_passcrypt:  PassCrypt
+    ) -> None:
+        """
+        Initialize the instance of class MasterkeyRotation.
+
+        Args:
+            data_mgmt (DataManagement): Connection to the database.
+            old_passcrypt (PassCrypt): Cipher with the current key.
+            new_passcrypt (PassCrypt): Cipher with the new key.
+
+        Attributes:
+            rotated (int): Number of entries encrypted with the new key.
+            elapsed (float): Seconds taken by run().
+        """
+        self.data_mgmt: DataManagement = data_mgmt
+        self.old_passcrypt: PassCrypt = old_passcrypt
+        self.new_passcrypt: PassCrypt = new_passcrypt
+        self.rotated: int = 0
+        self.elapsed: float = 0.0
+
+    def run(self, progress: Optional[Callable[[int, int], None]] = None) -> int:
+        """
+        Rotate every entry of the database inside a transaction, nested in the
+        transaction of the caller if there is one.
+
+        Args:
+            progress (Callable[[int, int]], optional): Called after each batch
+            with the entries rotated and the total.
+
+        Returns:
+            int: The number of entries rotated.
+
+        Raises:
+            ValueError: If an entry can not be decrypted with the old key,
+            nothing is changed.
+            sqlite3.Error: If the database can not be written, nothing is
+            changed.
+        """
+        start: float = monotonic()
+        total: int = self.data_mgmt.count_data()
+        keys: Tuple[bytes, bytes] = (
+            bytes(self.old_passcrypt.key),
+            bytes(self.new_passcrypt.key)
+        )
+        with self.data_mgmt.transaction():
+            last_id: Optional[int] = None
+            while batch := [
+                (fields[0], *fields[3:6])
+                for fields in self.data_mgmt.iter_data(
+                    after=last_id,
+                    limit=MasterkeyRotation.BATCH_SIZE
+                )
+            ]:
+                self.data_mgmt.update_passwords(
+                    PassCrypt.map_chunks(_rotate_chunk, keys, batch)
+                )
+                last_id = batch[-1][0]
+                self.rotated += len(batch)
+                if progress is not None:
+                    progress(self.rotated, total)
+        self.elapsed = monotonic() - start
+        return self.rotated
@@ -1,10 +1,15 @@
 # str libraries
 from typing import (
+    TYPE_CHECKING,
     ClassVar,
     NoReturn,
     Callable,
     Optional,
+    Set,
     Union,
+    Iterable,
+    Iterator,
+    Sequence,
     Any,
     Tuple,
     List,
@@ -13,42 +18,37 @@ from typing import (
 from functools import wraps
 from pathlib import Path
 from argparse import Namespace
-from time import sleep
+from time import monotonic
+from datetime import datetime
+from threading import Thread
+from sqlite3 import Error as SQLiteError, Cursor
+from csv import Error as CSVError
+from json import JSONDecodeError
+from itertools import islice, chain
 from signal import signal, SIGINT, SIG_IGN
-
-# third-party libraries
-from prompt_toolkit import PromptSession
-from pyperclip import copy
-
-# test
-from rich.progress import track
-from rich.panel import Panel
-from rich.text import Text
-from rich.console import Group
+from sys import stdin
 
 # own libraries
 from modules.Visuals import Visuals
 from modules.path import PathCSP
-from modules.prompt import Prompt
 from modules.DataManagement import DataManagement
-from modules.CreateSecurePassword import CreateSecurePasswords # change
-from modules.Crypt import PassCrypt
-from utils.prompt_config import welcome_msg
-from utils.proc import safe_access_to_array
-from utils.help_menu import (
-    dict_to_text,
-    list_to_text,
-    create_general_menus,
-    MAIN_HELP,
-    LIST_HELP,
-    ADD_HELP,
-    UPD_HELP,
-    DEL_HELP,
-    CRFTP_HELP,
-    CHMK_HELP,
-    MAIN_HELP_ONELINER,
-    ARGS_HELP_ONELINER,
-)
+from modules.CreateSecurePassword import CreateSecurePasswords, RuleSet # change
+from modules.Crypt import PassCrypt, KDFParams
+from modules.KeyCache import KeyCache
+from modules.AgentClient import AgentClient, AgentError
+from utils.proc import safe_access_to_array, extract_options
+
+# the modules below are only needed by some commands, they are imported by
+# the methods that use them so that a oneliner call does not pay for them
+if TYPE_CHECKING:
+    from prompt_toolkit import PromptSession
+    from rich.panel import Panel
+    from rich.text import Text
+    from rich.console import Group
+    from modules.Agent import CSPAgent
+    from modules.Rotation import MasterkeyRotation
+    from modules.VaultRegistry import VaultRegistry
+    from modules.BreachCorpus import BreachCorpus
 
 vs: Visuals = Visuals()
 
@@ -62,15 +62,48 @@ class StartCSP:
         AUTH_QUESTION (ClassVar[List[Tuple[str, str]]]): Representing the 
         autentication question presented to the user, with the format for
         required to 'message' from PromptSession class.
+        LIST_OPTIONS (ClassVar[Dict[str, bool]]): Options of the list command,
+        mapped to whether they take a value.
+        MASK (ClassVar[str]): Shown instead of the passwords in the listings.
+        FIND_OPTIONS (ClassVar[Dict[str, bool]]): Options of the find command.
+        CRFTP_OPTIONS (ClassVar[Dict[str, bool]]): Options of the crftp command.
+        AUDIT_OPTIONS (ClassVar[Dict[str, bool]]): Options of the audit command.
+        BREACH_OPTIONS (ClassVar[Dict[str, bool]]): Options of the breachcheck
+        command.
 
         _authenticated (bool): a flag indicating whether the user has been
         successfull authenticated.
+        _key_cache (KeyCache): the keys of the vaults unlocked in the session.
     """
     AUTH_QUESTION: ClassVar[List[Tuple[str, str]]] = [
         ('class:msg', '[^] Enter the masterkey: ')
     ]
+    LIST_OPTIONS: ClassVar[Dict[str, bool]] = {
+        'limit': True,
+        'after': True,
+        'order': True,
+        'desc': False,
+        'reveal': False,
+    }
+    MASK: ClassVar[str] = '*' * 8
+    FIND_OPTIONS: ClassVar[Dict[str, bool]] = {
+        'limit': True,
+        'reveal': False,
+    }
+    CRFTP_OPTIONS: ClassVar[Dict[str, bool]] = {
+        'from-file': True,
+        'rules': True,
+        'variants': True,
+    }
+    AUDIT_OPTIONS: ClassVar[Dict[str, bool]] = {
+        'all': False,
+    }
+    BREACH_OPTIONS: ClassVar[Dict[str, bool]] = {
+        'build': True,
+    }
     _authenticated: ClassVar[bool] = False
     _passcrypt: ClassVar[Any]
+    _key_cache: ClassVar[KeyCache] = KeyCache()
 
     def __init__(self) -> None:
         self.path_csp: PathCSP = PathCSP()
@@ -79,7 +112,7 @@ class StartCSP:
     def need_auth(method: Callable) -> Callable:
         @wraps(method)
         def wrapper(self_cls, *args, **kwargs):
-            if not self_cls._authenticated:
+            if self_cls.data_mgmt is None:
                 vs.print(
                     'Need authentication in some databases',
                     type='err'
@@ -89,20 +122,71 @@ class StartCSP:
                     type='war'
                 )
                 return None
-            return method(self_cls, *args, **kwargs)
+            if (
+                not self_cls._authenticated
+                or StartCSP._key_cache.get(self_cls.data_mgmt.db_path) is None
+            ):
+                # locked by the user or the key expired after the idle timeout
+                StartCSP._authenticated = False
+                vs.print('The database is locked', type='err')
+                vs.print('Try: csp> unlock to enter the masterkey', type='war')
+                return None
+            with StartCSP._key_cache.hold():
+                return method(self_cls, *args, **kwargs)
         return wrapper
 
     def check_masterkey(self, db_path: Path) -> None:
         """
         Check if the masterkey exits and realize the user authentication for
         start the tool. In case if all checkers are correct, change the value
-        of StartCSP._authenticated to True
+        of StartCSP._authenticated to True. If the database is still unlocked
+        in this session its cached key is used without asking the masterkey.
         """
+        passcrypt: Optional[PassCrypt] = StartCSP._key_cache.get(db_path)
+        if passcrypt is not None:
+            StartCSP._passcrypt = passcrypt
+            StartCSP._authenticated = True
+            self._update_registry()
+            return None
         if not self.data_mgmt.masterkey_exists(db_path):
             self.create_and_store_masterkey()
         if not self._check_credentials():
             self._exit_csp()
+        StartCSP._key_cache.store(db_path, StartCSP._passcrypt)
+        self._share_key_with_agent(db_path)
         StartCSP._authenticated = True
+        self._update_registry()
+
+    def _update_registry(self) -> None:
+        """
+        Record in the vault registry that the current database was used, with
+        its number of entries and its key derivation.
+        """
+        kdf: Optional[KDFParams] = self.data_mgmt.get_kdf()
+        self.path_csp.registry.touch(
+            self.data_mgmt.db_path,
+            entries=self.data_mgmt.count_data(),
+            kdf=None if kdf is None else {
+                'algorithm': kdf.algorithm,
+                'cost': kdf.cost
+            }
+        )
+
+    def _share_key_with_agent(self, db_path: Path) -> None:
+        """
+        Hand the key of the database just unlocked to the csp agent, if it is
+        running, so the next oneliner calls are served by it.
+        """
+        if not AgentClient.available():
+            return None
+        try:
+            AgentClient().request(
+                'add_key',
+                vault=str(Path(db_path).resolve()),
+                key=StartCSP._passcrypt.key.hex()
+            )
+        except (OSError, AgentError):
+            pass
         
     def create_and_store_masterkey(
        self,
@@ -122,7 +206,39 @@ class StartCSP:
             str: when the reset arg its True return the new masterkey.
         """
         if not reset:
+            from utils.prompt_config import welcome_msg
             welcome_msg()
+        masterkey0: str = self._ask_new_masterkey()
+        if reset:
+            self.data_mgmt.re_or_set_masterkey(masterkey0, mode='reset')
+            return masterkey0
+        kdf: KDFParams = KDFParams.create()
+        try:
+            with self.data_mgmt.transaction():
+                self.data_mgmt.re_or_set_masterkey(masterkey0)
+                self.data_mgmt.set_key_slot(
+                    kdf,
+                    PassCrypt(masterkey0, kdf).wrap(PassCrypt.generate())
+                )
+        except SQLiteError as e:
+            vs.print(
+                f'The masterkey could not be stored -> {e}',
+                type='err',
+                bad_render=True
+            )
+            self._exit_csp()
+        vs.print('Masterkey inserted correctly', type='inf', end='\n')
+
+    def _ask_new_masterkey(self) -> str:
+        """
+        Prompt the user for a new masterkey, typed twice, until it matches
+        and meets the requirements.
+
+        Returns:
+            str: The new masterkey.
+        """
+        from modules.prompt import Prompt
+        from modules.Strength import StrengthEstimator, Estimate
         tmp_session: PromptSession = Prompt.create_tmp_prompt(
             msg=StartCSP.AUTH_QUESTION,
             password=True
@@ -137,21 +253,20 @@ class StartCSP:
                         end='\n'
                     )
                     continue
-                if not CreateSecurePasswords.is_strong_password(masterkey0):
+                estimate: Estimate = StrengthEstimator.estimate(masterkey0)
+                if not estimate.strong:
                     vs.print(
-                        'The password does not meet the requirements',
+                        'The password does not meet the requirements, '
+                        f'{estimate.feedback()} (score {estimate.score}/4)',
                         type='err',
-                        end='\n'
+                        end='\n',
+                        bad_render=True
                     )
                     continue
                 break
             except KeyboardInterrupt: self._exit_csp()
             except EOFError: self._exit_csp()
-        if reset:
-            self.data_mgmt.re_or_set_masterkey(masterkey0, mode='reset')
-            return masterkey0
-        self.data_mgmt.re_or_set_masterkey(masterkey0)
-        vs.print('Masterkey inserted correctly', type='inf', end='\n')
+        return masterkey0
     
     def _check_credentials(self, masterkey: str = None) -> bool:
         """
@@ -164,6 +279,7 @@ class StartCSP:
             bool: True if the credentials are correct, False if the attempts 
             are exceeded.
         """
+        from modules.prompt import Prompt
         tmp_session: PromptSession = Prompt.create_tmp_prompt(
             msg=StartCSP.AUTH_QUESTION,
             password=True
@@ -182,7 +298,15 @@ class StartCSP:
                         bad_render=True
                     )
                     continue
-                StartCSP._passcrypt = PassCrypt(masterkey)
+                try:
+                    self._open_data_key(masterkey)
+                except ValueError as ve:
+                    vs.print(
+                        f'The database can not be opened -> {ve}',
+                        type='err',
+                        bad_render=True
+                    )
+                    return False
                 del masterkey
                 return True
             except KeyboardInterrupt as ki:
@@ -190,70 +314,340 @@ class StartCSP:
         vs.print(f'It has exceeded attempts', type='err')
         return False
     
-    @need_auth
-    def _change_masterkey(self) -> None:
+    def _open_data_key(self, masterkey: str) -> None:
         """
-        Change the masterkey of the csp database, in this process it checks the
-        old masterkey and stores it. Subsequently it gets all the entries from
-        database and decrypts them. In this point start the process to set a new
-        masterke[] estructurar bien la libreriasy. If its create correctly, the old entries decrypted we encrypt
-        in base a new masterkey. And show the progress with a bar.
+        Set the cipher of the session with the data key of the database,
+        unwrapped with the key derived from the masterkey. The databases whose
+        entries are encrypted with the derived key itself (created before the
+        data keys) are upgraded once: a random data key is created, every
+        entry is encrypted again with it and the legacy key derivation is
+        replaced. If the upgrade fails the database keeps working as before
+        and it is tried again in the next login.
+
+        Args:
+            masterkey (str): The masterkey, already checked.
+
+        Raises:
+            ValueError: If the data key can not be unwrapped, or the key of a
+            database without data key does not decrypt its entries.
         """
+        kdf: Optional[KDFParams] = self.data_mgmt.get_kdf()
+        kek: PassCrypt = PassCrypt(masterkey, kdf)
+        wrapped_key: Optional[bytes] = self.data_mgmt.get_wrapped_key()
+        if wrapped_key is not None:
+            try:
+                StartCSP._passcrypt = kek.unwrap(wrapped_key)
+            finally:
+                kek.wipe()
+            return None
+        # the entries are encrypted with the derived key itself, it is checked
+        # on one of them before the session or the upgrade use it
+        row: Optional[Tuple[Any, ...]] = next(
+            iter(self.data_mgmt.iter_data(limit=1)),
+            None
+        )
+        if row is not None:
+            try:
+                kek.decrypt(row[3:6])
+            except ValueError:
+                kek.wipe()
+                raise ValueError('the masterkey does not decrypt the entries')
+        StartCSP._passcrypt = kek
+        if kdf is None:
+            kdf = KDFParams.create()
+            kek = PassCrypt(masterkey, kdf)
+        vs.print(
+            f'Upgrading the database to a random data key ({kdf})',
+            type='inf',
+            bad_render=True
+        )
+        if self._reencrypt_vault(PassCrypt.generate(), kdf, kek) is None:
+            vs.print('The database could not be upgraded', type='err')
+        if kek is not StartCSP._passcrypt:
+            kek.wipe()
+
+    def _confirm_masterkey(self, msg: str) -> Optional[str]:
+        """
+        Ask the masterkey of the current database again, for the operations
+        that derive a new key from it.
+
+        Returns:
+            str: The masterkey, None if it is not correct.
+        """
+        from modules.prompt import Prompt
         tmp_session: PromptSession = Prompt.create_tmp_prompt(
             msg=StartCSP.AUTH_QUESTION,
             password=True
         )
         signal(SIGINT, SIG_IGN)
-        
-        # check old masterkey and decrypt all entries of csp database
+        vs.print(msg, type='inf', bad_render=True)
+        masterkey: str = tmp_session.prompt()
+        if not self.data_mgmt.check_master_key(masterkey):
+            vs.print('The masterkey its invalid', type='err')
+            return None
+        return masterkey
+
+    @need_auth
+    def _change_masterkey(self) -> None:
+        """
+        Change the masterkey of the csp database, in this process it checks the
+        old masterkey and asks the new one. Then the new masterkey is stored and
+        the data key is wrapped again with the key derived from it, with a new
+        salt and the cost of the current one, or the default parameters if the
+        database has none because its upgrade failed. The entries are not
+        touched, so it takes the same time whatever the size of the database.
+        """
         vs.print(
             'Executing the masterkey change process..',
             type='inf',
             bad_render=True
         )
-        vs.print(
-            'Enter the actual masterkey to decryption of existing data.',
-            type='inf',
+        old_masterkey: Optional[str] = self._confirm_masterkey(
+            'Enter the actual masterkey to confirm the change'
         )
-        old_masterkey: str = tmp_session.prompt()
-        if not self.data_mgmt.check_master_key(old_masterkey):
-            vs.print('The masterkey its invalid', type='err')
+        if old_masterkey is None:
             return None
-        old_crypt_raw_data = self.data_mgmt.list_data()
-        old_raw_data = self._decrypt_listed_data(old_crypt_raw_data)
-        
-        # create new masterkey and cypher the old_raw_data with new masterkey
+        del old_masterkey
+
         vs.print(
             'Starting the process to create a new masterkey',
             type='inf',
             start='\n'
         )
-        new_masterkey = self.create_and_store_masterkey(reset=True)
-        StartCSP._passcrypt = PassCrypt(new_masterkey)
+        new_masterkey: str = self._ask_new_masterkey()
+        old_kdf: Optional[KDFParams] = self.data_mgmt.get_kdf()
+        kdf: KDFParams = (
+            KDFParams.create() if old_kdf is None
+            else KDFParams.create(old_kdf.algorithm, old_kdf.cost)
+        )
+        start: float = monotonic()
+        changed: bool = self._rewrap_data_key(new_masterkey, kdf, True)
+        del new_masterkey
+        if not changed:
+            vs.print(
+                'The masterkey change failed, the old masterkey is kept',
+                type='err'
+            )
+            return None
         vs.print(
-            'Masterkey was created and stored succesfully',
-            type='inf'
+            f'Masterkey changed in {monotonic() - start:.2f}s',
+            type='inf',
+            bad_render=True
+        )
+
+    def _rewrap_data_key(
+        self,
+        masterkey:          str,
+        kdf:                KDFParams,
+        reset_masterkey:    bool = False
+    ) -> bool:
+        """
+        Wrap the data key of the session with the key derived from the
+        masterkey with new parameters, and store them together in a single
+        transaction.
+
+        Args:
+            masterkey (str): The masterkey to derive the key from.
+            kdf (KDFParams): The new key derivation parameters.
+            reset_masterkey (bool): Store the masterkey as the new one.
+
+        Returns:
+            bool: True if the database was updated.
+        """
+        kek: PassCrypt = PassCrypt(masterkey, kdf)
+        changed: bool = False
+        try:
+            with self.data_mgmt.transaction():
+                if reset_masterkey:
+                    self.data_mgmt.re_or_set_masterkey(masterkey, mode='reset')
+                self.data_mgmt.set_key_slot(kdf, kek.wrap(StartCSP._passcrypt))
+                changed = True
+        except SQLiteError:
+            # already printed by handler_err_db, nothing was stored
+            changed = False
+        kek.wipe()
+        return changed
+
+    @need_auth
+    def _rekey_data(self) -> None:
+        """
+        Replace the data key of the database with a new random one, every
+        entry is encrypted again with it by _reencrypt_vault(). Needed only if
+        the data key itself could have been exposed, changing the masterkey
+        does not change it. A database without parameters, whose upgrade
+        failed, gets the default ones to wrap the new data key.
+        """
+        masterkey: Optional[str] = self._confirm_masterkey(
+            'Enter the masterkey to rotate the data key'
+        )
+        if masterkey is None:
+            return None
+        kdf: Optional[KDFParams] = self.data_mgmt.get_kdf()
+        if kdf is None:
+            kdf = KDFParams.create()
+        kek: PassCrypt = PassCrypt(masterkey, kdf)
+        del masterkey
+        rotation: Optional[MasterkeyRotation] = self._reencrypt_vault(
+            PassCrypt.generate(),
+            kdf,
+            kek
+        )
+        kek.wipe()
+        if rotation is None:
+            vs.print(
+                'The data key rotation failed, the old data key is kept',
+                type='err'
+            )
+            return None
+        vs.print(
+            f'Data key rotated, {rotation.rotated} entries encrypted again '
+            f'in {rotation.elapsed:.2f}s',
+            type='inf',
+            bad_render=True
+        )
+
+    def _reencrypt_vault(
+        self,
+        new_passcrypt:  PassCrypt,
+        kdf:            KDFParams,
+        kek:            PassCrypt
+    ) -> Optional['MasterkeyRotation']:
+        """
+        Encrypt again every entry with a new data key by MasterkeyRotation, in
+        batches and inside a single transaction that also stores the new data
+        key wrapped by kek: either the whole database is under the new data
+        key or none of it is. The progress bar shows the speed. On success the
+        new key replaces the key of the session, in the cache and in the
+        agent.
+
+        Args:
+            new_passcrypt (PassCrypt): The cipher with the new data key.
+            kdf (KDFParams): The parameters used to derive kek.
+            kek (PassCrypt): The cipher with the key derived from the
+            masterkey.
+
+        Returns:
+            MasterkeyRotation: The finished rotation, None if it failed and
+            nothing was changed (new_passcrypt is wiped).
+        """
+        from rich.progress import Progress, TaskID
+        from modules.Rotation import MasterkeyRotation
+
+        rotation: MasterkeyRotation = MasterkeyRotation(
+            self.data_mgmt,
+            StartCSP._passcrypt,
+            new_passcrypt
         )
         vs.print(
             'Beggining the process to encrypt the existing passwords',
             type='inf'
         )
         vs.print(
-            f'Numbers of entries detected: {len(old_raw_data)}',
+            f'Numbers of entries detected: {self.data_mgmt.count_data()}',
             type='inf',
             bad_render=True
         )
-        # render a the progress bar
-        for entry in track(old_raw_data, description='[bold blue]Encrypting[/bold blue]'):
-            new_data: List[Union[str, int]] = [
-                'password',
-                safe_access_to_array(entry, 3),
-                safe_access_to_array(entry)
-            ]
-            self._upd(new_data, skip_msg=True)
-            sleep(0.10)
+        changed: bool = False
+        description: str = '[bold blue]Encrypting[/bold blue]'
+        start: float = monotonic()
+        try:
+            with Progress(console=vs.console) as progress:
+                task: TaskID = progress.add_task(description, total=None)
+                with self.data_mgmt.transaction():
+                    self.data_mgmt.set_key_slot(kdf, kek.wrap(new_passcrypt))
+                    rotation.run(
+                        lambda rotated, total: progress.update(
+                            task,
+                            completed=rotated,
+                            total=total,
+                            description=(
+                                f'{description} '
+                                f'{rotated / max(monotonic() - start, 1e-6):,.0f} entries/s'
+                            )
+                        )
+                    )
+                    changed = True
+        except (ValueError, SQLiteError):
+            # an entry could not be decrypted with the old key or the
+            # database could not be written, nothing was stored
+            changed = False
+        if not changed:
+            new_passcrypt.wipe()
+            return None
+        StartCSP._passcrypt = new_passcrypt
+        StartCSP._key_cache.store(self.data_mgmt.db_path, StartCSP._passcrypt)
+        self._share_key_with_agent(self.data_mgmt.db_path)
+        return rotation
+
+    def _calibrate(self, args: List[str]) -> None:
+        """
+        Benchmark the key derivations in this machine and show the cost that
+        makes an unlock take the target time. With --apply the data key of the
+        current database is wrapped again with a key derived with those
+        parameters, so its unlock time is the same on every machine it is
+        calibrated on.
 
-    def detect_mode( self, args: Namespace) -> Union['PromptCSP', 'OneLinerCSP']:
+        Args:
+            args (List[str]): Optional target in milliseconds (Def: 250) and
+            algorithm (Def: pbkdf2-sha256, every one is shown if not given),
+            and the option --apply.
+        """
+        try:
+            args, options = extract_options(args, {'apply': False})
+            target: Optional[str] = None
+            algorithm: Optional[str] = None
+            for arg in args:
+                if arg.isdigit() and target is None and int(arg) > 0:
+                    target = arg
+                elif arg in KDFParams.ALGORITHMS and algorithm is None:
+                    algorithm = arg
+                else:
+                    raise ValueError(f'{arg} is not a target in ms or an algorithm')
+        except ValueError as ve:
+            vs.print(f'The atributes specify are wrong -> {ve}', type='err')
+            vs.print('Try: csp> help calibrate to see the help menu', type='war')
+            return None
+        target_ms: float = float(target or KDFParams.TARGET_MS)
+        vs.print(
+            f'Calibrating the key derivation for an unlock of {target_ms:g} ms',
+            type='inf',
+            bad_render=True
+        )
+        chosen: Optional[KDFParams] = None
+        for name in (algorithm,) if algorithm else KDFParams.ALGORITHMS:
+            kdf: KDFParams = KDFParams.calibrate(name, target_ms)
+            vs.print(
+                f'{kdf} -> {kdf.measure():.0f} ms',
+                type='proc',
+                bad_render=True
+            )
+            if name == (algorithm or KDFParams.DEFAULT_ALGORITHM):
+                chosen = kdf
+        if options['apply']:
+            self._apply_kdf(chosen)
+
+    @need_auth
+    def _apply_kdf(self, kdf: KDFParams) -> None:
+        """
+        Ask the masterkey and wrap the data key of the database with a key
+        derived with the parameters given.
+        """
+        masterkey: Optional[str] = self._confirm_masterkey(
+            f'Applying {kdf} to the database'
+        )
+        if masterkey is None:
+            return None
+        changed: bool = self._rewrap_data_key(masterkey, kdf)
+        del masterkey
+        if not changed:
+            vs.print('The key derivation could not be changed', type='err')
+            return None
+        vs.print(f'Key derivation changed to {kdf}', type='inf', bad_render=True)
+
+    def detect_mode(
+        self,
+        args: Namespace
+    ) -> Union['PromptCSP', 'OneLinerCSP', 'BatchCSP', 'CSPAgent']:
         """
         Detects the mode specified in the arguments and returns an instance
         of the corresponding class.
@@ -268,47 +662,117 @@ class StartCSP:
         match args.mode:
             case 'prompt': return PromptCSP()
             case 'oneliner': return OneLinerCSP(args)
+            case 'batch': return BatchCSP(args)
+            case 'agent':
+                from modules.Agent import CSPAgent
+                return CSPAgent(args)
 
     @need_auth
     def _list(self, args: List[str]) -> None:
         """
         Detect if the user wants to list the entire database or if he wants
         to make a specific query. The result render is rendered with method:
-        'render_table_db()' of the Visual class
+        'render_table_db()' of the Visual class. The entire database is read
+        by pages with keyset pagination and the rows go from the cursor to the
+        table one by one. The passwords are masked and not even fetched unless
+        --reveal is given, use show or copy to get the password of an entry.
         
         Args:
             args (List[str]): If provided, the firts argument is the field to
-            search and the second argument is the specific data to find.
+            search and the second argument is the specific data to find. The
+            options --limit, --after, --order and --desc select the page and
+            --reveal decrypts the passwords.
 
         Return:
             None: Displays the queried data.
         """
+        try:
+            args, options = extract_options(args, StartCSP.LIST_OPTIONS)
+            for option in ('limit', 'after'):
+                if options[option] is not None and not options[option].isdigit():
+                    raise ValueError(f'the value of --{option} must be a number')
+            limit: Optional[int] = (
+                None if options['limit'] is None else int(options['limit'])
+            )
+            after: Optional[int] = (
+                None if options['after'] is None else int(options['after'])
+            )
+            order: str = options['order'] or 'id'
+            if limit == 0:
+                raise ValueError('the value of --limit must be greater than 0')
+            if order not in DataManagement._ORDER_FIELDS:
+                raise ValueError(f'the list cannot be ordered by {order}')
+        except ValueError as ve:
+            vs.print(
+                f'The atributes specify are wrong -> {ve}',
+                type='err',
+                bad_render=True
+            )
+            vs.print(
+                f'Try: csp> help list to see the help menu',
+                type='war'
+            )
+            return None
+
+        reveal: bool = bool(options['reveal'])
         if len(args) != 0:
-            raw_data = self._list_specific(args[:2])
+            self._list_specific(args[:3], limit, reveal)
             return None
-        crypt_raw_data: List[Tuple[Union[int, str]]] = self.data_mgmt.list_data()
-        raw_data: List[str] = self._decrypt_listed_data(crypt_raw_data)
-        vs.render_table_db(raw_data)
+        # one row more than the page to know if there is a next page
+        cursor: Cursor = self.data_mgmt.iter_data(
+            order,
+            after,
+            None if limit is None else limit + 1,
+            bool(options['desc']),
+            masked=not reveal
+        )
+        page: Iterator[Tuple[Any]] = islice(cursor, limit)
+        last_row: Optional[List[Any]] = vs.render_table_db(
+            self._iter_decrypted_data(page) if reveal else self._iter_masked_data(page)
+        )
+        if last_row is not None and cursor.fetchone() is not None:
+            next_page: str = f'list --after {last_row[0]} --limit {limit}'
+            if order != 'id':
+                next_page += f' --order {order}'
+            if options['desc']:
+                next_page += ' --desc'
+            if reveal:
+                next_page += ' --reveal'
+            vs.print(f'Next page: csp> {next_page}', type='inf')
 
-    def _list_specific(self, args: List[str]) -> None:
+    def _list_specific(
+        self,
+        args:   List[str],
+        limit:  Optional[int] = None,
+        reveal: bool = False
+    ) -> None:
         """
         List specific data from database based on the given field and data to
         find, this method its only called if _list() detect the user want a 
         custom query, The result render is rendered with method: 'render_table_db()'
         of the Visuals class but if data not exists or not found print a error
-        message and end the method.
+        message and end the method. The site and username fields can also be
+        searched by prefix, substring or fuzzy match, with the best matches first.
 
         Args:
             args (List[str]): If provided, the firts argument is the field to
-            search and the second argument is the specific data to find.
+            search, the second argument is the specific data to find and the
+            third the search mode [exact, prefix, substr, fuzzy] (Def: exact).
+            limit (int, optional): Maximum number of rows to display.
+            reveal (bool): Show the passwords instead of the mask.
         
         Return:
             None: Displays the queried data.
         """
         try: 
-            field, data_to_find = args 
+            field, data_to_find, *mode = args
+            mode: str = safe_access_to_array(mode, err_return='exact')
             if field not in ['id', 'site', 'username', 'password']:
                 raise ValueError('the field used to make the query is not valid')
+            if mode not in ['exact', 'prefix', 'substr', 'fuzzy']:
+                raise ValueError(f'the search mode {mode} is not valid')
+            if mode != 'exact' and field not in ['site', 'username']:
+                raise ValueError('only site and username can be searched by text')
         except ValueError as ve: 
             vs.print(
                 f'The atributes specify are wrong -> {ve}',
@@ -320,19 +784,384 @@ class StartCSP:
                 type='war'
             )
             return None
-                    
-        crypt_raw_data: List[Tuple[Union[int, str]]] = self.data_mgmt.list_data(
-            field,
-            data_to_find
-        )
-        raw_data = self._decrypt_listed_data(crypt_raw_data)
-        if len(raw_data) == 0:
+
+        if field == 'password':
+            # the passwords are only comparable once decrypted
+            crypt_raw_data: Iterable[Tuple[Any]] = self.data_mgmt.iter_data()
+        elif mode == 'exact':
+            crypt_raw_data: Iterable[Tuple[Any]] = self.data_mgmt.list_data(
+                field,
+                data_to_find
+            )
+        else:
+            crypt_raw_data: Iterable[Tuple[Any]] = self.data_mgmt.search_data(
+                field,
+                data_to_find,
+                mode
+            )
+        if field == 'password':
+            raw_data: Iterator[List[Any]] = (
+                fields for fields in self._iter_decrypted_data(crypt_raw_data)
+                if fields[3] == data_to_find
+            )
+            if not reveal:
+                raw_data = self._iter_masked_data(raw_data)
+        elif reveal:
+            raw_data: Iterator[List[Any]] = self._iter_decrypted_data(crypt_raw_data)
+        else:
+            raw_data: Iterator[List[Any]] = self._iter_masked_data(crypt_raw_data)
+        raw_data = islice(raw_data, limit)
+        first_row: Optional[List[Any]] = next(raw_data, None)
+        if first_row is None:
             vs.print(
                 'The requested value was not found in the database',
                 type='err'
             )
             return None
-        vs.render_table_db(raw_data)
+        vs.render_table_db(chain((first_row,), raw_data))
+
+    def _find(self, args: List[str]) -> None:
+        """
+        Search the site or the username in every database of the csp folder
+        at once with VaultSearch. The rows are displayed as each database
+        answers, tagged with its name. It does not need a database selected:
+        the passwords are masked, and with --reveal those of the databases
+        unlocked in the session are decrypted.
+
+        Args:
+            args (List[str]): The field, the text to find and the search mode
+            [exact, prefix, substr, fuzzy] (Def: substr). The options --limit
+            and --reveal.
+        """
+        try:
+            args, options = extract_options(args, StartCSP.FIND_OPTIONS)
+            if len(args) not in (2, 3):
+                raise ValueError('specify the field and the text to find')
+            field, term, *mode = args
+            if options['limit'] is not None and not options['limit'].isdigit():
+                raise ValueError('the value of --limit must be a number')
+            limit: Optional[int] = (
+                None if options['limit'] is None else int(options['limit'])
+            )
+            self.path_csp.db_files = self.path_csp._upd_list_files()
+            # copies, the search threads can outlive this command
+            with StartCSP._key_cache.hold():
+                keys: Dict[Path, PassCrypt] = {
+                    vault: PassCrypt.from_key(bytes(passcrypt.key))
+                    for vault in StartCSP._key_cache.vaults()
+                    if (passcrypt := StartCSP._key_cache.get(vault)) is not None
+                }
+            from modules.VaultSearch import VaultSearch
+            search: VaultSearch = VaultSearch(self.path_csp.db_files, keys)
+            raw_data: Iterator[List[Any]] = search.run(
+                field,
+                term,
+                safe_access_to_array(mode, err_return='substr'),
+                bool(options['reveal'])
+            )
+        except ValueError as ve:
+            vs.print(
+                f'The atributes specify are wrong -> {ve}',
+                type='err',
+                bad_render=True
+            )
+            vs.print('Try: csp> help find to see the help menu', type='war')
+            return None
+
+        raw_data = islice(raw_data, limit)
+        first_row: Optional[List[Any]] = next(raw_data, None)
+        if first_row is not None:
+            vs.render_table_db(chain((first_row,), raw_data), vaults=True)
+        for vault, error in search.errors.items():
+            vs.print(
+                f'The database {vault} could not be searched -> {error}',
+                type='err',
+                bad_render=True
+            )
+        if first_row is None:
+            vs.print(
+                'The requested value was not found in any database',
+                type='err'
+            )
+
+    @need_auth
+    def _audit(self, args: List[str]) -> None:
+        """
+        Estimate the strength of every password of the database with
+        StrengthEstimator, the site and the username of each entry count as
+        words that an attacker knows. The weak passwords are reported with the
+        reason, the entries are decrypted by blocks while they are read. If
+        there is a breach index the breached passwords are reported too.
+
+        Args:
+            args (List[str]): The option --all, to report every entry.
+        """
+        try:
+            args, options = extract_options(args, StartCSP.AUDIT_OPTIONS)
+            if args:
+                raise ValueError(f'unexpected arguments {" ".join(args)}')
+        except ValueError as ve:
+            vs.print(
+                f'The atributes specify are wrong -> {ve}',
+                type='err',
+                bad_render=True
+            )
+            vs.print('Try: csp> help audit to see the help menu', type='war')
+            return None
+
+        from modules.Strength import StrengthEstimator, Estimate
+        corpus: Optional[BreachCorpus] = self._breach_corpus()
+        total: int = 0
+        weak: int = 0
+        for id, site, username, password in self._iter_decrypted_data(
+            self.data_mgmt.iter_data()
+        ):
+            total += 1
+            estimate: Estimate = StrengthEstimator.estimate(
+                password,
+                (site, username)
+            )
+            breached: int = 0 if corpus is None else corpus.count(password)
+            strong: bool = estimate.strong and not breached
+            if strong and not options['all']:
+                continue
+            weak += not strong
+            entry: str = f'id {id} ({site or "-"}, {username or "-"})'
+            if breached:
+                vs.print(
+                    f'{entry} -> breached, seen {breached:,} times in the '
+                    'breach index',
+                    type='war',
+                    bad_render=True
+                )
+                continue
+            if strong:
+                vs.print(
+                    f'{entry} -> strong, score {estimate.score}/4, '
+                    f'{estimate.bits:.0f} bits',
+                    type='proc',
+                    bad_render=True
+                )
+                continue
+            vs.print(
+                f'{entry} -> weak, score {estimate.score}/4, '
+                f'{estimate.feedback()}',
+                type='war',
+                bad_render=True
+            )
+        if not weak:
+            vs.print(f'The {total} passwords are strong', type='inf', bad_render=True)
+            return None
+        vs.print(
+            f'{weak} of {total} passwords are weak, change them with: '
+            'csp> upd password {new} {id}',
+            type='inf',
+            bad_render=True
+        )
+
+    def _breach_corpus(self, required: bool = False) -> Optional['BreachCorpus']:
+        """
+        The breach index of the csp folder, opened. None if there is no index,
+        which is only reported if it is required, or if it can not be read.
+        """
+        from modules.BreachCorpus import BreachCorpus
+        corpus: BreachCorpus = BreachCorpus(PathCSP.ROOT_DIR)
+        if not corpus.exists:
+            if required:
+                vs.print('There is no breach index', type='err')
+                vs.print(
+                    'Try: csp> breachcheck --build {dump} to create it',
+                    type='war'
+                )
+            return None
+        try:
+            return corpus.open()
+        except ValueError as ve:
+            vs.print(
+                f'The breach index could not be used -> {ve}',
+                type='err' if required else 'war',
+                bad_render=True
+            )
+            return None
+
+    def _warn_breached(self, password: str, subject: str) -> None:
+        """
+        Warn if a password that is crafted or stored is in the breach index,
+        without network and only if there is an index.
+        """
+        corpus: Optional[BreachCorpus] = self._breach_corpus()
+        if corpus is None:
+            return None
+        breached: int = corpus.count(password)
+        if breached:
+            vs.print(
+                f'{subject} was seen {breached:,} times in the breach index, '
+                'attackers try it first',
+                type='war',
+                bad_render=True
+            )
+
+    def _breachcheck(self, args: List[str]) -> None:
+        """
+        Check passwords against the breach index, offline: a password given,
+        or every password of the database if none is given. --build converts
+        a dump of SHA-1 hashes ("HASH:COUNT" lines, as the ones of Have I
+        Been Pwned) to the index, once.
+
+        Args:
+            args (List[str]): The password, or the option --build with the
+            path of the dump.
+        """
+        try:
+            args, options = extract_options(args, StartCSP.BREACH_OPTIONS)
+            if len(args) > 1:
+                raise ValueError('give only one password to check')
+            if options['build'] is not None and args:
+                raise ValueError('--build does not check a password')
+        except ValueError as ve:
+            vs.print(
+                f'The atributes specify are wrong -> {ve}',
+                type='err',
+                bad_render=True
+            )
+            vs.print('Try: csp> help breachcheck to see the help menu', type='war')
+            return None
+        if options['build'] is not None:
+            self._build_breach_index(options['build'])
+            return None
+        if not args:
+            self._breach_scan()
+            return None
+        corpus: Optional[BreachCorpus] = self._breach_corpus(required=True)
+        if corpus is None:
+            return None
+        breached: int = corpus.count(args[0])
+        if breached:
+            vs.print(
+                f'The password was seen {breached:,} times in the breach index',
+                type='war',
+                bad_render=True
+            )
+            return None
+        vs.print(
+            f'The password is not in the breach index ({corpus.records:,} hashes)',
+            type='inf',
+            bad_render=True
+        )
+
+    def _build_breach_index(self, dump: str) -> None:
+        """
+        Convert a dump of hashes to the breach index of the csp folder.
+        """
+        from modules.BreachCorpus import BreachCorpus
+        corpus: BreachCorpus = BreachCorpus(PathCSP.ROOT_DIR)
+        vs.print(f'Building the breach index of {dump}..', type='inf', bad_render=True)
+        start: float = monotonic()
+        try:
+            records: int = corpus.build(
+                dump,
+                lambda lines: vs.print(
+                    f'{lines:,} lines read',
+                    type='proc',
+                    bad_render=True
+                )
+            )
+        except (OSError, ValueError) as e:
+            vs.print(
+                f'The breach index could not be built -> {e}',
+                type='err',
+                bad_render=True
+            )
+            return None
+        except KeyboardInterrupt:
+            vs.print('The breach index was not built', type='err')
+            return None
+        vs.print(
+            f'{records:,} hashes indexed in {monotonic() - start:.1f}s -> '
+            f'{corpus.path}',
+            type='inf',
+            bad_render=True
+        )
+
+    @need_auth
+    def _breach_scan(self) -> None:
+        """
+        Check every password of the database against the breach index, the
+        entries are decrypted by blocks while they are read.
+        """
+        corpus: Optional[BreachCorpus] = self._breach_corpus(required=True)
+        if corpus is None:
+            return None
+        total: int = 0
+        breached: int = 0
+        for id, site, username, password in self._iter_decrypted_data(
+            self.data_mgmt.iter_data()
+        ):
+            total += 1
+            times: int = corpus.count(password)
+            if not times:
+                continue
+            breached += 1
+            vs.print(
+                f'id {id} ({site or "-"}, {username or "-"}) -> seen '
+                f'{times:,} times in the breach index',
+                type='war',
+                bad_render=True
+            )
+        if not breached:
+            vs.print(
+                f'None of the {total} passwords is in the breach index',
+                type='inf',
+                bad_render=True
+            )
+            return None
+        vs.print(
+            f'{breached} of {total} passwords are breached, change them with: '
+            'csp> upd password {new} {id}',
+            type='inf',
+            bad_render=True
+        )
+
+    @need_auth
+    def _show(self, args: List[str], to_clipboard: bool = False) -> None:
+        """
+        Decrypt the password of a single entry, the only crypto done to find
+        a password in a masked listing. It is displayed in a table or copied
+        to the clipboard.
+
+        Args:
+            args (List[str]): The id of the entry.
+            to_clipboard (bool): Copy the password instead of displaying it.
+        """
+        id: str = safe_access_to_array(args)
+        if not id.isdigit():
+            vs.print('The id of the entry must be a number', type='err')
+            vs.print(
+                f'Try: csp> help {"copy" if to_clipboard else "show"} to see '
+                'the help menu',
+                type='war'
+            )
+            return None
+        crypt_raw_data: List[Tuple[Any]] = self.data_mgmt.list_data('id', id)
+        if not crypt_raw_data:
+            self._print_not_exists_id(id)
+            return None
+        raw_data: List[Any] = self._decrypt_listed_data(crypt_raw_data)[0]
+        if not to_clipboard:
+            vs.render_table_db([raw_data])
+            return None
+        from pyperclip import copy, PyperclipException
+        try:
+            copy(raw_data[3])
+        except PyperclipException:
+            vs.print('There is no clipboard available in this system', type='err')
+            vs.print(f'Try: csp> show {id} to display the password', type='war')
+            return None
+        vs.print(
+            f'The password of the entry {id} -> copied to clipboard',
+            type='proc',
+            bad_render=True
+        )
 
     @need_auth
     def _add(self, args: List[str]) -> None:
@@ -367,109 +1196,321 @@ class StartCSP:
                     'Not enough values were provided to add to the database',
                     type='err'
                 )
-                return
-        crypt_raw_pass: Tuple[str] = StartCSP._passcrypt.encrypt(password)
-        password = f'{crypt_raw_pass[0]}|{crypt_raw_pass[1]}|{crypt_raw_pass[2]}'
-        if self.data_mgmt.new_entry(password, site, username):
+                return
+        crypt_raw_pass: Tuple[bytes] = StartCSP._passcrypt.encrypt(password)
+        inserted: bool = False
+        try:
+            with self.data_mgmt.transaction():
+                inserted = self.data_mgmt.new_entry(crypt_raw_pass, site, username)
+        except SQLiteError as e:
+            self._print_not_stored(e)
+            return None
+        if inserted:
+            vs.print(
+                f'Data inserted correcly', 
+                type='inf'
+            )
+            self._warn_breached(password, 'The password')
+
+    @need_auth
+    def _del(self, args: List[str]) -> None:
+        """
+        Delete data from the database based on the provided id. If the provided
+        id not exists end the method, printing a error message.
+
+        Args:
+            args (List[str]): Content the id of the data to be deleted.
+
+        Return:
+            None: print a message if exec was success or not.
+        """
+        # the ids given one by one and the ranges (id1..id5)
+        ids: List[int] = []
+        ranges: List[Tuple[int, int]] = []
+        try:
+            for arg in args:
+                if '..' in arg:
+                    first, last = map(int, arg.split('..'))
+                    ranges.append((first, last))
+                else:
+                    ids.append(int(arg))
+        except ValueError:
+            vs.print(
+                'The atributes specify are wrong -> the ids must be numbers or ranges as 4..9',
+                type='err',
+                bad_render=True
+            )
+            vs.print('Try: csp> help del to see the help menu', type='war')
+            return None
+
+        # check the ids with a few queries and delete them in one unit of work
+        existing: Optional[Set[int]] = self.data_mgmt.existing_ids(ids)
+        in_ranges: List[Optional[Set[int]]] = [
+            self.data_mgmt.existing_ids_between(first, last)
+            for first, last in ranges
+        ]
+        if existing is None or None in in_ranges:
+            # the error was already printed by handler_err_db
+            vs.print('The ids could not be checked, nothing was deleted', type='err')
+            return None
+        for id in ids:
+            if id in existing: continue
+            self._print_not_exists_id(id)
+        for (first, last), found in zip(ranges, in_ranges):
+            missing: int = max(last - first + 1, 0) - len(found)
+            if missing:
+                vs.print(
+                    f'{missing} ids of the range {first}..{last} do not exist',
+                    type='err',
+                    bad_render=True
+                )
+            existing |= found
+        try:
+            with self.data_mgmt.transaction():
+                self.data_mgmt.delete_many(sorted(existing))
+        except SQLiteError as e:
+            self._print_not_stored(e)
+            return None
+        for id in sorted(existing):
+            vs.print(
+                f'Data Deleted Correctly: id {id}',
+                type='inf',
+                bad_render=True
+            )
+
+    @need_auth
+    def _upd(self, args: List[str], skip_msg: bool = False) -> None:
+        """
+        Update data in the database based ont he privided field, new data
+        and id.
+
+        Args:
+            args (List[str]): Containing the field to update and the id.
+                args[0]: The field to update.
+                args[1]: The new data to replace the existing data.
+                args[2]: The id of the data to be updated.
+        
+        Return:
+            None: This method does not return any type.
+        """
+        try:
+            field, data_upd, id = args
+        except ValueError as ve: 
+            vs.print(
+                f'The atributes specify are wrong -> {ve}',
+                type='err',
+                bad_render=True
+            )
+            vs.print(
+                'Try: csp> help upd to see the help menu',
+                type='war'
+            )
+            return None
+
+        if not self._check_exists_id(id): return None
+        updated: bool = False
+        try:
+            with self.data_mgmt.transaction():
+                if field == 'password':
+                    crypt_data_upd: Tuple[bytes] = StartCSP._passcrypt.encrypt(data_upd)
+                    updated = self.data_mgmt.update_password(crypt_data_upd, id)
+                else:
+                    updated = self.data_mgmt.update_data(field, data_upd, id)
+        except SQLiteError as e:
+            self._print_not_stored(e)
+            return None
+        if updated and not skip_msg:
+            vs.print( 'Data Updated Correctly', type='inf')
+        if updated and field == 'password':
+            self._warn_breached(data_upd, 'The password')
+
+    @need_auth
+    def _import(self, args: List[str]) -> None:
+        """
+        Import the credentials of a CSV, JSON or JSON Lines export into the
+        database using ImportCredentials. The file is streamed in batches inside
+        a single transaction, so if anything fails nothing is imported. Entries
+        whose site/username pair already exists are skipped.
+
+        Args:
+            args (List[str]): Containing the path of the file and optionally
+            its type.
+                args[0]: The path of the exported file.
+                args[1]: The type of the file [csv, json, jsonl] (Def: extension).
+
+        Return:
+            None: Prints the progress and a summary of the import.
+        """
+        if not args:
+            vs.print('File not provided, cannot be imported', type='err')
+            return None
+        file_path: Path = Path(args[0]).expanduser()
+        if not file_path.is_file():
+            vs.print(f'The file {file_path} does not exist', type='err')
+            return None
+        from rich.progress import Progress, TaskID
+        from modules.ImportCredentials import ImportCredentials
+        try:
+            importer: ImportCredentials = ImportCredentials(
+                self.data_mgmt,
+                StartCSP._passcrypt,
+                file_path,
+                file_type=safe_access_to_array(args, 1, err_return=None)
+            )
+        except ValueError as ve:
+            vs.print(f'The atributes specify are wrong -> {ve}', type='err')
+            vs.print('Try: csp> help import to see the help menu', type='war')
+            return None
+
+        description: str = '[bold blue]Importing[/bold blue]'
+        try:
+            with Progress(console=vs.console) as progress:
+                task: TaskID = progress.add_task(
+                    description,
+                    total=file_path.stat().st_size
+                )
+                importer.run(
+                    lambda read, imported: progress.update(
+                        task,
+                        completed=read,
+                        description=f'{description} {imported} entries'
+                    )
+                )
+        except (CSVError, JSONDecodeError, UnicodeDecodeError) as e:
             vs.print(
-                f'Data inserted correcly', 
-                type='inf'
+                f'The file could not be parsed, nothing was imported -> {e}',
+                type='err',
+                bad_render=True
             )
+            return None
+        except SQLiteError as e:
+            self._print_not_stored(e)
+            return None
+        vs.print(
+            f'Imported: {importer.imported} | Duplicated: {importer.duplicated} '
+            f'| Invalid: {importer.invalid}',
+            type='inf',
+            bad_render=True
+        )
+
+    def _ask_masterkey(self, msg: str) -> Union[None, str]:
+        """
+        Prompt the user for a masterkey once.
+
+        Args:
+            msg (str): Information message printed before the prompt.
+
+        Returns:
+            str: The masterkey introduced, None if the prompt was cancelled.
+        """
+        from modules.prompt import Prompt
+        tmp_session: PromptSession = Prompt.create_tmp_prompt(
+            msg=StartCSP.AUTH_QUESTION,
+            password=True
+        )
+        vs.print(msg, type='inf')
+        try:
+            return tmp_session.prompt()
+        except (KeyboardInterrupt, EOFError):
+            return None
 
     @need_auth
-    def _del(self, args: List[str]) -> None:
+    def _backup(self, args: List[str], background: bool = False) -> None:
         """
-        Delete data from the database based on the provided id. If the provided
-        id not exists end the method, printing a error message.
+        Create an encrypted and compressed archive of the current database with
+        VaultBackup. The masterkey is asked again to derive the archive key. In
+        prompt mode the backup runs in a background thread with its own
+        connection, so the session can keep working meanwhile.
 
         Args:
-            args (List[str]): Content the id of the data to be deleted.
+            args (List[str]): Optionally, the path of the archive to create
+            (Def: ~/.csp/backups/{database}-{date}.cspbak).
+            background (bool): Run the backup in a background thread.
 
         Return:
-            None: print a message if exec was success or not.
+            None: Prints a message when the backup ends.
         """
-        def _del_id(id: int) -> bool:
-            """
-            The function deletes a specific entry of csp database, in base to
-            id of the entry. This check if id exists in the record.
-            
-            Args:
-                id (int): the number of id to delete.
-                
-            Returns:
-                bool: False if the id dont exists in record, True if this delete
-                successfully.
-            """
-            if not self._check_exists_id(id): return False
-            if self.data_mgmt.delete_data(id):
-                vs.print(
-                    f'Data Deleted Correctly: id {id}',
-                    type='inf',
-                    bad_render=True
-                )
-                return True
+        from modules.Backup import VaultBackup, BackupError
 
-        # enumerate, returns an iterable containing (index | value). Each value
-        # is checked to see if it contains'..' y filter returns only data matching
-        # that condition. Subsequently the function get_range_index is mapped,
-        # with the iterable resulting from filter, storing in index_range_mode a
-        # list of values of indexes that its syntax follows the range deletion
-        # mode. If not detect this mode index_range_mode storaged None value.
-        index_range_mode: Union[None, List[int]] = list(map(
-            lambda get_range_index: get_range_index[0],
-            filter(lambda index_val: '..' in index_val[1], enumerate(args))
-        ))
+        masterkey: str = self._ask_masterkey('Enter the masterkey to encrypt the backup')
+        if masterkey is None or not self.data_mgmt.check_master_key(masterkey):
+            vs.print('The masterkey its invalid', type='err')
+            return None
 
-        # normal mode
-        for index, id in enumerate(args):
-            if index in index_range_mode: continue
-            if not _del_id(id): continue
+        db_path: Path = self.data_mgmt.db_path
+        archive_path: Path = PathCSP.BACKUP_DIR / (
+            f'{db_path.stem}-{datetime.now():%Y%m%d-%H%M%S}.cspbak'
+        )
+        if args:
+            archive_path = Path(args[0]).expanduser()
+        vault_backup: VaultBackup = VaultBackup(masterkey)
+        del masterkey
+
+        def run_backup() -> None:
+            try:
+                size: int = vault_backup.backup(db_path, archive_path)
+            except (BackupError, SQLiteError, OSError) as e:
+                vs.print(f'The backup failed -> {e}', type='err', bad_render=True)
+                return None
+            vs.print(
+                f'Backup of {db_path.name} ({size} bytes) stored in {archive_path}',
+                type='inf',
+                bad_render=True
+            )
 
-        # range mode
-        if index_range_mode is None: return None
-        for index in index_range_mode:
-            range_ = args[index]
-            id_beg, id_end = map(int, range_.split('..'))
-            # map() delays execution until needed; but wrapping list around
-            # map 'list(map())' forces immediate execution of map object
-            list(map(_del_id, range(id_beg, id_end + 1)))
+        if background:
+            vs.print('Backup running in background', type='inf')
+            Thread(target=run_backup, name='csp-backup').start()
+            return None
+        run_backup()
 
-    @need_auth
-    def _upd(self, args: List[str], skip_msg: bool = False) -> None:
+    def _restore(self, args: List[str]) -> None:
         """
-        Update data in the database based ont he privided field, new data
-        and id.
+        Restore an archive created by backup as a new database file. The chunks
+        are verified as they are read and the database only appears once the
+        whole archive is valid.
 
         Args:
-            args (List[str]): Containing the field to update and the id.
-                args[0]: The field to update.
-                args[1]: The new data to replace the existing data.
-                args[2]: The id of the data to be updated.
-        
+            args (List[str]): Containing the archive and the name of the database.
+                args[0]: The path of the archive.
+                args[1]: The name of the new database file.
+
         Return:
-            None: This method does not return any type.
+            None: Prints a message indicating whether the restore succeeded.
         """
+        from modules.Backup import VaultBackup, BackupError
+
         try:
-            field, data_upd, id = args
-        except ValueError as ve: 
+            archive, name = args[:2]
+            archive_path: Path = Path(archive).expanduser()
+            if not archive_path.is_file():
+                raise ValueError(f'the archive {archive_path} does not exist')
+        except ValueError as ve:
+            vs.print(f'The atributes specify are wrong -> {ve}', type='err')
+            vs.print('Try: csp> help restore to see the help menu', type='war')
+            return None
+        db_path: Path = PathCSP.ROOT_DIR / f'{name}.db'
+        if db_path.exists():
             vs.print(
-                f'The atributes specify are wrong -> {ve}',
+                f'The file {db_path} already exists, choose another name',
                 type='err',
                 bad_render=True
             )
-            vs.print(
-                'Try: csp> help upd to see the help menu',
-                type='war'
-            )
             return None
 
-        if not self._check_exists_id(id): return None
-        if field == 'password':
-            crypt_data_upd: Tuple[str] = StartCSP._passcrypt.encrypt(data_upd)
-            data_upd: str = f'{crypt_data_upd[0]}|{crypt_data_upd[1]}|{crypt_data_upd[2]}'
-
-        if self.data_mgmt.update_data(field, data_upd, id) and not skip_msg:
-            vs.print( 'Data Updated Correctly', type='inf')
+        masterkey: str = self._ask_masterkey('Enter the masterkey of the backup')
+        if masterkey is None:
+            return None
+        try:
+            VaultBackup(masterkey).restore(archive_path, db_path)
+        except (BackupError, OSError) as e:
+            vs.print(f'The restore failed -> {e}', type='err', bad_render=True)
+            return None
+        finally:
+            del masterkey
+        self.path_csp.registry.register(db_path)
+        self.path_csp.db_files = self.path_csp._upd_list_files()
+        vs.print(f'Backup restored in {db_path}', type='inf', bad_render=True)
 
     def _crftp(self, args: List[str]) -> None:
         """
@@ -478,39 +1519,157 @@ class StartCSP:
 
         Args:
             args (List[str]): List containing the original password and a
-            separator.
+            separator, or --from-file with the file of phrases ('-' stdin)
+            and optionally the separator. --rules chooses the rule set and
+            --variants {k} shows the k strongest variants of the phrase.
 
         Returns:
             None: This method does not return any value.
         """
+        try:
+            args, options = extract_options(args, StartCSP.CRFTP_OPTIONS)
+        except ValueError as ve:
+            vs.print(f'The atributes specify are wrong -> {ve}', type='err')
+            vs.print('Try: csp> help crftp to see the help menu', type='war')
+            return None
+        from modules.CraftRules import CraftRules
+        try:
+            rules: RuleSet = CraftRules(PathCSP.ROOT_DIR).select(
+                options['rules'],
+                self._craft_vault()
+            )
+        except ValueError as ve:
+            vs.print(f'The rules could not be used -> {ve}', type='err')
+            return None
+        if options['from-file'] is not None:
+            if options['variants'] is not None:
+                vs.print('The variants can not be crafted from a file', type='err')
+                vs.print('Try: csp> help crftp to see the help menu', type='war')
+                return None
+            self._crftp_from_file(options['from-file'], args, rules)
+            return None
         if not args:
             vs.print('Password not provided, cannot be craft', type='err')
             return
+        if options['variants'] is not None:
+            self._crftp_variants(args, rules, options['variants'])
+            return None
 
-        password: str = safe_access_to_array(args)
-        separator: str = safe_access_to_array(args, 1, err_return=None)
-        if len(args) > 2:
-            password = args
-            separator = ' '
-            password: str = separator.join(password)
-        csp: CreateSecurePasswords = CreateSecurePasswords(
-            password=password,
-            separator=separator
-        )
-
+        csp: CreateSecurePasswords = CreateSecurePasswords.from_words(args, rules)
         reforce_pass: str = csp.create_strong_pass()
         vs.print('Password reforce succesfull', type='inf')
         if not csp.is_strong_password(reforce_pass):
             msg0: str = 'The generated password does not meet security '
             msg1: str = 'requirements. Use it at your own risk'
             vs.print(f'{msg0}{msg1}', type='war')
+        self._warn_breached(reforce_pass, 'The generated password')
 
+        from pyperclip import copy, PyperclipException
+        try:
+            copy(reforce_pass)
+        except PyperclipException:
+            vs.print(reforce_pass, type='proc', bad_render=True)
+            vs.print('There is no clipboard available in this system', type='err')
+            return None
         vs.print(
             f'{reforce_pass} -> copied to clipboard',
             type='proc',
             bad_render=True
         )
-        copy(reforce_pass)
+
+    def _crftp_variants(self, args: List[str], rules: RuleSet, k: str) -> None:
+        """
+        Print the k strongest variants of a phrase (substitutions applied,
+        capitalization and separators), best first.
+
+        Args:
+            args (List[str]): The phrase and optionally its separator, as in
+            crftp.
+            rules (RuleSet): Its substitutions are the ones tried.
+            k (str): How many variants.
+        """
+        from modules.CraftVariants import CraftVariants, Variant
+        words: List[str] = args
+        separator: Optional[str] = None
+        if len(args) <= 2:
+            words, separator = args[:1], safe_access_to_array(args, 1, None)
+        try:
+            if not k.isdigit():
+                raise ValueError(f'the number of variants {k} is not valid')
+            generator: CraftVariants = CraftVariants(' '.join(words), separator, rules)
+            variants: List[Variant] = generator.top(int(k))
+        except ValueError as ve:
+            vs.print(f'The atributes specify are wrong -> {ve}', type='err')
+            vs.print('Try: csp> help crftp to see the help menu', type='war')
+            return None
+        for variant in variants:
+            vs.print(
+                f'{variant.password} ({variant.bits:.0f} bits)',
+                type='proc' if variant.strong else 'war',
+                bad_render=True
+            )
+        if not generator.exhausted:
+            vs.print(
+                f'Only {CraftVariants.MAX_VARIANTS} variants were compared',
+                type='war'
+            )
+
+    def _craft_vault(self) -> Optional[str]:
+        """
+        The name of the vault in use, to choose its rule set of crftp.
+        """
+        current_db: str = getattr(self, 'current_db', '')
+        if not current_db:
+            return None
+        return self.path_csp.registry.name_of(Path(current_db))
+
+    def _crftp_from_file(
+        self,
+        source: str,
+        args:   List[str],
+        rules:  RuleSet
+    ) -> None:
+        """
+        Craft every phrase of a file, one per line, and print the passwords
+        in the same order as they are crafted. Without an output format they
+        are written to stdout one per line, so they can be piped.
+
+        Args:
+            source (str): The file of phrases, '-' for stdin.
+            args (List[str]): Optionally the separator of the words (Def:
+            whitespace).
+            rules (RuleSet): The rules to craft them.
+        """
+        if source != '-':
+            source = str(Path(source).expanduser())
+        crafted_passwords: Iterator[str] = CreateSecurePasswords.craft_many(
+            CreateSecurePasswords.read_phrases(source),
+            args[0] if args else None,
+            rules
+        )
+        crafted: int = 0
+        start: float = monotonic()
+        try:
+            if vs.output_format is None:
+                from sys import stdout
+                for password in crafted_passwords:
+                    stdout.write(f'{password}\n')
+                    crafted += 1
+                stdout.flush()
+            else:
+                for password in crafted_passwords:
+                    vs.print(password, type='proc', bad_render=True)
+                    crafted += 1
+        except OSError as e:
+            vs.print(f'The phrases could not be read -> {e}', type='err', bad_render=True)
+            return None
+        elapsed: float = monotonic() - start
+        vs.print(
+            f'{crafted} passwords crafted in {elapsed:.2f}s '
+            f'({crafted / max(elapsed, 1e-6):,.0f} phrases/s)',
+            type='inf',
+            bad_render=True
+        )
 
     def _check_exists_id(self, id: str) -> bool:
         """
@@ -526,13 +1685,34 @@ class StartCSP:
         id_data = self.data_mgmt.list_data('id', id)
         if len(id_data) != 0:
             return True
+        self._print_not_exists_id(id)
+        return False
+
+    def _print_not_exists_id(self, id: str) -> None:
+        """
+        Print the error message for an id that does not exist in the database.
 
+        Args:
+            id (str): The id not found in the database.
+        """
         vs.print(
             f'The id: {id} does not exist, therefore the action cannot be executed',
             type='err',
             bad_render=True
         )
-        return False
+
+    def _print_not_stored(self, error: SQLiteError) -> None:
+        """
+        Print the error message for a unit of work that was rolled back.
+
+        Args:
+            error (SQLiteError): The error that made it fail.
+        """
+        vs.print(
+            f'The database was not changed, the operation failed -> {error}',
+            type='err',
+            bad_render=True
+        )
 
     def _exit_csp(self, print_msg: bool = True) -> NoReturn:
         """
@@ -542,10 +1722,13 @@ class StartCSP:
         Return:
             NoReturn: end the program.
         """
+        StartCSP._key_cache.lock()
         if StartCSP._authenticated:
             if print_msg:
                 vs.print('Save and closing connection to database', type='inf')
+            self._update_registry()
             self.data_mgmt.save_and_exit(True)
+            self.data_mgmt = None
             StartCSP._authenticated = False
             self.current_db = ''
             return
@@ -567,6 +1750,8 @@ class StartCSP:
                 and this is esasy to identify, but the args the args have to be
                 processed. These are divided by ' ', and the returned in a list
                 of words between the spaces.
+            BatchCSP:
+                Each line of the batch is an instruction of the prompt mode.
             OneLinerCSP:
                 In oneliner mode, we identify the commands by the use of flags,
                 so we are only interested in processing the arguments. In this
@@ -583,7 +1768,7 @@ class StartCSP:
             return instruction
         
         son_class: str = type(self).__name__
-        if son_class == 'PromptCSP':
+        if son_class in ('PromptCSP', 'BatchCSP'):
             command, *args = instruction.strip().split(' ')
             args: List[str] = list(filter(lambda arg: arg != '', args))
             return (command, args)
@@ -596,6 +1781,47 @@ class StartCSP:
             args = list(filter(lambda arg: arg != '', args))
             return args
 
+    def _iter_decrypted_data(
+        self,
+        crypt_raw_data: Iterable[Tuple[Any]]
+    ) -> Iterator[List[Any]]:
+        """
+        Lazy version of _decrypt_listed_data, the rows are read and decrypted
+        in blocks while they are requested, so they can be rendered while
+        they are read from the cursor. The first block is small to show the
+        first rows at once and the next ones grow until they are big enough
+        to be decrypted in parallel.
+
+        Args:
+            crypt_raw_data(Iterable(Tuple(Any))): The rows returned by the
+            database, or the cursor itself.
+
+        Yields:
+            List(Any): The row with the password decrypted.
+        """
+        rows: Iterator[Tuple[Any]] = iter(crypt_raw_data)
+        size: int = 64
+        while block := list(islice(rows, size)):
+            yield from self._decrypt_listed_data(block)
+            size = min(size * 4, 4 * PassCrypt.PARALLEL_THRESHOLD)
+
+    def _iter_masked_data(
+        self,
+        raw_data: Iterable[Sequence[Any]]
+    ) -> Iterator[List[Any]]:
+        """
+        Replace the password of each row with the mask, without decrypting.
+
+        Args:
+            raw_data(Iterable(Sequence(Any))): Rows starting with id, site and
+            username.
+
+        Yields:
+            List(Any): The row with the mask as password.
+        """
+        for fields in raw_data:
+            yield [*fields[:3], StartCSP.MASK]
+
     def _decrypt_listed_data(self, crypt_raw_data: List[Tuple[Any]]) -> List[str]:
         """
         Decrypt the data returned of database in _list or _list_specific method
@@ -608,10 +1834,9 @@ class StartCSP:
             List(str): Return a list with all data decrypted and more easier to
             read and iterate
         """
-        decrypted_passwords = [
-            StartCSP._passcrypt.decrypt(tuple(fields[3].split('|')))
-            for fields in crypt_raw_data
-        ]
+        decrypted_passwords: List[str] = StartCSP._passcrypt.decrypt_many(
+            [fields[3:6] for fields in crypt_raw_data]
+        )
         return [
             list(fields[:3]) + [password]
             for fields, password in zip(crypt_raw_data, decrypted_passwords)
@@ -630,22 +1855,128 @@ class PromptCSP(StartCSP):
             user input.
         """
         super().__init__()
+        from modules.prompt import Prompt
         self.prmt: Prompt = Prompt()
         self.current_db: str = ''
 
     def _seldb(self) -> None:
         db_path: Path = self.path_csp.select_databases()
-        if self.current_db == db_path:
+        if self.current_db == db_path and db_path in StartCSP._key_cache:
             vs.print(
                 'The selected database is the one currently in use',
                 type='war'
             )
             return
+        if self.data_mgmt is not None and StartCSP._authenticated:
+            self._update_registry()
         self.data_mgmt = DataManagement(db_path)
         self.check_masterkey(db_path)
-        self._authenticated = True
         self.current_db = db_path
 
+    def _vaults(self, args: List[str]) -> None:
+        """
+        Show the vaults of the registry, set the default vault used by the
+        oneliner mode ('vaults default {name}', without name it is unset) or
+        register the databases copied to the csp folder ('vaults rescan').
+
+        Args:
+            args (List[str]): Optional action [default, rescan] and name.
+        """
+        action: str = safe_access_to_array(args)
+        try:
+            match action:
+                case 'default':
+                    name: Optional[str] = safe_access_to_array(args, 1, None)
+                    self.path_csp.registry.set_default(name)
+                    vs.print(
+                        f'Default vault -> {name}' if name else 'Default vault unset',
+                        type='inf',
+                        bad_render=True
+                    )
+                    return None
+                case 'rescan':
+                    self.path_csp.db_files = self.path_csp.registry.rescan()
+                case '': pass
+                case _: raise ValueError(f'the action {action} is not valid')
+        except ValueError as ve:
+            vs.print(f'The atributes specify are wrong -> {ve}', type='err')
+            vs.print('Try: csp> help vaults to see the help menu', type='war')
+            return None
+        default: Optional[Path] = self.path_csp.registry.default
+        for name, vault in self.path_csp.registry.vaults().items():
+            kdf: Optional[Dict[str, Any]] = vault['kdf']
+            kdf_text: str = (
+                'legacy kdf' if kdf is None
+                else f'{kdf['algorithm']} cost {kdf['cost']:,}'
+            )
+            tag: str = ' (default)' if Path(vault['path']) == default else ''
+            vs.print(
+                f'{name}{tag} -> {vault['path']}, {vault['entries'] or 0} '
+                f'entries, {kdf_text}, last used {vault['last_used'] or 'never'}',
+                type='proc',
+                bad_render=True
+            )
+
+    def _render(self, args: List[str]) -> None:
+        """
+        Show the render mode of the tables or set it for the session
+        ('render {mode}', auto follows the terminal again).
+
+        Args:
+            args (List[str]): Optionally, the mode [animated, instant, stream,
+            auto].
+        """
+        mode: str = safe_access_to_array(args)
+        if mode:
+            try:
+                vs.set_render_mode(mode)
+            except ValueError as ve:
+                vs.print(f'The atributes specify are wrong -> {ve}', type='err')
+                vs.print('Try: csp> help render to see the help menu', type='war')
+                return None
+        vs.print(f'Render mode -> {vs.render_mode}', type='inf', bad_render=True)
+
+    def _lock(self, args: List[str]) -> None:
+        """
+        Wipe from memory the key of the current database, or the keys of all
+        the databases unlocked in the session with 'lock all'.
+
+        Args:
+            args (List[str]): Optional 'all'.
+        """
+        lock_all: bool = safe_access_to_array(args) == 'all'
+        vault: Optional[Path] = None
+        if lock_all:
+            StartCSP._key_cache.lock()
+        elif self.current_db:
+            vault = Path(self.current_db).resolve()
+            StartCSP._key_cache.lock(vault)
+        # the agent also forgets the keys locked here
+        if (lock_all or vault is not None) and AgentClient.available():
+            try:
+                AgentClient().request(
+                    'lock',
+                    vault=None if vault is None else str(vault)
+                )
+            except (OSError, AgentError):
+                pass
+        StartCSP._authenticated = False
+        vs.print('The key was wiped, the database is locked', type='inf')
+
+    def _unlock(self) -> None:
+        """
+        Ask again the masterkey of the current database after a lock or after
+        its key expired.
+        """
+        if not self.current_db:
+            vs.print('There is no database selected', type='err')
+            vs.print('Try: csp> seldb for select database', type='war')
+            return None
+        if self.current_db in StartCSP._key_cache:
+            vs.print('The database is already unlocked', type='war')
+            return None
+        self.check_masterkey(self.current_db)
+
     def start_mode(self) -> None:
         """
         Start the prompt mode of the tool CSP tool.
@@ -676,7 +2007,21 @@ class PromptCSP(StartCSP):
             case 'upd': self._upd(args)
             case 'crftp': self._crftp(args)
             case 'chmk': self._change_masterkey()
+            case 'rekey-data': self._rekey_data()
+            case 'calibrate': self._calibrate(args)
+            case 'import': self._import(args)
+            case 'backup': self._backup(args, background=True)
+            case 'restore': self._restore(args)
+            case 'show': self._show(args)
+            case 'copy': self._show(args, to_clipboard=True)
+            case 'find': self._find(args)
+            case 'audit': self._audit(args)
+            case 'breachcheck': self._breachcheck(args)
+            case 'vaults': self._vaults(args)
+            case 'render': self._render(args)
             case 'seldb': self._seldb()
+            case 'lock': self._lock(args)
+            case 'unlock': self._unlock()
             case 'newdb':
                 self.path_csp.create_db_file(arg=safe_access_to_array(args))
             case 'help': self._help(args)
@@ -692,6 +2037,30 @@ class PromptCSP(StartCSP):
             args (List(str)): Command argument for show specific information
             command.
         """
+        from utils.help_menu import (
+            list_to_text,
+            create_general_menus,
+            MAIN_HELP,
+            LIST_HELP,
+            ADD_HELP,
+            UPD_HELP,
+            DEL_HELP,
+            CRFTP_HELP,
+            CHMK_HELP,
+            REKEY_HELP,
+            IMPORT_HELP,
+            BACKUP_HELP,
+            RESTORE_HELP,
+            LOCK_HELP,
+            SHOW_HELP,
+            FIND_HELP,
+            AUDIT_HELP,
+            BREACH_HELP,
+            VAULTS_HELP,
+            RENDER_HELP,
+            CALIBRATE_HELP,
+        )
+
         def _h_chmk():
             """Special panel for command chmk"""
             description_text: Text = list_to_text(
@@ -725,6 +2094,21 @@ class PromptCSP(StartCSP):
             case 'del': vs.console.print(create_general_menus(DEL_HELP))
             case 'crftp': vs.console.print(create_general_menus(CRFTP_HELP))
             case 'chmk': vs.console.print(_h_chmk())
+            case 'rekey-data': vs.console.print(create_general_menus(REKEY_HELP))
+            case 'import': vs.console.print(create_general_menus(IMPORT_HELP))
+            case 'backup': vs.console.print(create_general_menus(BACKUP_HELP))
+            case 'restore': vs.console.print(create_general_menus(RESTORE_HELP))
+            case 'lock' | 'unlock':
+                vs.console.print(create_general_menus(LOCK_HELP))
+            case 'calibrate':
+                vs.console.print(create_general_menus(CALIBRATE_HELP))
+            case 'show' | 'copy':
+                vs.console.print(create_general_menus(SHOW_HELP))
+            case 'find': vs.console.print(create_general_menus(FIND_HELP))
+            case 'audit': vs.console.print(create_general_menus(AUDIT_HELP))
+            case 'breachcheck': vs.console.print(create_general_menus(BREACH_HELP))
+            case 'vaults': vs.console.print(create_general_menus(VAULTS_HELP))
+            case 'render': vs.console.print(create_general_menus(RENDER_HELP))
             case _: vs.console.print(create_general_menus(MAIN_HELP, main=True))
 
 class OneLinerCSP(StartCSP):
@@ -732,16 +2116,50 @@ class OneLinerCSP(StartCSP):
     The OneLinerCSP class handles the one-liner mode of the CSP tool. It
     inherits from the StartCSP class and processes command-line arguments
     to perform actions accordingly.
+
+    Attributes:
+        AUTH_ARGS (ClassVar[Tuple[str]]): Arguments that operate on a database
+        and therefore need to select it and authenticate first.
     """
+    AUTH_ARGS: ClassVar[Tuple[str]] = (
+        'change_masterkey',
+        'rekey_data',
+        'calibrate_apply',
+        'add',
+        'update',
+        'delete',
+        'list',
+        'show',
+        'copy',
+        'import_file',
+        'backup',
+        'audit',
+    )
+
     def __init__(self, args: Namespace) -> None:
         """
         Args:
             args (Namespace): Namespace containing command-line arguments.
         """
-        super().__init__(); print()
+        super().__init__()
         self.args = args
+        if args.output_format is None:
+            print()
+            return None
+        try:
+            vs.set_output_format(args.output_format)
+        except ValueError as ve:
+            vs.print(f'The atributes specify are wrong -> {ve}', type='err')
+            vs.print('Try: csp oneliner -h to see the help menu', type='war')
+            exit(1)
     
     def _help(self, width: int = 85):
+        from utils.help_menu import (
+            create_general_menus,
+            MAIN_HELP_ONELINER,
+            ARGS_HELP_ONELINER,
+        )
+
         vs.console.print(create_general_menus(
             MAIN_HELP_ONELINER,
             main=True,
@@ -754,24 +2172,117 @@ class OneLinerCSP(StartCSP):
             width=width
         ))
         self._exit_csp(print_msg=False)
-    
+
+    def _open_database(self) -> None:
+        """
+        Select the database and authenticate against it, so that the arguments
+        in AUTH_ARGS can be executed.
+        """
+        try:
+            db_path: Path = self.path_csp.select_databases(
+                self.args.vault,
+                interactive=False
+            )
+        except ValueError as ve:
+            vs.print(f'The database cannot be selected -> {ve}', type='err')
+            vs.print(
+                'Try: --vault {name}, or csp> vaults default {name}',
+                type='war'
+            )
+            exit(1)
+        self.data_mgmt = DataManagement(db_path, profile='oneliner')
+        self.check_masterkey(db_path)
+
+    def _list_options(
+        self,
+        names: Iterable[str] = StartCSP.LIST_OPTIONS
+    ) -> List[str]:
+        """
+        Translate the pagination flags of the oneliner mode (--limit, --after,
+        --order, --desc and --reveal) to the options of the list command, or
+        of another command that takes some of them (names).
+        """
+        options: List[str] = []
+        for option in names:
+            value: Union[str, bool, None] = getattr(self.args, f'list_{option}')
+            if value in (None, False):
+                continue
+            options.append(f'--{option}')
+            if value is not True:
+                options.append(value)
+        return options
+
+    def _craft_options(self) -> List[str]:
+        options: List[str] = []
+        if self.args.craft_rules is not None:
+            options += ['--rules', self.args.craft_rules]
+        if self.args.craft_variants is not None:
+            options += ['--variants', self.args.craft_variants]
+        return options
+
+    def _craft_vault(self) -> Optional[str]:
+        """
+        The vault of --vault, or the default vault, chooses the rule set of
+        crftp, as they are the vault that the other arguments use.
+        """
+        registry: VaultRegistry = self.path_csp.registry
+        try:
+            db_path: Optional[Path] = (
+                registry.default if self.args.vault is None
+                else registry.resolve(self.args.vault)
+            )
+        except ValueError:
+            return None
+        return None if db_path is None else registry.name_of(db_path)
+
     def start_mode(self):
         """
         Starts the one-liner mode of the CSP tool and executes actions based on
         the provided command-line arguments.
         """
+        if any(
+            getattr(self.args, arg, None) not in (None, False)
+            for arg in OneLinerCSP.AUTH_ARGS
+        ):
+            self._open_database()
+        if self.args.render is not None:
+            try:
+                vs.set_render_mode(self.args.render)
+            except ValueError as ve:
+                vs.print(f'The atributes specify are wrong -> {ve}', type='err')
+                vs.print('Try: csp oneliner -h to see the help menu', type='war')
         for argument, args in self.args.__dict__.items():
             if args is None: continue
             proc_args: Union[List[str], bool] = self._proc_instruction(args)
             match argument:
-                case 'help': self._help()
+                case 'help':
+                    if not proc_args: continue
+                    self._help()
 
                 case 'change_masterkey': 
                     if not proc_args: continue
                     self._change_masterkey()
 
+                case 'rekey_data':
+                    if not proc_args: continue
+                    self._rekey_data()
+
+                case 'calibrate':
+                    self._calibrate(
+                        proc_args + (['--apply'] if self.args.calibrate_apply else [])
+                    )
+
                 case 'craft_password':
-                    self._crftp(proc_args)
+                    if self.args.craft_from_file is None:
+                        self._crftp(proc_args + self._craft_options())
+
+                case 'craft_from_file':
+                    self._crftp([
+                        CreateSecurePasswords.FROM_FILE,
+                        self.args.craft_from_file,
+                        *(self.args.craft_password or []),
+                        *self._craft_options()
+                    ])
 
                 case 'execute':
                     tmp_prompt: PromptCSP = PromptCSP()
@@ -780,4 +2291,149 @@ class OneLinerCSP(StartCSP):
                 case 'add': self._add(proc_args)
                 case 'update': self._upd(proc_args)
                 case 'delete': self._del(proc_args)
-                case 'list': self._list(proc_args)
\ No newline at end of file
+                case 'list': self._list(proc_args + self._list_options())
+                case 'show': self._show(proc_args)
+                case 'copy': self._show(proc_args, to_clipboard=True)
+                case 'find':
+                    self._find(proc_args + self._list_options(StartCSP.FIND_OPTIONS))
+                case 'import_file': self._import(proc_args)
+                case 'audit':
+                    if not proc_args: continue
+                    self._audit([])
+                case 'breach_check':
+                    # the scan of the database needs it, a password does not
+                    if not proc_args and self.data_mgmt is None:
+                        self._open_database()
+                    self._breachcheck(proc_args)
+                case 'breach_build':
+                    self._breachcheck(['--build', self.args.breach_build])
+                case 'backup': self._backup(proc_args)
+                case 'restore': self._restore(proc_args)
+        self._exit_csp(print_msg=False)
+
+class BatchError(Exception):
+    """
+    Raised when a command of a batch fails, to roll back its work.
+    """
+
+class BatchCSP(OneLinerCSP):
+    """
+    The BatchCSP class runs a script of prompt mode commands, one per line,
+    read from a file or from stdin ('-'). The database is selected and
+    authenticated once (as in the oneliner mode, --vault) and every command
+    runs on the same connection inside a single transaction, committed at
+    the end. Empty lines and lines starting with '#' are skipped.
+
+    A command fails if it prints an error or the database raises one, then
+    its own work is undone (each command runs in a SAVEPOINT). By default the
+    batch stops and nothing is committed, with --continue the failed
+    commands are skipped and the rest is committed.
+
+    Attributes:
+        COMMANDS (ClassVar[Tuple[str]]): The commands that can be used.
+    """
+    COMMANDS: ClassVar[Tuple[str]] = (
+        'list', 'show', 'find', 'add', 'upd', 'del', 'crftp'
+    )
+
+    def _read_instructions(self) -> Iterator[str]:
+        """
+        Yield the lines of the script as they are read.
+        """
+        if self.args.file == '-':
+            yield from stdin
+            return None
+        with open(Path(self.args.file).expanduser(), encoding='utf-8') as script:
+            yield from script
+
+    def _run_command(self, command: str, args: List[str]) -> None:
+        match command:
+            case 'list': self._list(args)
+            case 'show': self._show(args)
+            case 'find': self._find(args)
+            case 'add': self._add(args)
+            case 'upd': self._upd(args)
+            case 'del': self._del(args)
+            case 'crftp': self._crftp(args)
+
+    def _open_database(self) -> None:
+        """
+        As in the oneliner mode, but when the script is read from stdin the
+        masterkey is asked in the terminal, so it is not read from the script.
+        """
+        if self.args.file != '-' or stdin.isatty():
+            super()._open_database()
+            return None
+        from prompt_toolkit.application import create_app_session
+        from prompt_toolkit.input import create_input
+        try:
+            terminal = open('/dev/tty')
+        except OSError:
+            vs.print('There is no terminal to ask the masterkey', type='err')
+            vs.print('Try: csp batch {file} with the commands in a file', type='war')
+            exit(1)
+        with terminal, create_app_session(input=create_input(terminal)):
+            super()._open_database()
+
+    def start_mode(self) -> None:
+        """
+        Authenticate and run every command of the script in one transaction.
+        """
+        if self.args.file != '-' and not Path(self.args.file).expanduser().is_file():
+            vs.print(f'The file {self.args.file} does not exist', type='err')
+            exit(1)
+        if self.args.render is not None:
+            try:
+                vs.set_render_mode(self.args.render)
+            except ValueError as ve:
+                vs.print(f'The atributes specify are wrong -> {ve}', type='err')
+                exit(1)
+        self._open_database()
+        executed: int = 0
+        failed: List[int] = []
+        committed: bool = False
+        start: float = monotonic()
+        try:
+            with self.data_mgmt.transaction():
+                for line, instruction in enumerate(self._read_instructions(), 1):
+                    if not instruction.strip() or instruction.lstrip().startswith('#'):
+                        continue
+                    command, args = self._proc_instruction(instruction)
+                    errors: int = vs.error_count
+                    try:
+                        with self.data_mgmt.transaction():
+                            if command not in BatchCSP.COMMANDS:
+                                vs.print(
+                                    f'The command {command} can not be used in a batch',
+                                    type='err'
+                                )
+                            else:
+                                self._run_command(command, args)
+                            if vs.error_count != errors:
+                                raise BatchError(f'line {line}: {instruction.strip()}')
+                        executed += 1
+                    except (BatchError, SQLiteError) as e:
+                        failed.append(line)
+                        if not self.args.keep_going:
+                            raise BatchError(f'The batch stopped at {e}')
+                        vs.print(f'Skipped {e}', type='war', bad_render=True)
+            committed = True
+        except BatchError as e:
+            vs.print(str(e), type='err', bad_render=True)
+        except SQLiteError as e:
+            vs.print(f'The batch could not be committed -> {e}', type='err', bad_render=True)
+        except OSError as e:
+            vs.print(f'The batch could not be read -> {e}', type='err', bad_render=True)
+
+        elapsed: float = monotonic() - start
+        if committed:
+            vs.print(
+                f'Batch committed: {executed} commands in {elapsed:.2f}s, '
+                f'{len(failed)} skipped',
+                type='inf',
+                bad_render=True
+            )
+        else:
+            vs.print('Nothing was committed, the database is unchanged', type='err')
+        self._exit_csp(print_msg=False)
+        exit(0 if committed and not failed else 1)
@@ -0,0 +1,710 @@
+from typing import (
+    ClassVar,
+    NamedTuple,
+    Optional,
+    Iterable,
+    Pattern,
+    FrozenSet,
+    Tuple,
+    List,
+    Dict,
+    Set
+)
+from re import compile
+from math import comb, factorial, log2
+from time import localtime
+from array import array
+from bisect import bisect_left
+from struct import Struct
+from pathlib import Path
+from sys import byteorder
+
+class Words(NamedTuple):
+    """
+    Words: The words of the frequency lists, as StrengthEstimator.WORDS_FILE
+    stores them, and the words that the attacker may know of the password.
+
+    Attributes:
+        words (List[str]): The words of the lists, sorted.
+        ranks (Dict[str, int]): The rank of each word.
+        heads (FrozenSet[str]): The prefixes of the words up to
+        StrengthEstimator.HEAD_LENGTH characters.
+        extra (Dict[str, int]): The user inputs with their ranks.
+        extra_prefixes (FrozenSet[str]): Every prefix of the user inputs.
+    """
+    words:          List[str]
+    ranks:          Dict[str, int]
+    heads:          FrozenSet[str]
+    extra:          Dict[str, int]
+    extra_prefixes: FrozenSet[str]
+
+    def begins(self, text: str, lo: int = 0) -> Tuple[bool, int]:
+        """
+        If any word starts with a text: heads tells it for the short ones,
+        the longer ones are searched in the sorted list.
+
+        Args:
+            text (str): The text.
+            lo (int): Where the search starts, the position returned for a
+            prefix of the text.
+
+        Returns:
+            Tuple[bool, int]: If a word starts with it and its position in
+            the list, lo if it was not searched.
+        """
+        if len(text) <= StrengthEstimator.HEAD_LENGTH:
+            known: bool = text in self.heads
+        else:
+            lo = bisect_left(self.words, text, lo)
+            known = lo < len(self.words) and self.words[lo].startswith(text)
+        return (known or text in self.extra_prefixes, lo)
+
+    def scan(self, text: str, start: int) -> List[Tuple[int, int]]:
+        """
+        The words at a position of a text: its prefixes from there, from the
+        shortest to the first one that no word starts with.
+
+        Returns:
+            List[Tuple[int, int]]: The end (exclusive) and the rank of each
+            word.
+        """
+        found: List[Tuple[int, int]] = []
+        index: int = 0
+        for end in range(start + 1, len(text) + 1):
+            part: str = text[start:end]
+            known, index = self.begins(part, index)
+            if not known:
+                break
+            rank: Optional[int] = self.extra.get(part) or self.ranks.get(part)
+            if rank is not None:
+                found.append((end, rank))
+        return found
+
+class Match(NamedTuple):
+    """
+    Match: A part of the password that an attacker would guess as a whole.
+
+    Attributes:
+        pattern (str): dictionary, spatial, sequence, repeat, year or
+        bruteforce.
+        i (int): Position of its first character.
+        j (int): Position of its last character.
+        token (str): The text of the password.
+        guesses (int): Guesses to find it.
+        word (str): The word of the dictionary, for dictionary matches.
+        l33t (bool): If the word has leet substitutions.
+        reversed (bool): If the word is written backwards.
+    """
+    pattern:    str
+    i:          int
+    j:          int
+    token:      str
+    guesses:    int
+    word:       str = ''
+    l33t:       bool = False
+    reversed:   bool = False
+
+class Estimate(NamedTuple):
+    """
+    Estimate: The strength of a password.
+
+    Attributes:
+        guesses (int): Guesses that an attacker needs to find it.
+        bits (float): log2 of the guesses.
+        score (int): From 0 (guessed in less than 10^3 guesses) to 4 (more
+        than 10^10), see StrengthEstimator.THRESHOLDS.
+        matches (Tuple[Match]): The parts of the password, in order.
+    """
+    guesses:    int
+    bits:       float
+    score:      int
+    matches:    Tuple[Match, ...]
+
+    @property
+    def strong(self) -> bool:
+        return self.score >= StrengthEstimator.STRONG_SCORE
+
+    def feedback(self) -> str:
+        """
+        Why the password is weak: the parts that are guessed easily.
+        """
+        found: List[str] = []
+        for match in self.matches:
+            match match.pattern:
+                case 'dictionary':
+                    found.append(
+                        f'the word {match.word}'
+                        f'{" with leet" if match.l33t else ""}'
+                        f'{" backwards" if match.reversed else ""}'
+                    )
+                case 'spatial': found.append(f'the keyboard pattern {match.token}')
+                case 'sequence': found.append(f'the sequence {match.token}')
+                case 'repeat': found.append(f'the repetition {match.token}')
+                case 'year': found.append(f'the year {match.token}')
+        if not found:
+            return 'it is too short'
+        return f'it contains {", ".join(found)}'
+
+class StrengthEstimator:
+    """
+    StrengthEstimator: Estimates how many guesses an attacker needs to find a
+    password, in the way of zxcvbn. The password is matched against the
+    patterns that are guessed first: the words of frequency lists (also
+    capitalized, with leet substitutions and backwards), keyboard patterns,
+    sequences, repetitions and years, and each part costs the guesses of its
+    pattern, the rank of a word for example. The cheapest way to cover the
+    whole password with those parts, and bruteforce for the rest, is its
+    number of guesses.
+
+    The frequency lists are compiled by tools/build_strength_words.py into
+    WORDS_FILE: the words sorted, with the best rank of each one in any list
+    as an array of 32 bits. The file is read the first time that a password
+    is estimated and shared afterwards, so the tools that never estimate a
+    password do not load it. The short prefixes of the words are kept in a
+    set and the longer ones are found with a binary search of the sorted
+    words, which stops the search of the words of a position early.
+
+    Attributes:
+        THRESHOLDS (ClassVar[Tuple[int]]): Guesses to reach each score.
+        STRONG_SCORE (ClassVar[int]): The score of a strong password.
+        MAX_LENGTH (ClassVar[int]): Characters matched, the rest of a longer
+        password counts as bruteforce.
+        L33T (ClassVar[Dict[str, str]]): The letters that each leet character
+        can stand for.
+        HEAD_LENGTH (ClassVar[int]): The prefixes of the words that are kept
+        in a set, most texts begin no word after a few characters and are not
+        searched.
+        WORDS_FILE (ClassVar[Path]): The compiled frequency lists.
+        WORDS_HEADER (ClassVar[Struct]): Its header, the magic and the number
+        of words, which is followed by their ranks (little endian) and by the
+        words sorted and joined by new lines (UTF-8).
+    """
+    THRESHOLDS: ClassVar[Tuple[int, ...]] = (10**3, 10**6, 10**8, 10**10)
+    STRONG_SCORE: ClassVar[int] = 3
+    MAX_LENGTH: ClassVar[int] = 64
+    L33T: ClassVar[Dict[str, str]] = {
+        '4': 'a', '@': 'a', '8': 'b', '(': 'c', '{': 'c', '[': 'c', '<': 'c',
+        '3': 'e', '6': 'g', '9': 'g', '1': 'il', '!': 'i', '|': 'il',
+        '7': 'lt', '0': 'o', '$': 's', '5': 's', '+': 't', '%': 'x', '2': 'z',
+    }
+    MAX_L33T_TABLES: ClassVar[int] = 16
+    HEAD_LENGTH: ClassVar[int] = 3
+    WORDS_FILE: ClassVar[Path] = (
+        Path(__file__).resolve().parent.parent / 'utils' / 'strength_words.bin'
+    )
+    WORDS_HEADER: ClassVar[Struct] = Struct('<4sI')
+    WORDS_MAGIC: ClassVar[bytes] = b'CSPW'
+    # shifted and unshifted rows of a qwerty keyboard, and their offsets in
+    # half keys
+    KEYBOARD: ClassVar[Tuple[Tuple[str, str, int], ...]] = (
+        ('`1234567890-=', '~!@#$%^&*()_+', 0),
+        ('qwertyuiop[]\\', 'QWERTYUIOP{}|', 3),
+        ("asdfghjkl;'", 'ASDFGHJKL:"', 4),
+        ('zxcvbnm,./', 'ZXCVBNM<>?', 5),
+    )
+    _BRUTEFORCE_CARDINALITY: ClassVar[int] = 10
+    _MIN_GUESSES: ClassVar[Tuple[int, int]] = (10, 50)
+    _MIN_GUESSES_BEFORE_GROWING: ClassVar[int] = 10000
+    _MIN_YEAR_SPACE: ClassVar[int] = 20
+    _REFERENCE_YEAR: ClassVar[int] = localtime().tm_year
+    _YEAR: ClassVar[Pattern] = compile(r'19\d\d|20\d\d')
+    _GREEDY: ClassVar[Pattern] = compile(r'(.+)\1+')
+    _LAZY: ClassVar[Pattern] = compile(r'(.+?)\1+')
+    _LAZY_ANCHORED: ClassVar[Pattern] = compile(r'^(.+?)\1+$')
+    _words: ClassVar[Optional[Words]] = None
+    # key -> (unshifted key, shifted, {neighbour: direction})
+    _keys: ClassVar[Optional[Dict[str, Tuple[str, bool, Dict[str, int]]]]] = None
+    _average_degree: ClassVar[float] = 0.0
+    # guesses of a bruteforce of each length, factorials and additive costs
+    # of the sequences of each length, up to MAX_LENGTH
+    _bruteforce: ClassVar[List[int]] = []
+    _factorials: ClassVar[List[int]] = []
+    _additive: ClassVar[List[int]] = []
+
+    @classmethod
+    def _load(cls) -> Words:
+        """
+        Read the compiled frequency lists the first time, build the keyboard
+        graph and the costs of the search of _most_guessable.
+
+        Raises:
+            ValueError: If WORDS_FILE is not a file of compiled lists.
+        """
+        if cls._words is not None:
+            return cls._words
+        data: bytes = cls.WORDS_FILE.read_bytes()
+        magic, count = cls.WORDS_HEADER.unpack_from(data)
+        start: int = cls.WORDS_HEADER.size
+        ranks: array = array('I')
+        if magic != cls.WORDS_MAGIC or ranks.itemsize != 4:
+            raise ValueError(f'{cls.WORDS_FILE} is not a file of compiled lists')
+        ranks.frombytes(data[start:start + count * ranks.itemsize])
+        if byteorder == 'big':
+            ranks.byteswap()
+        words: List[str] = data[start + count * ranks.itemsize:].decode().split('\n')
+        if len(words) != count:
+            raise ValueError(f'{cls.WORDS_FILE} is not a file of compiled lists')
+        positions: Dict[Tuple[int, int], str] = {}
+        keys: Dict[str, Tuple[str, bool, Dict[str, int]]] = {}
+        for row, (lower, upper, offset) in enumerate(cls.KEYBOARD):
+            for column, (key, shifted) in enumerate(zip(lower, upper)):
+                positions[(row, offset + 2 * column)] = key
+                neighbours: Dict[str, int] = {}
+                keys[key] = (key, False, neighbours)
+                keys[shifted] = (key, True, neighbours)
+        # a key touches the ones at its sides and the two above and below it
+        directions: Tuple[Tuple[int, int], ...] = (
+            (0, -2), (0, 2), (-1, -1), (-1, 1), (1, -1), (1, 1)
+        )
+        for (row, x), key in positions.items():
+            for direction, (drow, dx) in enumerate(directions):
+                neighbour: Optional[str] = positions.get((row + drow, x + dx))
+                if neighbour is not None:
+                    keys[key][2][neighbour] = direction
+        cls._average_degree = sum(
+            len(neighbours) for _, _, neighbours in keys.values()
+        ) / len(keys)
+        cls._keys = keys
+        cls._bruteforce = [1] + [
+            max(cls._BRUTEFORCE_CARDINALITY ** length, cls._MIN_GUESSES[length > 1] + 1)
+            for length in range(1, cls.MAX_LENGTH + 1)
+        ]
+        cls._factorials = [factorial(length) for length in range(cls.MAX_LENGTH + 1)]
+        cls._additive = [0] + [
+            cls._MIN_GUESSES_BEFORE_GROWING ** (length - 1)
+            for length in range(1, cls.MAX_LENGTH + 1)
+        ]
+        heads: Set[str] = {word[:cls.HEAD_LENGTH] for word in words}
+        cls._words = Words(
+            words,
+            dict(zip(words, ranks)),
+            frozenset(head[:end] for head in heads for end in range(1, len(head) + 1)),
+            {},
+            frozenset()
+        )
+        return cls._words
+
+    @classmethod
+    def estimate(
+        cls,
+        password:       str,
+        user_inputs:    Iterable[str] = ()
+    ) -> Estimate:
+        """
+        Estimate the strength of a password.
+
+        Args:
+            password (str): The password.
+            user_inputs (Iterable[str]): Words that the attacker may know,
+            as the site or the username, they are guessed first.
+
+        Returns:
+            Estimate: Its guesses, bits, score and parts.
+        """
+        words: Words = cls._load()
+        extra: Dict[str, int] = {}
+        for rank, word in enumerate(user_inputs, 1):
+            word = word.lower() if word else ''
+            listed: Optional[int] = words.ranks.get(word)
+            if word and rank < (listed or rank + 1) and word not in extra:
+                extra[word] = rank
+        if extra:
+            words = words._replace(
+                extra=extra,
+                extra_prefixes=frozenset(
+                    word[:end] for word in extra for end in range(1, len(word) + 1)
+                )
+            )
+        tail: int = max(len(password) - cls.MAX_LENGTH, 0)
+        analysed: str = password[:cls.MAX_LENGTH]
+        guesses, matches = cls._most_guessable(
+            analysed,
+            cls._matches(analysed, words)
+        )
+        guesses *= cls._BRUTEFORCE_CARDINALITY ** tail
+        return Estimate(
+            guesses,
+            log2(guesses),
+            sum(guesses >= limit + 5 for limit in cls.THRESHOLDS),
+            matches
+        )
+
+    @classmethod
+    def _matches(
+        cls,
+        password:   str,
+        words:      Words
+    ) -> List[Match]:
+        matches: List[Match] = []
+        matches.extend(cls._dictionary(password, password.lower(), words))
+        matches.extend(cls._reversed(password, words))
+        matches.extend(cls._l33t(password, words))
+        matches.extend(cls._spatial(password))
+        matches.extend(cls._sequence(password))
+        matches.extend(cls._repeat(password))
+        for year in cls._YEAR.finditer(password):
+            matches.append(Match(
+                'year',
+                year.start(),
+                year.end() - 1,
+                year.group(),
+                max(abs(int(year.group()) - cls._REFERENCE_YEAR), cls._MIN_YEAR_SPACE)
+            ))
+        return matches
+
+    @classmethod
+    def _dictionary(
+        cls,
+        password:   str,
+        lowered:    str,
+        words:      Words,
+        starts:     Optional[Iterable[int]] = None
+    ) -> List[Match]:
+        """
+        The words of the lists in lowered, which is the password in lower case
+        or with its leet characters replaced, that start at any position or at
+        the ones of starts.
+        """
+        matches: List[Match] = []
+        size: int = len(lowered)
+        for i in range(size) if starts is None else starts:
+            for j, rank in words.scan(lowered, i):
+                token: str = password[i:j]
+                matches.append(Match(
+                    'dictionary',
+                    i,
+                    j - 1,
+                    token,
+                    rank * cls._uppercase_variations(token),
+                    lowered[i:j]
+                ))
+        return matches
+
+    @classmethod
+    def _reversed(
+        cls,
+        password:   str,
+        words:      Words
+    ) -> List[Match]:
+        backwards: str = password[::-1]
+        last: int = len(password) - 1
+        return [
+            match._replace(
+                i=last - match.j,
+                j=last - match.i,
+                token=match.token[::-1],
+                guesses=match.guesses * 2,
+                reversed=True
+            )
+            for match in cls._dictionary(backwards, backwards.lower(), words)
+            if len(match.token) > 1 and match.token != match.token[::-1]
+        ]
+
+    @classmethod
+    def _l33t(
+        cls,
+        password:   str,
+        words:      Words
+    ) -> List[Match]:
+        """
+        The words written with leet characters: the characters are replaced by
+        the letters that they can stand for, one table for each choice of the
+        ambiguous ones, and the words that needed a replacement are kept.
+        """
+        present: List[str] = list(dict.fromkeys(
+            char for char in password if char in cls.L33T
+        ))
+        if not present:
+            return []
+        tables: List[Dict[str, str]] = [{}]
+        for char in present:
+            tables = [
+                {**table, char: letter}
+                for table in tables for letter in cls.L33T[char]
+            ][:cls.MAX_L33T_TABLES]
+        matches: List[Match] = []
+        seen: Set[Tuple[int, int, str]] = set()
+        lowered: str = password.lower()
+        # the text of a word before its first leet character is the same in
+        # every table, so only the positions where that text starts a word
+        # are searched
+        starts: List[int] = []
+        leet: int = len(lowered)
+        for i in range(len(lowered) - 1, -1, -1):
+            if lowered[i] in cls.L33T:
+                leet = i
+            if leet == i or (leet < len(lowered) and words.begins(lowered[i:leet])[0]):
+                starts.append(i)
+        starts.reverse()
+        for table in tables:
+            translated: str = lowered.translate(str.maketrans(table))
+            for match in cls._dictionary(password, translated, words, starts):
+                subbed: Dict[str, str] = {
+                    char: table[char] for char in match.token if char in table
+                }
+                if not subbed or len(match.token) == 1:
+                    continue
+                if (match.i, match.j, match.word) in seen:
+                    continue
+                seen.add((match.i, match.j, match.word))
+                matches.append(match._replace(
+                    guesses=match.guesses * cls._l33t_variations(match.token, subbed),
+                    l33t=True
+                ))
+        return matches
+
+    @classmethod
+    def _spatial(cls, password: str) -> List[Match]:
+        """
+        Runs of at least three keys that touch each other on the keyboard.
+        """
+        keys: Dict[str, Tuple[str, bool, Dict[str, int]]] = cls._keys
+        matches: List[Match] = []
+        size: int = len(password)
+        i: int = 0
+        while i < size - 2:
+            j: int = i
+            turns: int = 0
+            shifted: int = int(password[i] in keys and keys[password[i]][1])
+            last_direction: Optional[int] = None
+            while j + 1 < size:
+                current: Optional[Tuple[str, bool, Dict[str, int]]] = keys.get(password[j])
+                following: Optional[Tuple[str, bool, Dict[str, int]]] = keys.get(password[j + 1])
+                if current is None or following is None:
+                    break
+                direction: Optional[int] = current[2].get(following[0])
+                if direction is None:
+                    break
+                if direction != last_direction:
+                    turns += 1
+                    last_direction = direction
+                shifted += following[1]
+                j += 1
+            if j - i >= 2:
+                token: str = password[i:j + 1]
+                matches.append(Match(
+                    'spatial',
+                    i,
+                    j,
+                    token,
+                    cls._spatial_guesses(len(token), turns, shifted)
+                ))
+                i = j
+            else:
+                i += 1
+        return matches
+
+    @classmethod
+    def _spatial_guesses(cls, length: int, turns: int, shifted: int) -> int:
+        starts: int = len(cls._keys)
+        degree: float = cls._average_degree
+        guesses: float = 0.0
+        for i in range(2, length + 1):
+            for j in range(1, min(turns, i - 1) + 1):
+                guesses += comb(i - 1, j - 1) * starts * degree ** j
+        guesses = int(guesses)
+        if shifted:
+            unshifted: int = length - shifted
+            guesses *= 2 if not unshifted else sum(
+                comb(shifted + unshifted, i)
+                for i in range(1, min(shifted, unshifted) + 1)
+            )
+        return guesses
+
+    @classmethod
+    def _sequence(cls, password: str) -> List[Match]:
+        """
+        Runs of at least three characters with the same step, as abc, 1357 or
+        zyx.
+        """
+        matches: List[Match] = []
+        size: int = len(password)
+        i: int = 0
+        while i < size - 2:
+            delta: int = ord(password[i + 1]) - ord(password[i])
+            j: int = i + 1
+            while j + 1 < size and ord(password[j + 1]) - ord(password[j]) == delta:
+                j += 1
+            if j - i >= 2 and 0 < abs(delta) <= 5:
+                token: str = password[i:j + 1]
+                if token[0] in 'aAzZ019':
+                    base: int = 4
+                elif token[0].isdigit():
+                    base = 10
+                else:
+                    base = 26
+                matches.append(Match(
+                    'sequence',
+                    i,
+                    j,
+                    token,
+                    base * len(token) * (1 if delta > 0 else 2)
+                ))
+                i = j
+            else:
+                i = j if j - i >= 2 else i + 1
+        return matches
+
+    @classmethod
+    def _repeat(cls, password: str) -> List[Match]:
+        """
+        Repetitions of a part, as aaaa or abcabc, which cost the guesses of
+        the part by the times that it is repeated.
+        """
+        matches: List[Match] = []
+        pos: int = 0
+        while pos < len(password):
+            greedy = cls._GREEDY.search(password, pos)
+            if greedy is None:
+                break
+            lazy = cls._LAZY.search(password, pos)
+            if len(greedy.group()) > len(lazy.group()):
+                match = greedy
+                base: str = cls._LAZY_ANCHORED.match(greedy.group()).group(1)
+            else:
+                match = lazy
+                base = lazy.group(1)
+            base_guesses, _ = cls._most_guessable(
+                base,
+                cls._matches(base, cls._words),
+                exclude_additive=True
+            )
+            matches.append(Match(
+                'repeat',
+                match.start(),
+                match.end() - 1,
+                match.group(),
+                base_guesses * (len(match.group()) // len(base))
+            ))
+            pos = match.end()
+        return matches
+
+    @staticmethod
+    def _uppercase_variations(token: str) -> int:
+        """
+        The ways to capitalize a word with the same number of capitals, the
+        common ones (first, last or every letter) count as two.
+        """
+        if token.islower() or not any(char.isupper() for char in token):
+            return 1
+        if (
+            token.isupper()
+            or (token[0].isupper() and not any(char.isupper() for char in token[1:]))
+            or (token[-1].isupper() and not any(char.isupper() for char in token[:-1]))
+        ):
+            return 2
+        upper: int = sum(char.isupper() for char in token)
+        lower: int = sum(char.islower() for char in token)
+        return sum(comb(upper + lower, i) for i in range(1, min(upper, lower) + 1))
+
+    @staticmethod
+    def _l33t_variations(token: str, subbed: Dict[str, str]) -> int:
+        """
+        The ways to apply the same substitutions to some of the letters.
+        """
+        variations: int = 1
+        lowered: str = token.lower()
+        for char, letter in subbed.items():
+            subs: int = lowered.count(char)
+            kept: int = lowered.count(letter)
+            if not kept:
+                variations *= 2
+            else:
+                variations *= sum(
+                    comb(subs + kept, i) for i in range(1, min(subs, kept) + 1)
+                )
+        return variations
+
+    @classmethod
+    def _most_guessable(
+        cls,
+        password:           str,
+        matches:            List[Match],
+        exclude_additive:   bool = False
+    ) -> Tuple[int, Tuple[Match, ...]]:
+        """
+        The cheapest sequence of matches that covers the password, with
+        bruteforce between them. A sequence of l matches costs
+        l! * (product of their guesses) + 10000^(l-1): the attacker does not
+        know the order of the parts nor how many there are.
+
+        Returns:
+            Tuple[int, Tuple[Match]]: The guesses and the sequence.
+        """
+        size: int = len(password)
+        if not size:
+            return (1, ())
+        by_end: List[List[Match]] = [[] for _ in range(size)]
+        for match in matches:
+            # a part costs at least as a short bruteforce, unless it is all
+            whole: bool = match.i == 0 and match.j == size - 1
+            minimum: int = 1 if whole else cls._MIN_GUESSES[match.j > match.i]
+            if match.guesses < minimum:
+                match = match._replace(guesses=minimum)
+            by_end[match.j].append(match)
+        bruteforce: List[int] = cls._bruteforce
+        factorials: List[int] = cls._factorials
+        additive: List[int] = [0] * (size + 1) if exclude_additive else cls._additive
+        # for each end and length of sequence: its product, its cost and its
+        # last part (the start and the match, None for bruteforce)
+        products: List[Dict[int, int]] = [{} for _ in range(size)]
+        costs: List[Dict[int, int]] = [{} for _ in range(size)]
+        lasts: List[Dict[int, Tuple[int, Optional[Match]]]] = [{} for _ in range(size)]
+        # bruteforce only follows a match (two bruteforce parts in a row are
+        # one longer). A bruteforce of n > 1 characters costs 10^n, so of the
+        # sequences of a length that end before k - 1, the cheapest one with
+        # a bruteforce up to k is the same for every k: the one of least
+        # product * 10^(size - end). Only that one is kept for each length,
+        # with its weight and its end, instead of trying every end for each k
+        following: Dict[int, Tuple[int, int]] = {}
+
+        def update(i: int, k: int, guesses: int, length: int, match: Optional[Match]) -> None:
+            product: int = guesses * products[i - 1][length - 1] if length > 1 else guesses
+            cost: int = factorials[length] * product + additive[length]
+            for other, other_cost in costs[k].items():
+                if other <= length and other_cost <= cost:
+                    return None
+            products[k][length] = product
+            costs[k][length] = cost
+            lasts[k][length] = (i, match)
+
+        for k in range(size):
+            for match in by_end[k]:
+                if match.i > 0:
+                    for length in list(products[match.i - 1]):
+                        update(match.i, k, match.guesses, length + 1, match)
+                else:
+                    update(0, k, match.guesses, 1, match)
+            update(0, k, bruteforce[k + 1], 1, None)
+            if k > 1:
+                end: int = k - 2
+                for length, (_, last) in lasts[end].items():
+                    if last is None:
+                        continue
+                    weight: int = products[end][length] * bruteforce[size - end]
+                    if length not in following or weight < following[length][0]:
+                        following[length] = (weight, end)
+            for length, (_, end) in following.items():
+                update(end + 1, k, bruteforce[k - end], length + 1, None)
+            # and a bruteforce of one character after the ones that end at k - 1
+            if k > 0:
+                for length, (_, last) in lasts[k - 1].items():
+                    if last is not None:
+                        update(k, k, bruteforce[1], length + 1, None)
+
+        best: int = min(costs[size - 1], key=costs[size - 1].__getitem__)
+        sequence: List[Match] = []
+        k: int = size - 1
+        length: int = best
+        while k >= 0:
+            i, match = lasts[k][length]
+            sequence.append(match if match is not None else Match(
+                'bruteforce',
+                i,
+                k,
+                password[i:k + 1],
+                bruteforce[k - i + 1]
+            ))
+            k = i - 1
+            length -= 1
+        return (costs[size - 1][best], tuple(reversed(sequence)))
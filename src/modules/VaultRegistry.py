@@ -0,0 +1,210 @@
+from typing import (
+    ClassVar,
+    Optional,
+    Union,
+    Any,
+    List,
+    Dict
+)
+from pathlib import Path
+from os import replace, getpid
+from json import dumps, loads, JSONDecodeError
+from datetime import datetime
+
+class VaultRegistry:
+    """
+    VaultRegistry: Manifest of the vaults (vaults.json in the csp folder), so
+    the tool knows them without walking the folder on every start. Each vault
+    is registered by name with its path, the last time it was used, its key
+    derivation and its number of entries, and one of them can be the default
+    vault. Every change updates only its own vault and rewrites the manifest
+    atomically, re-reading it first so that two sessions do not undo each
+    other.
+
+    The folder is only walked when there is no manifest yet or on rescan(),
+    vaults created outside the tool have to be registered that way.
+
+    Attributes:
+        FILE_NAME (ClassVar[str]): Name of the manifest in the csp folder.
+    """
+    FILE_NAME: ClassVar[str] = 'vaults.json'
+
+    def __init__(self, root_dir: Path) -> None:
+        """
+        Initialize the instance of class VaultRegistry, the manifest is built
+        from the vaults of root_dir if it does not exist.
+
+        Args:
+            root_dir (Path): The csp folder.
+        """
+        self.root_dir: Path = root_dir
+        self.manifest: Path = root_dir / VaultRegistry.FILE_NAME
+        self._data: Dict[str, Any] = self._load()
+        if not self.manifest.exists():
+            self.rescan()
+
+    def _load(self) -> Dict[str, Any]:
+        try:
+            data: Dict[str, Any] = loads(self.manifest.read_text())
+            if not isinstance(data.get('vaults'), dict):
+                raise ValueError('the manifest has no vaults')
+            return data
+        except (OSError, ValueError, JSONDecodeError):
+            return {'default': None, 'vaults': {}}
+
+    def _save(self) -> None:
+        tmp_path: Path = self.manifest.with_name(f'{self.manifest.name}.{getpid()}')
+        tmp_path.write_text(dumps(self._data, indent=2))
+        replace(tmp_path, self.manifest)
+
+    def _update(self, name: str, **fields: Any) -> None:
+        """
+        Merge the fields of a vault with the manifest on disk and save it.
+        """
+        self._data = self._load()
+        vault: Optional[Dict[str, Any]] = self._data['vaults'].get(name)
+        if vault is None:
+            return None
+        vault.update(fields)
+        self._save()
+
+    def rescan(self) -> List[Path]:
+        """
+        Walk the csp folder and register the vaults that are not registered,
+        forgetting the ones whose file no longer exists.
+
+        Returns:
+            List[Path]: The vaults registered.
+        """
+        self._data = self._load()
+        vaults: Dict[str, Dict[str, Any]] = {
+            name: vault for name, vault in self._data['vaults'].items()
+            if Path(vault['path']).is_file()
+        }
+        registered: List[str] = [vault['path'] for vault in vaults.values()]
+        for db_path in sorted(self.root_dir.glob('**/*.db')):
+            db_path = db_path.resolve()
+            if str(db_path) in registered:
+                continue
+            vaults[self._free_name(db_path, vaults)] = self._new_vault(db_path)
+        self._data['vaults'] = vaults
+        if self._data.get('default') not in vaults:
+            self._data['default'] = None
+        self._save()
+        return self.paths()
+
+    @staticmethod
+    def _new_vault(db_path: Path) -> Dict[str, Any]:
+        return {
+            'path': str(db_path),
+            'last_used': None,
+            'kdf': None,
+            'entries': None,
+        }
+
+    @staticmethod
+    def _free_name(db_path: Path, vaults: Dict[str, Any]) -> str:
+        # vaults with the same file name in different subfolders
+        name: str = db_path.stem
+        suffix: int = 2
+        while name in vaults:
+            name = f'{db_path.stem}-{suffix}'
+            suffix += 1
+        return name
+
+    def register(self, db_path: Path) -> str:
+        """
+        Add a vault to the manifest, if it is not registered yet.
+
+        Returns:
+            str: The name of the vault.
+        """
+        db_path = Path(db_path).expanduser().resolve()
+        name: Optional[str] = self.name_of(db_path)
+        if name is not None:
+            return name
+        self._data = self._load()
+        name = self._free_name(db_path, self._data['vaults'])
+        self._data['vaults'][name] = self._new_vault(db_path)
+        self._save()
+        return name
+
+    def paths(self) -> List[Path]:
+        """
+        The registered vaults whose file exists, sorted by name.
+        """
+        paths: List[Path] = [
+            Path(self._data['vaults'][name]['path'])
+            for name in sorted(self._data['vaults'])
+        ]
+        return [path for path in paths if path.is_file()]
+
+    def vaults(self) -> Dict[str, Dict[str, Any]]:
+        return dict(sorted(self._data['vaults'].items()))
+
+    def name_of(self, db_path: Path) -> Optional[str]:
+        path: str = str(Path(db_path).resolve())
+        for name, vault in self._data['vaults'].items():
+            if str(Path(vault['path']).resolve()) == path:
+                return name
+        return None
+
+    def resolve(self, vault: Union[str, Path]) -> Path:
+        """
+        Find a vault by its name or its path. A path that is not registered
+        yet is registered.
+
+        Raises:
+            ValueError: If the vault does not exist.
+        """
+        registered: Optional[Dict[str, Any]] = self._data['vaults'].get(str(vault))
+        if registered is not None:
+            return Path(registered['path'])
+        db_path: Path = Path(vault).expanduser()
+        if db_path.suffix == '.db' and db_path.is_file():
+            self.register(db_path)
+            return db_path.resolve()
+        raise ValueError(f'the vault {vault} is not registered')
+
+    @property
+    def default(self) -> Optional[Path]:
+        """
+        The default vault, None if it is not set or no longer exists.
+        """
+        vault: Optional[Dict[str, Any]] = self._data['vaults'].get(
+            self._data.get('default') or ''
+        )
+        return None if vault is None else Path(vault['path'])
+
+    def set_default(self, name: Optional[str]) -> None:
+        """
+        Set the default vault, None unsets it.
+
+        Raises:
+            ValueError: If the vault is not registered.
+        """
+        self._data = self._load()
+        if name is not None and name not in self._data['vaults']:
+            raise ValueError(f'the vault {name} is not registered')
+        self._data['default'] = name
+        self._save()
+
+    def touch(
+        self,
+        db_path:    Path,
+        entries:    Optional[int] = None,
+        kdf:        Optional[Dict[str, Any]] = None
+    ) -> None:
+        """
+        Record that the vault was used now, and its number of entries and key
+        derivation (algorithm and cost, never the salt) if they are given.
+        """
+        name: str = self.register(db_path)
+        fields: Dict[str, Any] = {
+            'last_used': datetime.now().isoformat(timespec='seconds')
+        }
+        if entries is not None:
+            fields['entries'] = entries
+        if kdf is not None:
+            fields['kdf'] = kdf
+        self._update(name, **fields)
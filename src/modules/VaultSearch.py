@@ -0,0 +1,154 @@
+from typing import (
+    ClassVar,
+    Optional,
+    Iterable,
+    Iterator,
+    Union,
+    Any,
+    Tuple,
+    List,
+    Dict
+)
+from pathlib import Path
+from queue import Queue
+from threading import Thread
+from sqlite3 import Error as SQLiteError
+
+from modules.DataManagement import DataManagement
+from modules.Crypt import PassCrypt
+
+Row = List[Union[int, str, None]]
+
+class VaultSearch:
+    """
+    VaultSearch: Searches the site or the username in several vaults at once.
+    Each vault is searched by its own thread with a private connection
+    (SQLite releases the GIL while it runs a query), and the rows are yielded
+    tagged with the name of their vault as soon as each vault answers, so a
+    slow or big vault does not delay the results of the others.
+
+    The site and the username are not encrypted, so the vaults are searched
+    without their keys. The passwords are only decrypted if they are
+    revealed and the vault is unlocked, otherwise they are masked.
+
+    Attributes:
+        MODES (ClassVar[Tuple[str]]): The search modes, as in list.
+        MASK (ClassVar[str]): Shown instead of the passwords not revealed.
+    """
+    MODES: ClassVar[Tuple[str]] = ('exact', 'prefix', 'substr', 'fuzzy')
+    MASK: ClassVar[str] = '*' * 8
+
+    def __init__(
+        self,
+        vaults: Iterable[Path],
+        keys:   Optional[Dict[Path, PassCrypt]] = None
+    ) -> None:
+        """
+        Initialize the instance of class VaultSearch.
+
+        Args:
+            vaults (Iterable[Path]): The database files to search.
+            keys (Dict[Path, PassCrypt], optional): The ciphers of the vaults
+            unlocked, by resolved path, used to reveal their passwords. They
+            are owned by the search: each one is wiped when the search of its
+            vault ends, so they must be copies of the keys of the session.
+
+        Attributes:
+            errors (Dict[str, str]): The vaults that could not be searched,
+            with the reason.
+        """
+        self.vaults: List[Path] = [Path(vault).resolve() for vault in vaults]
+        self.keys: Dict[Path, PassCrypt] = keys or {}
+        self.errors: Dict[str, str] = {}
+
+    def run(
+        self,
+        field:  str,
+        term:   str,
+        mode:   str = 'substr',
+        reveal: bool = False
+    ) -> Iterator[Row]:
+        """
+        Search every vault concurrently.
+
+        Args:
+            field (str): The field to search ['site', 'username'].
+            term (str): The text to search.
+            mode (str): One of MODES (Def: substr).
+            reveal (bool): Decrypt the passwords of the unlocked vaults.
+
+        Returns:
+            Iterator[Row]: Rows [id, site, username, password, vault] in the
+            order in which the vaults answer, each vault ranked as list does.
+
+        Raises:
+            ValueError: If the field or the mode are not valid.
+        """
+        if field not in DataManagement._SEARCH_FIELDS:
+            raise ValueError(f'the field {field} can not be searched')
+        if mode not in VaultSearch.MODES:
+            raise ValueError(f'the search mode {mode} is not valid')
+        for vault in set(self.keys) - set(self.vaults):
+            self.keys.pop(vault).wipe()
+        results: Queue = Queue()
+        for vault in self.vaults:
+            Thread(
+                target=self._search_vault,
+                args=(vault, field, term, mode, reveal, results),
+                daemon=True
+            ).start()
+        return self._merge(results)
+
+    def _merge(self, results: Queue) -> Iterator[Row]:
+        pending: int = len(self.vaults)
+        while pending:
+            rows: Optional[List[Row]] = results.get()
+            if rows is None:
+                pending -= 1
+                continue
+            yield from rows
+
+    def _search_vault(
+        self,
+        vault:      Path,
+        field:      str,
+        term:       str,
+        mode:       str,
+        reveal:     bool,
+        results:    Queue
+    ) -> None:
+        """
+        Worker of run(), puts the rows of one vault in results and then None
+        to tell that the vault is done.
+        """
+        try:
+            data_mgmt: DataManagement = DataManagement(
+                vault,
+                profile='oneliner',
+                shared=False
+            )
+            try:
+                crypt_raw_data: List[Tuple[Any]] = (
+                    data_mgmt.list_data(field, term) if mode == 'exact'
+                    else data_mgmt.search_data(field, term, mode)
+                ) or []
+            finally:
+                data_mgmt.save_and_exit(True)
+            passcrypt: Optional[PassCrypt] = self.keys.get(vault)
+            passwords: List[str] = (
+                passcrypt.decrypt_many([fields[3:6] for fields in crypt_raw_data])
+                if reveal and passcrypt is not None
+                else [VaultSearch.MASK] * len(crypt_raw_data)
+            )
+            if crypt_raw_data:
+                results.put([
+                    [*fields[:3], password, vault.stem]
+                    for fields, password in zip(crypt_raw_data, passwords)
+                ])
+        except (SQLiteError, ValueError) as e:
+            self.errors[vault.stem] = str(e)
+        finally:
+            passcrypt = self.keys.pop(vault, None)
+            if passcrypt is not None:
+                passcrypt.wipe()
+            results.put(None)
@@ -5,17 +5,24 @@ from typing import (
     Literal,
     Optional,
     Iterable,
+    Sequence,
+    Sized,
     Union,
     ClassVar,
     Any,
+    TextIO,
     Tuple,
     List,
     Dict
 )
 from time import sleep
+from os import environ
+from sys import stdout, stderr
+from json import dumps
+from atexit import register
 
 from rich.theme import Theme
-from rich.console import Console, Group, RenderableType
+from rich.console import Console, Group, RenderableType, COLOR_SYSTEMS
 from rich.text import Text, TextType
 from rich.style import Style, StyleType
 from rich.table import Table
@@ -24,6 +31,8 @@ from rich.live import Live
 from rich.panel import Panel
 from rich.padding import PaddingDimensions
 from rich.box import Box, ROUNDED, DOUBLE_EDGE
+from rich.cells import cell_len, set_cell_size
+from rich.color import ColorSystem
 
 class Visuals:
     """
@@ -33,6 +42,21 @@ class Visuals:
     Attributes:
         COLORS (ClassVar[Dict[str, str]])
         CONSOLE_THEME (ClassVar[Theme]): Set the default theme for the console.
+        RENDER_MODES (ClassVar[Tuple[str]]): How render_table_db displays the
+        rows: animated (row by row in a live table), instant (the whole table
+        at once) or stream (each row as soon as it is read, with fixed column
+        widths, the table is never kept in memory).
+        OUTPUT_FORMATS (ClassVar[Tuple[str]]): Machine readable formats of
+        the oneliner mode, they replace the tables and messages of rich.
+        RECORD_TYPES (ClassVar[Dict[str, str]]): Type of the record of each
+        type of message.
+        error_count (ClassVar[int]): Error messages printed so far, the batch
+        mode compares it to know if a command failed.
+        STREAM_WIDTHS (ClassVar[Dict[str, int]]): Maximum width of each
+        column in stream mode, the sites, usernames and passwords share the
+        width of the console up to it. Longer values are cut.
+        _console (ClassVar[Console]): The console shared by every instance,
+        created by the first one.
     """
     COLORS: ClassVar[Dict[str, str]] = {
         'green':            '#00b44e',
@@ -82,20 +106,60 @@ class Visuals:
         'i_dark_yellow':    'italic #858125'
     }
     CONSOLE_THEME: ClassVar[Theme] = Theme(COLORS)
+    RENDER_MODES: ClassVar[Tuple[str]] = ('animated', 'instant', 'stream')
+    STREAM_WIDTHS: ClassVar[Dict[str, int]] = {
+        'Ids': 6,
+        'Sites': 28,
+        'Usernames': 28,
+        'Passwords': 28,
+        'Vaults': 12,
+    }
+    OUTPUT_FORMATS: ClassVar[Tuple[str]] = ('json', 'jsonl', 'tsv', 'plain')
+    RECORD_TYPES: ClassVar[Dict[str, str]] = {
+        'inf': 'info',
+        'war': 'warning',
+        'err': 'error',
+        'inp': 'input',
+        'proc': 'result',
+        'list': 'list',
+    }
+    _SYMBOLS: ClassVar[Dict[str, str]] = {
+        'inf': '[*]',
+        'war': '[?]',
+        'err': '[!]',
+        'inp': '[^]',
+        'proc': '[+]',
+        'list': '[-]',
+    }
+    _TSV_ESCAPES: ClassVar[Dict[int, str]] = str.maketrans({
+        '\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'
+    })
     _banner: ClassVar[Any] = None
+    _console: ClassVar[Optional[Console]] = None
+    _output_format: ClassVar[Optional[str]] = None
+    _records: ClassVar[int] = 0
+    error_count: ClassVar[int] = 0
+    # None follows the terminal, set by CSP_RENDER_MODE or set_render_mode()
+    _render_mode: ClassVar[Optional[str]] = (
+        environ.get('CSP_RENDER_MODE')
+        if environ.get('CSP_RENDER_MODE') in RENDER_MODES else None
+    )
 
     def __init__(self) -> None:
         """
         Initialize the instance of Visuals class.
 
         Attributes:
-            console (Console): Instance of rich.Console for handling console output.
+            console (Console): Instance of rich.Console for handling console
+            output, the same one for every instance of Visuals.
         """
-        self.console: Console = Console(
-            color_system='truecolor', 
-            theme=Visuals.CONSOLE_THEME,
-            tab_size=6
-        )
+        if Visuals._console is None:
+            Visuals._console = Console(
+                color_system='truecolor', 
+                theme=Visuals.CONSOLE_THEME,
+                tab_size=6
+            )
+        self.console: Console = Visuals._console
     
     def banner(
         self,
@@ -139,6 +203,11 @@ class Visuals:
         start:      str = '',
         type:       Literal['inf', 'war', 'err', 'inp', 'proc', 'list'] = 'inf'
     ) -> None:
+        if type == 'err':
+            Visuals.error_count += 1
+        if Visuals._output_format is not None:
+            self._print_record(msg, type)
+            return None
         if bad_render: 
             self.special_print(
                 msg=msg,
@@ -263,79 +332,312 @@ class Visuals:
             subtitle_align=detect_align(subtitle_align)
         )
     
+    @property
+    def output_format(self) -> Optional[str]:
+        """
+        The output format set, None when the output is for humans.
+        """
+        return Visuals._output_format
+
+    def set_output_format(self, output_format: Optional[str]) -> None:
+        """
+        Print the results as records in a machine readable format instead of
+        rich, None goes back to rich. The rows and, in json and jsonl, the
+        messages are written to stdout as records, everything that is still
+        rendered by rich (help menus, progress bars) goes to stderr so that it
+        does not mix with them.
+
+        Args:
+            output_format (str, optional): One of OUTPUT_FORMATS. json writes
+            a single array that is closed when the program exits.
+
+        Raises:
+            ValueError: If the format is not one of OUTPUT_FORMATS.
+        """
+        if output_format is not None and output_format not in Visuals.OUTPUT_FORMATS:
+            raise ValueError(f'the output format {output_format} is not valid')
+        if Visuals._output_format == 'json':
+            Visuals._close_json()
+        Visuals._output_format = output_format
+        self.console.file = stdout if output_format is None else stderr
+        if output_format == 'json':
+            Visuals._records = 0
+            stdout.write('[')
+            register(Visuals._close_json)
+
+    @staticmethod
+    def _close_json() -> None:
+        if Visuals._output_format != 'json':
+            return None
+        stdout.write('\n]\n' if Visuals._records else ']\n')
+        stdout.flush()
+        Visuals._output_format = None
+
+    def _write_record(self, record: Dict[str, Any]) -> None:
+        if Visuals._output_format == 'json':
+            stdout.write(f'{',' if Visuals._records else ''}\n{dumps(record)}')
+        else:
+            stdout.write(f'{dumps(record)}\n')
+        Visuals._records += 1
+
+    def _print_record(self, msg: Union[str, List[str]], type: str) -> None:
+        """
+        print() in a machine readable format: a record with the type of the
+        message in json and jsonl, a line in tsv and plain. The results (type
+        proc) are the output of the command and go to stdout, as the bare
+        value in plain; the other messages go to stderr. The questions to the
+        user always go to stderr.
+        """
+        if Visuals._output_format in ('json', 'jsonl') and type != 'inp':
+            self._write_record({'type': Visuals.RECORD_TYPES[type], 'message': msg})
+            return None
+        stream: TextIO = stdout if type == 'proc' else stderr
+        lines: List[str] = msg if isinstance(msg, list) else [msg]
+        for line in lines:
+            if Visuals._output_format == 'tsv':
+                stream.write(
+                    f'{Visuals.RECORD_TYPES[type]}\t'
+                    f'{line.translate(Visuals._TSV_ESCAPES)}\n'
+                )
+            elif type == 'proc':
+                stream.write(f'{line}\n')
+            else:
+                stream.write(f'{Visuals._SYMBOLS[type]} {line}.\n')
+
+    def _print_rows(
+        self,
+        proc_data:  Iterable[Sequence[Union[str, int, None]]],
+        vaults:     bool = False
+    ) -> Optional[Sequence[Union[str, int, None]]]:
+        """
+        render_table_db() in a machine readable format. The rows are written
+        to stdout as proc_data yields them: records of type entry in json and
+        jsonl, a header and a line per row in tsv (tabs and new lines escaped,
+        empty fields for None) and only the rows in plain ('-' for None).
+        """
+        fields: Tuple[str] = ('id', 'site', 'username', 'password') + (
+            ('vault',) if vaults else ()
+        )
+        output_format: str = Visuals._output_format
+        if output_format == 'tsv':
+            stdout.write('\t'.join(fields) + '\n')
+        row_data: Optional[Sequence[Union[str, int, None]]] = None
+        for row_data in proc_data:
+            if output_format in ('json', 'jsonl'):
+                self._write_record({'type': 'entry', **dict(zip(fields, row_data))})
+            elif output_format == 'tsv':
+                stdout.write('\t'.join(
+                    '' if data is None else str(data).translate(Visuals._TSV_ESCAPES)
+                    for data in row_data
+                ) + '\n')
+            else:
+                stdout.write('\t'.join(
+                    '-' if data is None else str(data) for data in row_data
+                ) + '\n')
+        stdout.flush()
+        return row_data
+
+    @property
+    def render_mode(self) -> str:
+        """
+        The render mode of the tables, if it is not set: animated when the
+        output is a terminal and instant when it is a pipe or a file.
+        """
+        if Visuals._render_mode is not None:
+            return Visuals._render_mode
+        return 'animated' if self.console.is_terminal else 'instant'
+
+    @staticmethod
+    def set_render_mode(mode: Optional[str]) -> None:
+        """
+        Set the render mode of the tables for every instance, None (or auto)
+        follows the terminal again.
+
+        Raises:
+            ValueError: If the mode is not one of RENDER_MODES.
+        """
+        if mode in (None, 'auto'):
+            Visuals._render_mode = None
+            return None
+        if mode not in Visuals.RENDER_MODES:
+            raise ValueError(f'the render mode {mode} is not valid')
+        Visuals._render_mode = mode
+
+    def _table_columns(
+        self,
+        theme:  Literal['cold', 'warm'] = 'cold',
+        vaults: bool = False
+    ) -> List[Tuple[str, str, str]]:
+        """
+        The columns of the tables of entries.
+
+        Returns:
+            List[Tuple[str, str, str]]: The name, header style and style of
+            each column.
+        """
+        if not theme == 'cold':
+            columns: List[Tuple[str, str, str]] = [
+                ('Ids', 'b_dark_pink', 'pink'),
+                ('Sites', 'b_dark_orange', 'orange'),
+                ('Usernames', 'b_dark_yellow', 'yellow'),
+                ('Passwords', 'b_dark_red', 'red'),
+            ]
+        else:
+            columns = [
+                ('Ids', 'b_dark_pink', 'pink'),
+                ('Sites', 'b_dark_purple', 'purple'),
+                ('Usernames', 'b_dark_blue', 'blue'),
+                ('Passwords', 'b_dark_green', 'green'),
+            ]
+        if vaults:
+            columns.append(('Vaults', 'b_dark_orange', 'orange'))
+        return columns
+
     def render_table_db(
         self,
-        proc_data:  List[Tuple[Union[str, int, None]]],
-        theme:      Literal['cold', 'warm'] = 'cold'
-    ) -> None:
+        proc_data:  Iterable[Sequence[Union[str, int, None]]],
+        theme:      Literal['cold', 'warm'] = 'cold',
+        vaults:     bool = False,
+        mode:       Optional[str] = None
+    ) -> Optional[Sequence[Union[str, int, None]]]:
+        """
+        Render the rows in a table, proc_data can be a list or a generator
+        that reads them from the database. With vaults the rows have a fifth
+        field, the vault they come from. With an output format set the rows
+        are written as records instead (see set_output_format).
+
+        Args:
+            mode (str, optional): One of RENDER_MODES (Def: render_mode). In
+            animated mode short lists are displayed row by row.
+
+        Returns:
+            Sequence: The last row rendered, None if there was no rows.
+        """
+        if Visuals._output_format is not None:
+            return self._print_rows(proc_data, vaults)
+        columns: List[Tuple[str, str, str]] = self._table_columns(theme, vaults)
+        mode = mode or self.render_mode
+        if mode == 'stream':
+            return self._stream_table_db(proc_data, columns)
+
+        row_data: Optional[Sequence[Union[str, int, None]]] = None
         table: Table = Table(
             padding=(0, 1),
             box=DOUBLE_EDGE,
             border_style=f'{Visuals.COLORS['grey']}'
         )
+        for name, header_style, style in columns:
+            table.add_column(
+                name,
+                justify='left',
+                header_style=header_style,
+                style=style
+            )
+        if mode == 'instant':
+            for row_data in proc_data:
+                table.add_row(*self._parser_row_data(row_data))
+            self.console.print(table)
+            return row_data
 
         with Live(table, console=self.console, refresh_per_second=10):
-            if not theme == 'cold':
-                table.add_column(
-                    'Ids', 
-                    justify='left', 
-                    header_style='b_dark_pink'
-                )
-                table.add_column(
-                    'Sites',
-                    justify='left',
-                    header_style='b_dark_orange'
-                )
-                table.add_column(
-                    'Usernames',
-                    justify='left',
-                    header_style='b_dark_yellow'
-                )
-                table.add_column(
-                    'Passwords',
-                    justify='left',
-                    header_style='b_dark_red'
-                )
-                table.columns[0].style = f'pink'
-                table.columns[1].style = f'orange'
-                table.columns[2].style = f'yellow'
-                table.columns[3].style = f'red'
-            else:
-                table.add_column(
-                    'Ids', 
-                    justify='left', 
-                    header_style='b_dark_pink'
-                )
-                table.add_column(
-                    'Sites',
-                    justify='left',
-                    header_style='b_dark_purple'
-                )
-                table.add_column(
-                    'Usernames',
-                    justify='left',
-                    header_style='b_dark_blue'
-                )
-                table.add_column(
-                    'Passwords',
-                    justify='left',
-                    header_style='b_dark_green'
-                )
-                table.columns[0].style = f'pink'
-                table.columns[1].style = f'purple'
-                table.columns[2].style = f'blue'
-                table.columns[3].style = f'green'
             sleep(0.15)
 
             # proc and represent row data
-            if len(proc_data) > 49:
+            if not isinstance(proc_data, Sized) or len(proc_data) > 49:
                 for row_data in proc_data:
                     table.add_row(*self._parser_row_data(row_data))
-                return
+                return row_data
             for row_data in proc_data:
                 table.add_row(*self._parser_row_data(row_data))
                 sleep(0.15); continue
-                
+        return row_data
+
+    def _stream_table_db(
+        self,
+        proc_data:  Iterable[Sequence[Union[str, int, None]]],
+        columns:    List[Tuple[str, str, str]]
+    ) -> Optional[Sequence[Union[str, int, None]]]:
+        """
+        Stream mode of render_table_db: the header is printed at once and then
+        every row as soon as proc_data yields it, so the widths of the columns
+        are fixed beforehand (STREAM_WIDTHS) instead of measured on the rows.
+        The lines are styled once per cell and written straight to the file
+        of the console, printing each one as a rich renderable costs about a
+        millisecond.
+        """
+        box: Box = DOUBLE_EDGE
+        shared: Tuple[str] = ('Sites', 'Usernames', 'Passwords')
+        # every cell takes its width, a space of padding on each side and a border
+        free: int = self.console.width - 1 - sum(
+            Visuals.STREAM_WIDTHS[name] + 3
+            for name, *_ in columns if name not in shared
+        )
+        widths: List[int] = [
+            Visuals.STREAM_WIDTHS[name] if name not in shared
+            else max(8, min(Visuals.STREAM_WIDTHS[name], free // len(shared) - 3))
+            for name, *_ in columns
+        ]
+        cells: List[int] = [width + 2 for width in widths]
+        color_system: Optional[ColorSystem] = COLOR_SYSTEMS.get(
+            self.console.color_system
+        )
+        border: Style = self.console.get_style('grey')
+        styles: List[Style] = [self.console.get_style(style) for *_, style in columns]
+
+        def fit(value: str, width: int) -> str:
+            if cell_len(value) > width:
+                return f'{set_cell_size(value, width - 1)}…'
+            return set_cell_size(value, width)
+
+        def write_line(
+            texts:  Iterable[Tuple[str, Style]],
+            left:   str,
+            middle: str,
+            right:  str
+        ) -> None:
+            separator: str = border.render(f' {middle} ', color_system=color_system)
+            self.console.file.write(
+                border.render(f'{left} ', color_system=color_system)
+                + separator.join(
+                    style.render(fit(text, width), color_system=color_system)
+                    for (text, style), width in zip(texts, widths)
+                )
+                + border.render(f' {right}', color_system=color_system)
+                + '\n'
+            )
+
+        self.console.file.write(
+            border.render(box.get_top(cells), color_system=color_system) + '\n'
+        )
+        write_line(
+            [
+                (name, self.console.get_style(header_style))
+                for name, header_style, _ in columns
+            ],
+            box.head_left,
+            box.head_vertical,
+            box.head_right
+        )
+        self.console.file.write(
+            border.render(box.get_row(cells, 'head'), color_system=color_system) + '\n'
+        )
+        row_data: Optional[Sequence[Union[str, int, None]]] = None
+        for row_data in proc_data:
+            write_line(
+                [
+                    ('-', border) if data is None else (str(data), style)
+                    for data, style in zip(row_data, styles)
+                ],
+                box.mid_left,
+                box.mid_vertical,
+                box.mid_right
+            )
+            self.console.file.flush()
+        self.console.file.write(
+            border.render(box.get_bottom(cells), color_system=color_system) + '\n'
+        )
+        self.console.file.flush()
+        return row_data
 
     def _parser_row_data(self, row_data: List[Union[str, int, None]]) -> List[str]:
         str_row_data: List[str] = []
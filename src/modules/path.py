@@ -1,16 +1,20 @@
 from typing import (
+    TYPE_CHECKING,
     ClassVar,
+    Optional,
     Dict,
     List
 )
 from pathlib import Path
-
-from prompt_toolkit import PromptSession
-from InquirerPy.prompts.list import ListPrompt
+from sys import stdin
 
 from modules.Visuals import Visuals
 from modules.DataManagement import DataManagement
-from modules.prompt import Prompt
+from modules.VaultRegistry import VaultRegistry
+
+if TYPE_CHECKING:
+    from prompt_toolkit import PromptSession
+    from InquirerPy.prompts.list import ListPrompt
 
 vs: Visuals = Visuals()
 
@@ -20,6 +24,7 @@ class PathCSP:
     correspondiente a las rutas y ficheros del sistema.
     """
     ROOT_DIR: ClassVar[Path] = Path.home() / '.csp'
+    BACKUP_DIR: ClassVar[Path] = ROOT_DIR / 'backups'
 
     def __init__(self):
         """
@@ -29,17 +34,20 @@ class PathCSP:
         """
         if not PathCSP.ROOT_DIR.exists():
             PathCSP.ROOT_DIR.mkdir()
-            
+
+        # the vaults are read from the manifest, the folder is not walked
+        self.registry: VaultRegistry = VaultRegistry(PathCSP.ROOT_DIR)
         self.db_files: List[Path] = self._upd_list_files()
         if not self.db_files:
             self.create_db_file()
     
     def _upd_list_files(self) -> List[Path]:
-        return sorted(PathCSP.ROOT_DIR.glob('**/*.db'))
+        return self.registry.paths()
 
     def create_db_file(self, arg: str = '') -> None:
         """
         """
+        from modules.prompt import Prompt
         tmp_session: PromptSession = Prompt.create_tmp_prompt(
             msg=[('class:msg', '[^] Specify a name the database file: ')],
         )
@@ -61,18 +69,54 @@ class PathCSP:
                 continue
             db_file.touch()
             DataManagement.create_database(db_file)
+            self.registry.register(db_file)
             break
         self.db_files = self._upd_list_files()
 
-    def select_databases(self) -> Path:
+    def select_databases(
+        self,
+        vault:          Optional[str] = None,
+        interactive:    bool = True
+    ) -> Path:
+        """
+        Choose the database to open: the one given by name or path, the only
+        one, or the one selected in a list. When interactive is False the list
+        is only shown if there is a terminal and no default vault, otherwise
+        the default vault is used.
+
+        Args:
+            vault (str, optional): Name or path of the vault (--vault).
+            interactive (bool): The user asked to select it (seldb).
+
+        Returns:
+            Path: The database file.
+
+        Raises:
+            ValueError: If the vault given is not registered, or several exist
+            and none can be chosen without asking.
+        """
+        if vault is not None:
+            return self.registry.resolve(vault)
         if len(self.db_files) == 1:
             return self.db_files[0]
+        default: Optional[Path] = self.registry.default
+        if not interactive and default is not None:
+            return default
+        if not interactive and not stdin.isatty():
+            raise ValueError(
+                'there are several vaults, use --vault or set a default vault'
+            )
+        names: Dict[str, Path] = {
+            name: Path(vault['path'])
+            for name, vault in self.registry.vaults().items()
+            if Path(vault['path']).is_file()
+        }
+        from modules.prompt import Prompt
         list_prompt: ListPrompt = Prompt.create_list_prompt(
             message='Select database file:',
-            choices=[file.name for file in self.db_files]
+            choices=list(names)
         )
-        path_db: Path = PathCSP.ROOT_DIR / list_prompt.execute()
-        return path_db
+        return names[list_prompt.execute()]
     
     def drop_database(self) -> None:
         path_db: Path = self.select_databases()
@@ -1,4 +1,5 @@
 from typing import (
+    TYPE_CHECKING,
     ClassVar,
     Optional,
     Iterable,
@@ -16,8 +17,11 @@ from prompt_toolkit.cursor_shapes import CursorShape
 from prompt_toolkit.key_binding import KeyBindings
 from prompt_toolkit.keys import Keys
 from prompt_toolkit.history import InMemoryHistory
-from InquirerPy.prompts.list import ListPrompt
-from InquirerPy.utils import get_style
+from prompt_toolkit.output import create_output
+
+# InquirerPy is only needed to select a database
+if TYPE_CHECKING:
+    from InquirerPy.prompts.list import ListPrompt
 
 from modules.Visuals import Visuals
 
@@ -59,12 +63,15 @@ class Prompt:
         password:   Optional[bool] = False,
         style:      Optional[Style] = _DEF_STYLE
     ) -> PromptSession:
+        # with the output redirected (oneliner --format) the questions are
+        # drawn in stderr so they do not end up in the results
         return PromptSession(
             message=msg,
             style=style,
             is_password=password,
             key_bindings=cls._set_tmp_kb(),
-            history=InMemoryHistory()
+            history=InMemoryHistory(),
+            output=create_output(always_prefer_tty=True)
         )
 
     @classmethod
@@ -82,7 +89,10 @@ class Prompt:
         keybindings:    Optional[Dict[str, List[Dict[str, str]]]] = {
                             'skip': [{'key': 'c-c'}]
                         },
-    ) -> ListPrompt:
+    ) -> 'ListPrompt':
+        from InquirerPy.prompts.list import ListPrompt
+        from InquirerPy.utils import get_style
+
         return ListPrompt(
             message=message,
             choices=choices,
@@ -159,7 +169,19 @@ class Prompt:
                 'site': None,
                 'username': None,
                 'password': None,
+                '--limit': None,
+                '--after': None,
+                '--order': {'id': None, 'site': None, 'username': None},
+                '--desc': None,
+                '--reveal': None,
+            },
+            'show': None,
+            'copy': None,
+            'find': {
+                field: None for field in ('site', 'username')
             },
+            'audit': {'--all': None},
+            'breachcheck': {'--build': None},
             'add': {
                 'site': None,
                 'username': None,
@@ -172,17 +194,45 @@ class Prompt:
                 'password': None,
             },
             'chmk': None,
-            'crftp': None,
+            'rekey-data': None,
+            'calibrate': {
+                algorithm: {'--apply': None}
+                for algorithm in ('pbkdf2-sha256', 'pbkdf2-sha512', 'scrypt')
+            },
+            'crftp': {'--from-file': None, '--rules': None, '--variants': None},
+            'import': None,
+            'backup': None,
+            'restore': None,
             'seldb': None,
+            'vaults': {'default': None, 'rescan': None},
+            'render': {
+                mode: None for mode in ('animated', 'instant', 'stream', 'auto')
+            },
+            'lock': {'all': None},
+            'unlock': None,
             'newdb': None,
             'exit': None,
             'help': {
                 'list': None,
+                'show': None,
+                'copy': None,
+                'find': None,
+                'audit': None,
+                'breachcheck': None,
+                'vaults': None,
+                'render': None,
                 'add': None,
                 'del': None,
                 'upd': None,
                 'crftp': None,
                 'chmk': None,
+                'rekey-data': None,
+                'calibrate': None,
+                'import': None,
+                'backup': None,
+                'restore': None,
+                'lock': None,
+                'unlock': None,
             }
         })
     
@@ -2,9 +2,6 @@
 from typing import Union
 from argparse import ArgumentParser, Namespace, _SubParsersAction
 
-# own libraries
-from modules.Visuals import Visuals
-
 def start_args() -> Union[Namespace]:
     """
     Parse command-line arguments and return the parsed arguments.
@@ -41,7 +38,86 @@ def start_args() -> Union[Namespace]:
     )
     oneliner_parser.set_defaults(oneliner=False)
 
+    # agent subparser
+    agent_parser: _SubParsersAction = mode_subparser.add_parser(
+        'agent',
+        add_help=False
+    )
+    agent_parser.add_argument(
+        '-t', '--ttl',
+        action='store',
+        type=float,
+        metavar='',
+        default=None,
+    )
+    agent_parser.add_argument(
+        '-k', '--kill',
+        action='store_true',
+        default=False,
+    )
+
+    # batch subparser
+    batch_parser: _SubParsersAction = mode_subparser.add_parser(
+        'batch',
+        add_help=False
+    )
+    batch_parser.add_argument(
+        'file',
+        action='store',
+        type=str,
+    )
+    batch_parser.add_argument(
+        '-V', '--vault',
+        action='store',
+        type=str,
+        metavar='',
+        default=None,
+    )
+    batch_parser.add_argument(
+        '-R', '--render',
+        action='store',
+        type=str,
+        metavar='',
+        default=None,
+    )
+    batch_parser.add_argument(
+        '-F', '--format',
+        action='store',
+        type=str,
+        metavar='',
+        default=None,
+        dest='output_format',
+    )
+    batch_parser.add_argument(
+        '-c', '--continue',
+        action='store_true',
+        default=False,
+        dest='keep_going',
+    )
+
     # general args
+    oneliner_parser.add_argument(
+        '-V', '--vault',
+        action='store',
+        type=str,
+        metavar='',
+        default=None,
+    )
+    oneliner_parser.add_argument(
+        '-R', '--render',
+        action='store',
+        type=str,
+        metavar='',
+        default=None,
+    )
+    oneliner_parser.add_argument(
+        '-F', '--format',
+        action='store',
+        type=str,
+        metavar='',
+        default=None,
+        dest='output_format',
+    )
     oneliner_parser.add_argument(
         '-h', '--help',
         action='store_true',
@@ -52,13 +128,56 @@ def start_args() -> Union[Namespace]:
         action='store_true',
         default=False,
     )
+    oneliner_parser.add_argument(
+        '-rk', '--rekey-data',
+        action='store_true',
+        default=False,
+    )
+    oneliner_parser.add_argument(
+        '-cb', '--calibrate',
+        action='store',
+        nargs='*',
+        type=str,
+        metavar='',
+        default=None,
+    )
+    oneliner_parser.add_argument(
+        '--apply',
+        action='store_true',
+        default=False,
+        dest='calibrate_apply',
+    )
     oneliner_parser.add_argument(
         '-cr', '--craft-password',
         action='store',
-        nargs='+',
+        nargs='*',
+        type=str,
+        metavar='',
+        default=None,
+    )
+    oneliner_parser.add_argument(
+        '--from-file',
+        action='store',
+        type=str,
+        metavar='',
+        default=None,
+        dest='craft_from_file',
+    )
+    oneliner_parser.add_argument(
+        '--rules',
+        action='store',
         type=str,
         metavar='',
         default=None,
+        dest='craft_rules',
+    )
+    oneliner_parser.add_argument(
+        '--variants',
+        action='store',
+        type=str,
+        metavar='',
+        default=None,
+        dest='craft_variants',
     )
     oneliner_parser.add_argument(
         '-x', '--execute',
@@ -94,10 +213,116 @@ def start_args() -> Union[Namespace]:
     oneliner_parser.add_argument(
         '-l', '--list',
         action='store',
+        nargs='*',
+        type=str,
+        metavar='',
+        default=None,
+    )
+    oneliner_parser.add_argument(
+        '--limit',
+        action='store',
+        type=str,
+        metavar='',
+        default=None,
+        dest='list_limit',
+    )
+    oneliner_parser.add_argument(
+        '--after',
+        action='store',
+        type=str,
+        metavar='',
+        default=None,
+        dest='list_after',
+    )
+    oneliner_parser.add_argument(
+        '--order',
+        action='store',
+        type=str,
+        metavar='',
+        default=None,
+        dest='list_order',
+    )
+    oneliner_parser.add_argument(
+        '--desc',
+        action='store_true',
+        default=False,
+        dest='list_desc',
+    )
+    oneliner_parser.add_argument(
+        '--reveal',
+        action='store_true',
+        default=False,
+        dest='list_reveal',
+    )
+    oneliner_parser.add_argument(
+        '-f', '--find',
+        action='store',
+        nargs='+',
+        type=str,
+        metavar='',
+        default=None,
+    )
+    oneliner_parser.add_argument(
+        '-au', '--audit',
+        action='store_true',
+        default=False,
+    )
+    oneliner_parser.add_argument(
+        '-bc', '--breach-check',
+        action='store',
+        nargs='*',
+        type=str,
+        metavar='',
+        default=None,
+    )
+    oneliner_parser.add_argument(
+        '--build',
+        action='store',
+        type=str,
+        metavar='',
+        default=None,
+        dest='breach_build',
+    )
+    oneliner_parser.add_argument(
+        '-sh', '--show',
+        action='store',
+        nargs=1,
+        type=str,
+        metavar='',
+        default=None,
+    )
+    oneliner_parser.add_argument(
+        '-co', '--copy',
+        action='store',
+        nargs=1,
+        type=str,
+        metavar='',
+        default=None,
+    )
+    oneliner_parser.add_argument(
+        '-im', '--import',
+        action='store',
         nargs='+',
         type=str,
         metavar='',
         default=None,
+        dest='import_file',
+    )
+    oneliner_parser.add_argument(
+        '-bk', '--backup',
+        action='store',
+        nargs='*',
+        type=str,
+        metavar='',
+        default=None,
+    )
+    oneliner_parser.add_argument(
+        '-rs', '--restore',
+        action='store',
+        nargs=2,
+        type=str,
+        metavar='',
+        default=None,
     )
     args = parser.parse_args()
     return args
@@ -20,11 +20,25 @@ MAIN_HELP: Dict[str, Union[Dict[str, str], List[str], str]] = {
     ],
     'commands': {
         'list': 'list all or specific data',
+        'show': 'display the password of an entry',
+        'copy': 'copy the password of an entry to the clipboard',
+        'find': 'search site or username in every database',
+        'audit': 'report the weak passwords of the database',
+        'breachcheck': 'check passwords against a local breach index',
+        'vaults': 'show the databases and set the default one',
+        'render': 'show or set how the tables are displayed',
         'add': 'add a new entry',
         'upd': 'modifies field\'s value in a record',
         'del': 'deletes values from the record',
         'crftp': 'crafts a password based on a phrase',
         'chmk': 'change the masterkey',
+        'rekey-data': 'replace the data key and encrypt every entry again',
+        'calibrate': 'tune the key derivation to the unlock time wanted',
+        'import': 'import entries from a csv/json export',
+        'backup': 'create an encrypted backup of the database',
+        'restore': 'restore a backup as a new database',
+        'lock': 'wipe the key of the database from memory',
+        'unlock': 'enter again the masterkey of a locked database',
         'exit': 'exits the tool [Control + D]',
         'help': 'print the help menu'
     },
@@ -40,18 +54,36 @@ LIST_HELP: Dict[str, Union[Dict[str, str], List[str], str]] = {
     'description': [
         'The list command allows you to display data from the password',
         'database. You can either list the entire database or perform'
-        'a specific query to find particular data.'
+        'a specific query to find particular data. Sites and usernames can',
+        'also be searched by prefix, substring or fuzzy match. Large',
+        'databases can be listed by pages. Passwords are masked and not',
+        'decrypted unless --reveal is given, use show or copy to get the',
+        'password of a single entry.'
+    ],
+    'usage': [
+        'list [{field, data} [mode]]',
+        '[--limit n] [--after id] [--order field] [--desc] [--reveal]'
     ],
-    'usage': ['list [{field, data}]'],
     'arguments': {
         'field': 'The field you want to search',
         'data': 'The specific data you want to find',
+        'mode': 'exact, prefix, substr or fuzzy (Def: exact)',
+        '--limit': 'Maximum number of entries to display',
+        '--after': 'Continue the listing after the entry with this id',
+        '--order': 'Sort by id, site or username (Def: id)',
+        '--desc': 'Sort in descending order',
+        '--reveal': 'Decrypt and display the passwords',
     },
     'examples': {
         'List the entire database:': ' CSP> list\n',
+        'List the first 20 entries sorted by site:': ' CSP> list --limit 20 --order site\n',
+        'List the next 20 entries:': ' CSP> list --after 35 --limit 20 --order site\n',
+        'List the entire database with passwords:': ' CSP> list --reveal\n',
         'Find passwords for a specific id': ' CPS> list id 8\n',
         'Find passwords for a specific site': ' CPS> list site github\n',
         'Find passwords for a specific username': ' CPS> list username zaytos\n',
+        'Find sites starting with a prefix': ' CPS> list site git prefix\n',
+        'Find sites similar to a misspelled name': ' CPS> list site gitbuh fuzzy\n',
         'Find passwords fro a specific password': ' CPS> list password P4$$w0rd',
     }
 }
@@ -109,16 +141,27 @@ CRFTP_HELP: Dict[str, Union[Dict[str, str], List[str], str]] = {
     'title': 'crftp',
     'description': [
         'The crftp (CraftPassword) command converts a phrase into a stronger',
-        'password by generating a password using CSP algorithm.'
+        'password by generating a password using CSP algorithm.',
+        'Other rule sets (substitutions, capitalization and the text that',
+        'joins the words) can be defined in ~/.csp/rules.json, by default or',
+        'for each vault.'
+    ],
+    'usage': [
+        'crftp {phrase} [separator] [--rules name] [--variants k]',
+        'crftp --from-file {file|-} [separator] [--rules name]'
     ],
-    'usage': ['crftp {phrase} [separator]'],
     'arguments': {
         'phrase': 'The phrase to be converted into a password',
-        'separator': 'Use to identifying words (Def: space)'
+        'separator': 'Use to identifying words (Def: space)',
+        '--from-file': 'Craft each line of the file ("-" stdin), in order',
+        '--rules': 'The rule set of rules.json to use (Def: classic)',
+        '--variants': 'Show the k strongest variants instead of one password'
     },
     'examples': {
         'CraftPassword with default separator:': ' CSP> crftp i like python and rust\n',
-        'CraftPassword with custom separator:': ' CPS> crftp i_dont_like_java _'
+        'CraftPassword with custom separator:': ' CPS> crftp i_dont_like_java _\n',
+        'CraftPassword of a file of phrases:': ' CSP> crftp --from-file phrases.txt\n',
+        'The 5 strongest variants of a phrase:': ' CSP> crftp i like python --variants 5'
     }
 }
 CHMK_HELP: Dict[str, Union[Dict[str, str], List[str], str]] = {
@@ -126,14 +169,249 @@ CHMK_HELP: Dict[str, Union[Dict[str, str], List[str], str]] = {
     'description': [
         'The chmk (ChangeMasterkey) command allows you to update your master',
         'key securely. First, you authenticate using your current master key.',
-        'Then, you enter your new master key. The command decrypts your',
-        'existing passwords using the old master key and encrypts them again',
-        'using the new one. This ensures that all your passwords are protected',
-        'with the updated master key.'
+        'Then, you enter your new master key. Your passwords are encrypted',
+        'with a random data key, which is stored encrypted with a key derived',
+        'from the master key: the command only encrypts that data key again',
+        'with the new master key, so it is instant whatever the size of the',
+        'database. Use rekey-data to replace the data key itself.'
     ],
     'usage': ['chmk'],
 }
 
+REKEY_HELP: Dict[str, Union[Dict[str, str], List[str], str]] = {
+    'title': 'rekey-data',
+    'description': [
+        'The rekey-data command replaces the random data key of the database',
+        'with a new one and encrypts every password again with it, in a single',
+        'transaction. Changing the masterkey does not change the data key, use',
+        'it if the data key could have been exposed.'
+    ],
+    'usage': ['rekey-data'],
+    'arguments': {
+        'masterkey': 'It is asked to wrap the new data key'
+    },
+    'examples': {
+        'Rotate the data key:': ' CSP> rekey-data'
+    }
+}
+
+IMPORT_HELP: Dict[str, Union[Dict[str, str], List[str], str]] = {
+    'title': 'import',
+    'description': [
+        'The import command loads the credentials exported by a browser or a',
+        'password manager (CSV, JSON or JSON Lines). The file is streamed in',
+        'batches and entries whose site and username already exist are skipped.'
+    ],
+    'usage': ['import {file} [type]'],
+    'arguments': {
+        'file': 'The path of the exported file',
+        'type': 'csv, json or jsonl (Def: file extension)'
+    },
+    'examples': {
+        'Import a browser CSV export:': ' CSP> import ~/passwords.csv\n',
+        'Import a Bitwarden JSON export:': ' CSP> import ~/bitwarden.json json'
+    }
+}
+
+BACKUP_HELP: Dict[str, Union[Dict[str, str], List[str], str]] = {
+    'title': 'backup',
+    'description': [
+        'The backup command creates a compressed archive of the current',
+        'database, encrypted in chunks with a key derived from the masterkey.',
+        'It runs in background, so you can keep using the prompt.'
+    ],
+    'usage': ['backup [archive]'],
+    'arguments': {
+        'archive': 'Path of the archive (Def: ~/.csp/backups/{db}-{date}.cspbak)'
+    },
+    'examples': {
+        'Backup in the default directory:': ' CSP> backup\n',
+        'Backup in a specific path:': ' CSP> backup /mnt/usb/vault.cspbak'
+    }
+}
+RESTORE_HELP: Dict[str, Union[Dict[str, str], List[str], str]] = {
+    'title': 'restore',
+    'description': [
+        'The restore command verifies and decrypts an archive created with',
+        'backup and stores it as a new database file in ~/.csp. The masterkey',
+        'asked is the one the database had when the backup was made.'
+    ],
+    'usage': ['restore {archive} {name}'],
+    'arguments': {
+        'archive': 'Path of the archive to restore',
+        'name\t': 'Name of the new database file'
+    },
+    'examples': {
+        'Restore a backup:': ' CSP> restore ~/.csp/backups/work-20240301.cspbak work_old'
+    }
+}
+LOCK_HELP: Dict[str, Union[Dict[str, str], List[str], str]] = {
+    'title': 'lock',
+    'description': [
+        'The key of each database is kept in memory while the session is',
+        'active, so seldb does not ask again the masterkey. The lock command',
+        'wipes it, and it is also wiped after some minutes without use',
+        '(CSP_IDLE_TIMEOUT environment variable in seconds, 0 never). The',
+        'unlock command asks again the masterkey of the current database.'
+    ],
+    'usage': ['lock [all] | unlock'],
+    'arguments': {
+        'all\t': 'Lock every database unlocked in the session'
+    },
+    'examples': {
+        'Lock the current database:': ' CSP> lock\n',
+        'Lock all the databases:': ' CSP> lock all\n',
+        'Unlock the current database:': ' CSP> unlock'
+    }
+}
+
+SHOW_HELP: Dict[str, Union[Dict[str, str], List[str], str]] = {
+    'title': 'show',
+    'description': [
+        'The show command decrypts and displays the password of a single',
+        'entry, the copy command copies it to the clipboard instead. Use',
+        'list to find the id of the entry.'
+    ],
+    'usage': ['show {id} | copy {id}'],
+    'arguments': {
+        'id\t': 'The id of the entry'
+    },
+    'examples': {
+        'Display the password of the entry 8:': ' CSP> show 8\n',
+        'Copy the password of the entry 8:': ' CSP> copy 8'
+    }
+}
+
+CALIBRATE_HELP: Dict[str, Union[Dict[str, str], List[str], str]] = {
+    'title': 'calibrate',
+    'description': [
+        'The key of each database is derived from its masterkey with its own',
+        'salt and algorithm (pbkdf2-sha256, pbkdf2-sha512 or scrypt). The',
+        'calibrate command measures them in this machine and shows the cost',
+        'that makes an unlock take the target time. With --apply the current',
+        'data key of the current database is wrapped with a key derived with',
+        'the parameters found.'
+    ],
+    'usage': ['calibrate [ms] [algorithm] [--apply]'],
+    'arguments': {
+        'ms\t': 'Unlock time wanted (Def: 250, CSP_KDF_TARGET_MS)',
+        'algorithm': 'Algorithm to calibrate (Def: all, applies pbkdf2-sha256)',
+        '--apply': 'Use the parameters found in the current database'
+    },
+    'examples': {
+        'Measure every algorithm:': ' CSP> calibrate\n',
+        'Unlock in 500 ms with scrypt:': ' CSP> calibrate 500 scrypt --apply'
+    }
+}
+
+FIND_HELP: Dict[str, Union[Dict[str, str], List[str], str]] = {
+    'title': 'find',
+    'description': [
+        'The find command searches a site or a username in every database of',
+        'the csp folder at once, each one in its own thread, and shows the',
+        'results tagged with their database as soon as each one answers. No',
+        'database has to be selected. The passwords are masked, --reveal',
+        'shows those of the databases unlocked in the session.'
+    ],
+    'usage': ['find {field} {data} [mode] [--limit n] [--reveal]'],
+    'arguments': {
+        'field': 'site or username',
+        'data': 'The text to find',
+        'mode': 'exact, prefix, substr or fuzzy (Def: substr)',
+        '--limit': 'Maximum number of entries to display',
+        '--reveal': 'Decrypt the passwords of the unlocked databases',
+    },
+    'examples': {
+        'Find a site in every database:': ' CSP> find site github\n',
+        'Find a misspelled username:': ' CSP> find username zaytso fuzzy'
+    }
+}
+
+AUDIT_HELP: Dict[str, Union[Dict[str, str], List[str], str]] = {
+    'title': 'audit',
+    'description': [
+        'The audit command estimates how many guesses an attacker needs to',
+        'find each password of the database, as crftp and the masterkey do:',
+        'common passwords, words and names (also with capitals, leet or',
+        'backwards), keyboard patterns, sequences, repeats, years and the',
+        'site or the username of the entry are guessed first. The passwords',
+        'with a score lower than 3 of 4 are reported with the reason, and',
+        'the breached ones if there is a breach index (see breachcheck).'
+    ],
+    'usage': ['audit [--all]'],
+    'arguments': {
+        '--all\t': 'Report the score of every entry, not only the weak ones',
+    },
+    'examples': {
+        'Find the weak passwords:': ' CSP> audit\n',
+        'Score every entry:': ' CSP> audit --all'
+    }
+}
+
+BREACH_HELP: Dict[str, Union[Dict[str, str], List[str], str]] = {
+    'title': 'breachcheck',
+    'description': [
+        'The breachcheck command checks passwords against a local index of',
+        'breached passwords, without network. The index is built once from',
+        'a dump of SHA-1 hashes ("HASH:COUNT" lines, as the ones of Have I',
+        'Been Pwned) into ~/.csp/breaches.idx, or the CSP_BREACH_INDEX path,',
+        'and it is read with memory mapping, so a dump of several GB costs',
+        'no memory. When there is an index, crftp, add and upd also warn',
+        'about breached passwords.'
+    ],
+    'usage': ['breachcheck [password] [--build dump]'],
+    'arguments': {
+        'password': 'Password to check (Def: every password of the database)',
+        '--build\t': 'Convert a dump of SHA-1 hashes to the index',
+    },
+    'examples': {
+        'Build the index:': ' CSP> breachcheck --build pwned-passwords-sha1.txt\n',
+        'Check a password:': ' CSP> breachcheck Password1!\n',
+        'Check the database:': ' CSP> breachcheck'
+    }
+}
+
+VAULTS_HELP: Dict[str, Union[Dict[str, str], List[str], str]] = {
+    'title': 'vaults',
+    'description': [
+        'The databases are registered in ~/.csp/vaults.json with their path,',
+        'last use, number of entries and key derivation, so the folder is not',
+        'walked on every start. The default database is used by the oneliner',
+        'mode when there are several and --vault is not given. Databases',
+        'copied into the folder by hand are registered with rescan.'
+    ],
+    'usage': ['vaults [default [name] | rescan]'],
+    'arguments': {
+        'default': 'Set the default database, unset it without name',
+        'rescan': 'Register the databases of the csp folder'
+    },
+    'examples': {
+        'Show the databases:': ' CSP> vaults\n',
+        'Use work by default:': ' CSP> vaults default work\n',
+        'Register copied databases:': ' CSP> vaults rescan'
+    }
+}
+
+RENDER_HELP: Dict[str, Union[Dict[str, str], List[str], str]] = {
+    'title': 'render',
+    'description': [
+        'The tables of entries are displayed row by row with a small',
+        'animation (animated), all at once (instant) or each row as soon as',
+        'it is read with fixed widths, without keeping the table in memory',
+        '(stream). By default they are animated in a terminal and instant',
+        'when the output is redirected, the CSP_RENDER_MODE environment',
+        'variable and the -R option of the oneliner mode also set it.'
+    ],
+    'usage': ['render [animated | instant | stream | auto]'],
+    'arguments': {
+        'mode': 'The mode for the session, auto follows the terminal'
+    },
+    'examples': {
+        'Show the current mode:': ' CSP> render\n',
+        'Stream a big database:': ' CSP> render stream'
+    }
+}
+
 # Oneliner Mode
 MAIN_HELP_ONELINER: Dict[str, Union[Dict[str, str], List[str]]] = {
     'description': [
@@ -142,29 +420,51 @@ MAIN_HELP_ONELINER: Dict[str, Union[Dict[str, str], List[str]]] = {
         'passwords in an encrypted database. It also generates strong',
         'passwords to improve the security of your online accounts.'
     ],
-    'usage': ['csp.py {prompt oneliner} [-h]'],
+    'usage': ['csp.py {prompt oneliner batch agent} [-h]'],
     'pos_args': {
         'prompt': 'Interactive mode for password management.',
-        'oneliner': 'One-liner mode for quick password operations.'
+        'oneliner': 'One-liner mode for quick password operations.',
+        'batch\t': 'Runs a file of commands in one transaction [-c] [-V].',
+        'agent\t': 'Keeps the unlocked keys for oneliner [-t ttl] [-k].'
     }
 }
 
 ARGS_HELP_ONELINER: Dict[str, Union[Dict[str, str], List[str], str]] = {
-    'usage': ['csp.py oneliner [-cm, -h], [-cr, -x, -a, -u, -d, -l, -sc]'],
+    'usage': ['csp.py oneliner [-cm, -h], [-cr, -x, -a, -u, -d, -l, -im, -sc], [-bk, -rs]'],
     'options': {
         '-cp, --craft-password': 'converts a phrase into a stronger password',
+        '--from-file\t': 'craft each line of a file ("-" stdin) with -cr',
+        '--rules\t': 'rule set of ~/.csp/rules.json used by -cr',
+        '--variants\t': 'show the k strongest variants of the phrase of -cr',
+        '-V, --vault\t': 'name or path of the database (Def: default vault)',
+        '-R, --render\t': 'animated, instant or stream tables (Def: auto)',
+        '-F, --format\t': 'json, jsonl, tsv or plain output instead of tables',
         '-x, --execute\t': 'execute a command of prompt mode',
         '-h, --help\t\t': 'show this help message and exit'
     },
     'crud_options': {
         '-l, --list\t': 'list the fields in database',
+        '--limit, --after': 'list the database by pages',
+        '--order, --desc': 'sort the list by id, site or username',
+        '--reveal\t': 'display the passwords in the list',
+        '-f, --find\t': 'search site or username in every database',
+        '-au, --audit\t': 'report the weak passwords of the database',
+        '-bc, --breach-check': 'check a password, or the database, offline',
+        '--build\t': 'build the breach index from a SHA-1 dump',
+        '-sh, --show\t': 'display the password of an entry',
+        '-co, --copy\t': 'copy the password of an entry to the clipboard',
         '-a, --add\t': 'adds a new record in database',
         '-d, --delete': 'remove the data in the database',
-        '-u, --update': 'update the data in the database'
+        '-u, --update': 'update the data in the database',
+        '-im, --import': 'import entries from a csv/json export'
     },
     'conf_options': {
         '-cm, --change-masterkey': 'change the CSP masterkey',
-        '-cl, --change-location': 'modify the path of database file'
+        '-rk, --rekey-data': 'replace the data key of the database',
+        '-cb, --calibrate [--apply]': 'tune the key derivation of the database',
+        '-cl, --change-location': 'modify the path of database file',
+        '-bk, --backup\t': 'create an encrypted backup of the database',
+        '-rs, --restore\t': 'restore a backup as a new database'
     }
 }
 
@@ -199,7 +499,7 @@ def list_to_text(
     style:      StyleType,
     justify:    Optional[JustifyMethod] = None,
 ) -> Text:
-    return Text(''.join(line for line in data), style=style, justify=justify)
+    return Text(' '.join(line for line in data), style=style, justify=justify)
 
 def change_keys(
     DICT_TEXT:  Dict[str, Union[Dict[str, str], List[str]]],
@@ -1,4 +1,4 @@
-from typing import Union, Any, List, Tuple
+from typing import Union, Any, List, Tuple, Dict, Iterator
 
 def safe_access_to_array(
     array:      List[Any],
@@ -9,3 +9,41 @@ def safe_access_to_array(
         return array[index]
     except IndexError:
         return err_return
+
+def extract_options(
+    args:       List[str],
+    options:    Dict[str, bool]
+) -> Tuple[List[str], Dict[str, Union[str, bool, None]]]:
+    """
+    Separate the '--option [value]' pairs from the positional arguments of a
+    command.
+
+    Args:
+        args (List[str]): The arguments of the command.
+        options (Dict[str, bool]): The options accepted, mapped to whether
+        they take a value (True) or are simple switches (False).
+
+    Returns:
+        Tuple[List[str], Dict[str, Union[str, bool, None]]]: The positional
+        arguments and the value of each option (None if not provided).
+
+    Raises:
+        ValueError: If an option is unknown or its value is missing.
+    """
+    positional: List[str] = []
+    values: Dict[str, Union[str, bool, None]] = dict.fromkeys(options)
+    words: Iterator[str] = iter(args)
+    for word in words:
+        if not word.startswith('--'):
+            positional.append(word)
+            continue
+        name: str = word[2:]
+        if name not in options:
+            raise ValueError(f'the option {word} is not valid')
+        if not options[name]:
+            values[name] = True
+            continue
+        values[name] = next(words, None)
+        if values[name] is None:
+            raise ValueError(f'the option {word} needs a value')
+    return (positional, values)
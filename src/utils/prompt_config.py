@@ -18,12 +18,12 @@ def welcome_msg() -> None:
     welcome: str = 'The first time cps is run, a master key must be created'
     func_masterkey0: str = 'The master key will be used to encrypt passwords'
     func_masterkey1: str = 'and as an authentication method'
-    title_req: str = 'The master key must have the following requirements'
+    title_req: str = 'The master key must be hard to guess'
     req: List[str]= [
-        'Minimum length of eight characters',
-        'At least one upper and one lower case letter',
-        'Contain at least one number',
-        'At least one special character',
+        'Long, as several unrelated words or a crafted phrase (crftp)',
+        'Not a common password, name or word, even with leet (p4$$w0rd)',
+        'No keyboard patterns (qwerty), sequences (1234), repeats or years',
+        'Capitals or symbols only at the start or the end do not help much',
     ]
     vs.print(welcome, type='inf')
     vs.print(f'{func_masterkey0} {func_masterkey1}', type='inf', end='\n')
@@ -0,0 +1,61 @@
+# Compile the frequency lists of the strength estimator.
+#
+# usage: python tools/build_strength_words.py
+#
+# Each file of tools/strength_lists is one list, its words in order of
+# frequency separated by spaces or new lines, the lines that start with '#'
+# are comments: the position of a word in its list is its rank. The words are
+# lowered and each one keeps its best rank in any list, then they are written
+# to StrengthEstimator.WORDS_FILE sorted, with their ranks as an array of 32
+# bits, so the estimator reads them without parsing and finds a word with a
+# binary search. Run it after changing a list and commit both.
+from typing import Dict, List
+from array import array
+from pathlib import Path
+from sys import byteorder, path
+
+SRC_DIR: Path = Path(__file__).resolve().parent.parent / 'src'
+LISTS_DIR: Path = Path(__file__).resolve().parent / 'strength_lists'
+path.insert(0, str(SRC_DIR))
+
+from modules.Strength import StrengthEstimator
+
+def read_list(list_path: Path) -> List[str]:
+    """
+    Returns:
+        List[str]: The words of the list in order, without repetitions.
+    """
+    words: Dict[str, None] = {}
+    for line in list_path.read_text(encoding='utf-8').splitlines():
+        if line.lstrip().startswith('#'):
+            continue
+        for word in line.lower().split():
+            words.setdefault(word, None)
+    return list(words)
+
+def main() -> None:
+    ranks: Dict[str, int] = {}
+    for list_path in sorted(LISTS_DIR.glob('*.txt')):
+        words: List[str] = read_list(list_path)
+        for rank, word in enumerate(words, 1):
+            if rank < ranks.get(word, rank + 1):
+                ranks[word] = rank
+        print(f'{list_path.stem:<12} {len(words):>7,} words')
+
+    words = sorted(ranks)
+    sorted_ranks: array = array('I', map(ranks.__getitem__, words))
+    if byteorder == 'big':
+        sorted_ranks.byteswap()
+    data: bytes = (
+        StrengthEstimator.WORDS_HEADER.pack(StrengthEstimator.WORDS_MAGIC, len(words))
+        + sorted_ranks.tobytes()
+        + '\n'.join(words).encode()
+    )
+    StrengthEstimator.WORDS_FILE.write_bytes(data)
+    print(
+        f'{"total":<12} {len(words):>7,} words, {len(data):,} bytes '
+        f'-> {StrengthEstimator.WORDS_FILE}'
+    )
+
+if __name__ == '__main__':
+    main()